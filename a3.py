@@ -1,15 +1,25 @@
 import tkinter as tk
 from tkinter import filedialog  # For masters task
-from typing import Callable, Union, Optional
+from typing import Callable, Iterable, Union, Optional
 from a3_support import *
 from model import *
 from constants import *
+from events import (PlantAdded, PlantAged, PlantHarvested, PlantRemoved,
+                    TileChanged)
+from game_loop import RealTimeLoop
+from profiling import FrameProfiler
+from redraw_scheduler import RedrawScheduler
+from sprites import SpriteAtlas
 
+# How often to check whether the sprites have finished preloading
+PRELOAD_POLL_MS = 50
 
 # Implement your classes here
 
 
-def play_game(root: tk.Tk, map_file: str) -> None:
+def play_game(root: tk.Tk, map_file: str,
+              profile_path: Optional[str] = None,
+              days_per_minute: Optional[float] = None) -> None:
     """
     • Constructs controller instance using given map file and root tk.Tk
       parameter.
@@ -21,8 +31,15 @@ def play_game(root: tk.Tk, map_file: str) -> None:
         map_file : str
             File path to game map file containing rectangular grid of characters
             representing layout of game world.
+        profile_path : Optional[str]
+            File to write timing statistics to (JSON if it ends in .json,
+            otherwise CSV) when the window is closed.
+        days_per_minute : Optional[float]
+            If given, days pass in real time at this rate, as well as when
+            the "Next day" button is pressed.
     """
-    FarmGame(root, map_file)
+    FarmGame(root, map_file, profile_path=profile_path,
+             days_per_minute=days_per_minute)
     root.mainloop()
 
 
@@ -30,33 +47,117 @@ def play_game(root: tk.Tk, map_file: str) -> None:
 class FarmView(AbstractGrid):
     """
     Inherits from AbstractGrid. Grid displaying farm map, player, and plants.
+    Keeps one composited ground image, one persistent canvas item per plant,
+    and one for the player, and on each redraw only updates what changed.
+
+    Only a viewport of the farm is shown, which scrolls to follow the player.
+    Work per redraw is proportional to the number of visible cells, not the
+    size of the farm.
     """
     def __init__(self, master: tk.Tk | tk.Frame, dimensions: tuple[int, int],
-                 size: tuple[int, int], **kwargs) -> None:
+                 size: tuple[int, int],
+                 viewport: Optional[tuple[int, int]] = None,
+                 sprites: Optional[SpriteAtlas] = None, **kwargs) -> None:
         """
         Sets up FarmView as AbstractGrid with appropriate dimensions and
-        size. Creates instance attribute of empty dictionary to be used as image
-        cache.
+        size.
 
         Parameters:
             master (tk.Tk | tk.Frame):
                 Parent widget to place this frame in. Can be Tk root window or
                 tk.Frame instance.
             dimensions (tuple[int, int]):
-                Number of rows and columns in grid.
+                Number of rows and columns in farm.
             size (tuple[int, int]):
                 Width and height of each cell in grid.
+            viewport (Optional[tuple[int, int]]):
+                Number of rows and columns of the farm visible at once. If
+                None, the whole farm is visible.
+            sprites (Optional[SpriteAtlas]):
+                Atlas to look up images in. If None, the view creates its own.
         """
-        super().__init__(master, dimensions, size, **kwargs)
-        self._farm_view_cache = {}
+        self._farm_dimensions = dimensions
+        self._viewport = viewport or dimensions
+        super().__init__(master, self._viewport, size, **kwargs)
+        self._sprites = sprites if sprites is not None else SpriteAtlas()
         self.CELL_WIDTH, self.CELL_HEIGHT = self.get_cell_size()
+        # (row, column) of the farm cell in the top left of the view
+        self._origin = (0, 0)
+        self._reset_items()
+
+    def _reset_items(self) -> None:
+        """
+        Forgets all persistent canvas items, so the next redraw recreates
+        them.
+        """
+        # Ground is one composited image of the visible cells;
+        # _ground_tiles[row][column] is the tile drawn in each visible cell
+        self._ground_item = None
+        self._ground_photo = None
+        self._ground_tiles = []
+        # farm (row, column) -> (canvas item, image name, image) for visible
+        # plants; the image is kept so it stays alive while shown
+        self._plant_items = {}
+        # (canvas item, image name, position, image) for the player
+        self._player_item = None
+
+    def clear(self) -> None:
+        """
+        Clears all items off the farm view.
+        """
+        super().clear()
+        self._reset_items()
+
+    def get_origin(self) -> tuple[int, int]:
+        """
+        Returns the farm (row, column) shown in the top left cell of the view.
+        """
+        return self._origin
+
+    def is_visible(self, position: tuple[int, int]) -> bool:
+        """
+        Returns True iff the farm cell at position is inside the viewport.
+        """
+        row, column = position
+        top, left = self._origin
+        rows, columns = self._viewport
+        return top <= row < top + rows and left <= column < left + columns
+
+    def farm_to_view(self, position: tuple[int, int]) -> tuple[int, int]:
+        """
+        Converts a farm (row, column) position to a cell of this grid.
+        """
+        return position[0] - self._origin[0], position[1] - self._origin[1]
+
+    def follow(self, player_position: tuple[int, int]) -> bool:
+        """
+        Moves the viewport so the player is centred, without showing anything
+        past the edges of the farm.
+
+        Parameters:
+            player_position (tuple[int, int]):
+                Coordinates of player in farm.
+
+        Returns:
+            (bool): True iff the viewport moved.
+        """
+        origin = tuple(
+            max(0, min(position - visible // 2, total - visible))
+            for position, visible, total in zip(
+                player_position, self._viewport, self._farm_dimensions)
+        )
+        if origin == self._origin:
+            return False
+        self._origin = origin
+        return True
 
     def redraw(self, ground: list[str], plants: dict[tuple[int, int], "Plant"],
-               player_position: tuple[int, int], player_direction: str) -> None:
+               player_position: tuple[int, int], player_direction: str,
+               dirty: Optional[Iterable[tuple[int, int]]] = None) -> None:
         """
-        Clears farm view, then creates (on FarmView instance) images for ground,
-        then plants, then player. Player and plants should render in front of
-        ground, and player should render in front of plants.
+        Brings the images for ground, plants and player up to date with the
+        model, scrolling to follow the player. Player and plants render in
+        front of ground, and player renders in front of plants.
 
         Parameters:
             ground (list[str]):
@@ -67,37 +168,91 @@ class FarmView(AbstractGrid):
                 Coordinates of player in farm.
             player_direction (str):
                 Direction player is facing.
+            dirty (Optional[Iterable[tuple[int, int]]]):
+                Cells whose ground or plant may have changed since the last
+                redraw. If None, every visible cell is compared against what
+                is currently drawn.
         """
-        # clear farm view
-        self.clear()
-
-        # create images for ground and plants and player
-        self.draw_map(ground)
-        self.draw_plants(plants)
+        if self.follow(player_position):
+            # Scrolled: everything visible is now in a different cell
+            self.clear()
+
+        if dirty is None or self._ground_item is None:
+            self.draw_map(ground)
+            self.draw_plants(plants)
+        else:
+            for position in dirty:
+                if not self.is_visible(position):
+                    continue
+                row, column = position
+                self.draw_tile(ground[row][column], row, column)
+                self.draw_plant(plants.get(position), row, column)
         self.draw_player(player_position, player_direction)
 
     def draw_image_at_tile(self, image: tk.PhotoImage, row: int, 
-                           column: int) -> None:
+                           column: int, tags: str = "") -> int:
         """
-        Draws given image at given row and column in abstract grid.
+        Draws given image at given row and column of the farm.
 
         Parameters:
             image (tk.PhotoImage):
                 Image to be drawn.
             row (int):  
-                Row number of cell to draw image in.
+                Row number of farm cell to draw image in.
             column (int):
-                Column number of cell to draw image in.
+                Column number of farm cell to draw image in.
+            tags (str):
+                Tags to give the new canvas item.
+
+        Returns:
+            (int): Id of the created canvas item.
         """
         # translate row to pixel location
-        x_position, y_position = self.get_midpoint((row, column))
+        x_position, y_position = self.get_midpoint(
+            self.farm_to_view((row, column)))
 
         # draw image at pixel location
-        self.create_image(x_position, y_position, image=image)
+        return self.create_image(x_position, y_position, image=image, tags=tags)
+
+    def _get_cell_image(self, sprite: str) -> tk.PhotoImage:
+        """
+        Returns sprite (a path relative to the images directory) resized to
+        one cell.
+        """
+        return self._sprites.get_photo(sprite,
+                                       (self.CELL_WIDTH, self.CELL_HEIGHT))
+
+    def _visible_cells(self) -> Iterable[tuple[int, int]]:
+        """
+        Yields the farm (row, column) of every visible cell.
+        """
+        top, left = self._origin
+        rows, columns = self._viewport
+        for row in range(top, top + rows):
+            for column in range(left, left + columns):
+                yield row, column
 
     def draw_map(self, ground: list[str]) -> None:
         """
-        Creates (on FarmView instance) images for ground.
+        Brings the ground image up to date. The first call composites every
+        visible tile into a single image, shown as one canvas item; later
+        calls only patch the tiles that changed.
+
+        Parameters:
+            ground (list[str]):
+                List of strings representing ground tiles in farm.
+        """
+        if self._ground_item is None:
+            self.composite_ground(ground)
+            return
+
+        for row, column in self._visible_cells():
+            self.draw_tile(ground[row][column], row, column)
+
+    def composite_ground(self, ground: list[str]) -> None:
+        """
+        Composites the visible ground tiles into one image with PIL and shows
+        it as a single canvas item behind the plants and player.
 
         Parameters:
             ground (list[str]):
@@ -105,60 +260,125 @@ class FarmView(AbstractGrid):
         """
         width = self.CELL_WIDTH
         height = self.CELL_HEIGHT
-        # Get images of ground
-        grass_image = get_image("images/grass.png", (width, height), 
-                                self._farm_view_cache)
-        soil_image = get_image("images/soil.png", (width, height),
-                               self._farm_view_cache)
-        untilled_soil_image = get_image("images/untilled_soil.png", 
-                                        (width, height), self._farm_view_cache)
-
-        # Draw an image at each tile of corresponding ground type
-        row_number = -1
-        column_number = -1
-
-        # draw picture for each tile
-        for row in ground:
-            row_number += 1
-            column_number = -1
-
-            for column in row:
-                column_number += 1
-
-                if column == GRASS:
-                    self.draw_image_at_tile(
-                        grass_image, row_number, column_number)
-                elif column == SOIL:
-                    self.draw_image_at_tile(
-                        soil_image, row_number, column_number)
-                elif column == UNTILLED:
-                    self.draw_image_at_tile(
-                        untilled_soil_image, row_number, column_number)
+        tile_images = {
+            tile: self._sprites.get_image(IMAGES[tile], (width, height))
+            for tile in (GRASS, SOIL, UNTILLED)
+        }
+        top, left = self._origin
+        rows, columns = self._viewport
+        ground_image = Image.new("RGBA", (columns * width, rows * height))
+
+        # Maps mostly repeat the same few rows, so each distinct row is
+        # composited once and then pasted as a strip
+        strips = {}
+        self._ground_tiles = []
+        for row_number in range(rows):
+            row_text = ground[top + row_number][left:left + columns]
+            strip = strips.get(row_text)
+            if strip is None:
+                strip = Image.new("RGBA", (columns * width, height))
+                for column_number, tile in enumerate(row_text):
+                    if tile in tile_images:
+                        strip.paste(tile_images[tile], (column_number * width, 0))
+                strips[row_text] = strip
+            ground_image.paste(strip, (0, row_number * height))
+            self._ground_tiles.append(list(row_text))
+
+        if self._ground_item is not None:
+            self.delete(self._ground_item)
+        self._ground_photo = ImageTk.PhotoImage(ground_image)
+        self._ground_item = self.create_image(0, 0, image=self._ground_photo,
+                                              anchor=tk.NW, tags="ground")
+        self.tag_lower(self._ground_item)
+
+    def draw_tile(self, tile: str, row: int, column: int) -> None:
+        """
+        Patches one visible tile of the ground image if it has changed, by
+        copying the tile's image into that region of the ground image.
+
+        Parameters:
+            tile (str):
+                Ground tile at this cell (GRASS, SOIL or UNTILLED).
+            row (int):
+                Row number of farm cell.
+            column (int):
+                Column number of farm cell.
+        """
+        if tile not in (GRASS, SOIL, UNTILLED):
+            return
+        view_row, view_column = self.farm_to_view((row, column))
+        if self._ground_tiles[view_row][view_column] == tile:
+            return
+
+        tile_image = self._get_cell_image(IMAGES[tile])
+        x_min, y_min, _, _ = self.get_bbox((view_row, view_column))
+        self.tk.call(str(self._ground_photo), "copy", str(tile_image),
+                     "-to", x_min, y_min)
+        self._ground_tiles[view_row][view_column] = tile
 
     def draw_plants(self, plants: dict[tuple[int, int], Plant]) -> None:
         """
-        Draws plants on farm view.
+        Brings images for every visible plant up to date, removing images of
+        plants no longer on the farm.
 
         Parameters:
             plants (dict[tuple[int, int], Plant]):
                 Dictionary mapping coordinates of plants to plant objects.
         """
-        for (row, column), plant_class in plants.items():
-            
-            # find plant image
-            plant_stage = plant_class.get_stage()
-            plant_name = plant_class.get_name()
-            plant_image = get_image(
-                f"images/plants/{plant_name}/stage_{plant_stage}.png", 
-                (self.CELL_WIDTH, self.CELL_HEIGHT), self._farm_view_cache)
-            
-            self.draw_image_at_tile(plant_image, row, column)
+        for (row, column) in list(self._plant_items):
+            if (row, column) not in plants:
+                self.draw_plant(None, row, column)
+
+        # Look up whichever is smaller: the plants, or the visible cells
+        rows, columns = self._viewport
+        if len(plants) <= rows * columns:
+            for (row, column), plant_class in plants.items():
+                if self.is_visible((row, column)):
+                    self.draw_plant(plant_class, row, column)
+        else:
+            for row, column in self._visible_cells():
+                plant_class = plants.get((row, column))
+                if plant_class is not None:
+                    self.draw_plant(plant_class, row, column)
+
+    def draw_plant(self, plant: Optional[Plant], row: int, column: int) -> None:
+        """
+        Brings image for the plant in one visible cell up to date.
+
+        Parameters:
+            plant (Optional[Plant]):
+                Plant in this cell, or None if the cell has no plant.
+            row (int):
+                Row number of farm cell.
+            column (int):
+                Column number of farm cell.
+        """
+        item = self._plant_items.get((row, column))
+        if plant is None:
+            if item is not None:
+                self.delete(item[0])
+                del self._plant_items[(row, column)]
+            return
+
+        # find plant image
+        image_name = get_plant_image_name(plant)
+        if item is not None and item[1] == image_name:
+            return
+
+        image = self._get_cell_image(image_name)
+        if item is None:
+            item_id = self.draw_image_at_tile(image, row, column, "plant")
+            self.tag_raise("player")
+        else:
+            item_id = item[0]
+            self.itemconfig(item_id, image=image)
+        self._plant_items[(row, column)] = (item_id, image_name, image)
 
     def draw_player(self, player_position: tuple[int, int], 
                     player_direction: str) -> None:
         """
-        Creates (on FarmView instance) image for player. Uses get_image function
-        (a3_support.py) to create image.
+        Creates (on FarmView instance) image for player, or moves and turns
+        the existing image.
 
         Parameters:
             player_position (tuple[int, int]):
@@ -167,13 +387,25 @@ class FarmView(AbstractGrid):
                 Direction player is facing.
         """
         # Get image of player
-        player_image = get_image(f"images/{IMAGES[player_direction]}",
-                                 (self.CELL_WIDTH, self.CELL_HEIGHT), 
-                                 self._farm_view_cache)
-
-        # Draw image of player
-        self.draw_image_at_tile(
-            player_image, player_position[0], player_position[1])
+        image_name = IMAGES[player_direction]
+        if self._player_item is None:
+            player_image = self._get_cell_image(image_name)
+            item_id = self.draw_image_at_tile(
+                player_image, player_position[0], player_position[1], "player")
+            self._player_item = (item_id, image_name, player_position,
+                                 player_image)
+            return
+
+        item_id, drawn_image_name, drawn_position, player_image = \
+            self._player_item
+        if image_name != drawn_image_name:
+            player_image = self._get_cell_image(image_name)
+            self.itemconfig(item_id, image=player_image)
+        if player_position != drawn_position:
+            self.coords(item_id, *self.get_midpoint(
+                self.farm_to_view(player_position)))
+        self._player_item = (item_id, image_name, player_position,
+                             player_image)
 
 
 class InfoBar(AbstractGrid):
@@ -194,12 +426,12 @@ class InfoBar(AbstractGrid):
         """
         super().__init__(master, (2, 3), 
                          (FARM_WIDTH + INVENTORY_WIDTH, INFO_BAR_HEIGHT))
-        self.draw_infobar_headings()
+        self.clear()
 
     def redraw(self, day: int, money: int, energy: int) -> None:
         """
-        Clears InfoBar and redraws it to display provided day, money, and
-        energy.
+        Updates InfoBar to display provided day, money, and energy. Only the
+        text items whose value changed since the last redraw are updated.
 
         Parameters:
             day (int):
@@ -209,14 +441,18 @@ class InfoBar(AbstractGrid):
             energy (int):
                 Amount of energy player has.
         """
-        self.clear()
-        self.draw_infobar_headings()
-
         # Write data for each column
         font = ("Helvetica", 15)
         annotations = [(0, day), (1, f"${money}"), (2, energy)]
-        for annotation in annotations:
-            self.annotate_position((1, annotation[0]), annotation[1], font)
+        for column, value in annotations:
+            item = self._value_items.get(column)
+            if item is None:
+                self._value_items[column] = (self.create_text(
+                    self.get_midpoint((1, column)), text=value, font=font),
+                    value)
+            elif item[1] != value:
+                self.itemconfig(item[0], text=value)
+                self._value_items[column] = (item[0], value)
 
     def draw_infobar_headings(self) -> None:
         """
@@ -227,6 +463,15 @@ class InfoBar(AbstractGrid):
         for index, heading in enumerate(headings):
             self.annotate_position((0, index), heading, HEADING_FONT)
 
+    def clear(self) -> None:
+        """
+        Clears InfoBar, leaving only the headings.
+        """
+        super().clear()
+        # column -> (text item, value shown)
+        self._value_items = {}
+        self.draw_infobar_headings()
+
 
 class ItemView(tk.Frame):
     """
@@ -296,10 +541,11 @@ class ItemView(tk.Frame):
         self._item_name = item_name
         self._sell_price = f"${SELL_PRICES[item_name]}"
 
-        # create info label
-        self._item_info_label = tk.Label(self, bg="#fdc074", 
-            text=f"{self._item_name}: {amount}\nSell price: \
-            {self._sell_price}\nBuy price: {self._buy_price}")
+        # create info label, remembering what it shows
+        self._amount = amount
+        self._colour = INVENTORY_COLOUR
+        self._item_info_label = tk.Label(self, bg=self._colour,
+                                         text=self._get_label_text(amount))
         
         # bind click event to pass item name to select command
         self._item_info_label.bind("<Button-1>", 
@@ -322,31 +568,43 @@ class ItemView(tk.Frame):
         # Bind a left click on frame to pass in item name into select command
         self.bind("<Button-1>", lambda event: select_command(self._item_name))
 
+    def _get_label_text(self, amount: int) -> str:
+        """
+        Returns text for the info label when the player has amount of this
+        item.
+        """
+        return (f"{self._item_name}: {amount}\nSell price: "
+                f"{self._sell_price}\nBuy price: {self._buy_price}")
+
     def update(self, amount: int, selected: bool = False) -> None:
         """
         Updates text on label, and colour of this ItemView. Called by controller
-        when model changes.
+        when model changes. Widgets are only reconfigured if what they show
+        has changed.
         """
         # update label text
-        self._item_info_label.config(
-            text=
-            f"{self._item_name}: {amount}\nSell price: \
-{self._sell_price}\nBuy price: {self._buy_price}")
-        
-        # update colour of item view
-        self._item_info_label.config(bg="#fdc074")
-        self.config(background="#fdc074")
-
-        if selected == True and self._item_name in ["Potato Seed", "Kale Seed",
-                                                    "Berry Seed"]:
-            self._item_info_label.config(bg="#d68f54")
-            self.config(background="#d68f54")
+        if amount != self._amount:
+            self._item_info_label.config(text=self._get_label_text(amount))
+            self._amount = amount
 
+        # update colour of item view
+        colour = INVENTORY_COLOUR
+        if selected and self._item_name in SEEDS:
+            colour = INVENTORY_SELECTED_COLOUR
         if amount == 0:
-            self._item_info_label.config(bg="grey")
-            self.config(background="grey")
+            colour = INVENTORY_EMPTY_COLOUR
+
+        if colour != self._colour:
+            self._item_info_label.config(bg=colour)
+            self.config(background=colour)
+            self._colour = colour
 
 # Controller Class
+# Events which change what is drawn in a farm cell
+_CELL_EVENTS = (TileChanged, PlantAdded, PlantAged, PlantHarvested,
+                PlantRemoved)
+
+
 class FarmGame:
     """
     Controller class for game. Responsible for creating and maintaining
@@ -354,7 +612,10 @@ class FarmGame:
     communication between model and view classes.
     """
 
-    def __init__(self, master: tk.Tk, map_file: str) -> None:
+    def __init__(self, master: tk.Tk, map_file: str,
+                 max_fps: float = MAX_FRAME_RATE,
+                 profile_path: Optional[str] = None,
+                 days_per_minute: Optional[float] = None) -> None:
         """
         Sets up FarmGame. Does the following:
             • Set title of window.
@@ -365,7 +626,8 @@ class FarmGame:
               "Next day" displayed below other view classes. When this button is
               pressed, model advances to next day, then view classes are redrawn
               to reflect changes in model.
-            • Bind handle keypress method to "<KeyPress>" event.
+            • Bind handle keypress method to "<KeyPress>" event, and F3 to
+              toggle the profiling overlay.
             • Call redraw method to ensure view draws according to current model
               state.
 
@@ -374,17 +636,57 @@ class FarmGame:
                 Tk root window.
             map_file (str):
                 Name of file containing map data.
+            max_fps (float):
+                Maximum number of times per second the views are redrawn.
+            profile_path (Optional[str]):
+                File to write timing statistics to when the window is closed
+                (JSON if it ends in .json, otherwise CSV). If None, nothing is
+                written.
+            days_per_minute (Optional[float]):
+                If given, days also pass in real time at this rate. The
+                simulation runs at a fixed rate independent of drawing.
         """
         # Create main window
         self._master = master
         master.title("Farm Game")
 
-        # Initialize cache and display title header
-        self._cache = {}
-        header_file = get_image("images/header.png",
-                                (FARM_WIDTH + INVENTORY_WIDTH, BANNER_HEIGHT), 
-                                self._cache)
-        _header_image = tk.Label(master, image=header_file)
+        # Redraws requested by event handlers are merged and drawn at most
+        # once per frame
+        self._scheduler = RedrawScheduler(master, self.draw, max_fps)
+
+        # Model actions and render stages are timed; F3 shows the statistics
+        self._profiler = FrameProfiler()
+        self._profile_path = profile_path
+        self._overlay_shown = False
+
+        # Initiate FarmModel and establish some variables
+        self.FarmModel = FarmModel(map_file)
+        self._player = self.FarmModel.get_player()
+        self._profiler.instrument_model(self.FarmModel)
+
+        # Every change to the model schedules a redraw of just the cells it
+        # touched, so handlers never need to work out what to redraw
+        self.FarmModel.get_events().subscribe(self.handle_model_events)
+
+        # Work out which part of the farm is shown (at most MAX_VIEW_CELLS
+        # cells each way) and so what size cells are drawn at
+        map_rows, map_columns = self.FarmModel.get_dimensions()
+        viewport = (min(map_rows, MAX_VIEW_CELLS),
+                    min(map_columns, MAX_VIEW_CELLS))
+        cell_size = (FARM_WIDTH // viewport[1], FARM_WIDTH // viewport[0])
+        header_size = (FARM_WIDTH + INVENTORY_WIDTH, BANNER_HEIGHT)
+
+        # Start loading every sprite in the background, header first
+        self._sprites = SpriteAtlas()
+        self._sprites.preload(
+            [("header.png", header_size)]
+            + [(sprite, cell_size) for sprite in self._sprites.list_sprites()
+               if sprite != "header.png"])
+        self._master.after(PRELOAD_POLL_MS, self.report_preload_time)
+
+        # Display title header
+        self._header_file = self._sprites.get_photo("header.png", header_size)
+        _header_image = tk.Label(master, image=self._header_file)
         _header_image.pack()
 
         # Create and pack middle frame for FarmView and ItemView
@@ -394,19 +696,11 @@ class FarmGame:
         self._bottom_frame = tk.Frame(master)
         self._bottom_frame.pack(side=tk.TOP, fill=tk.X)
 
-        # Initiate FarmModel and establish some variables
-        self.FarmModel = FarmModel(map_file)
-        self._player = self.FarmModel.get_player()
-
-        
-
         # Initiate FarmView
-        self.list_map = read_map(map_file)
-        map_rows = len(self.list_map)
-        map_columns = len(self.list_map[0])
         self.FarmView = FarmView(self._middle_frame,
                                         (map_rows, map_columns), 
-                                        (FARM_WIDTH, FARM_WIDTH))
+                                        (FARM_WIDTH, FARM_WIDTH), viewport,
+                                        self._sprites)
 
         # Initiate six ItemViews - one per item type and pack into item view frame
         self.ItemsView = tk.Frame(
@@ -443,22 +737,137 @@ class FarmGame:
         self._next_day_button = tk.Button(self._bottom_frame, text="Next day",command=self.next_day)
         self._next_day_button.pack(side=tk.TOP)
 
+        # Time each render stage
+        self._profiler.wrap(self.FarmView, ("redraw", "draw_map",
+                            "draw_plants", "draw_player"), "FarmView.")
+        self._profiler.wrap(self.InfoView, ("redraw",), "InfoBar.")
+        for panel in self.panels:
+            self._profiler.wrap(panel, ("update",), "ItemView.")
+
         # Redraw everything
         self.redraw()
 
         # bind keypress to event handler
         self._master.bind("<KeyPress>", self.handle_keypress)
+        self._master.bind("<F3>", self.toggle_profiler_overlay)
+        self._master.protocol("WM_DELETE_WINDOW", self.close)
+
+        # In real-time mode, days pass on a timer; each finished day's
+        # events only schedule a redraw, so drawing stays at its own capped
+        # frame rate
+        self._loop = None
+        if days_per_minute is not None:
+            self._loop = RealTimeLoop(master, self.FarmModel, days_per_minute)
+            self._loop.start()
+
+    def report_preload_time(self) -> None:
+        """
+        Records how long the sprite atlas took to preload, once it has
+        finished, in the timing statistics. Checks again later if
+        preloading is still running.
+        """
+        preload_time = self._sprites.get_preload_time()
+        if preload_time is None:
+            self._master.after(PRELOAD_POLL_MS, self.report_preload_time)
+            return
+        self._profiler.record("SpriteAtlas.preload", preload_time)
 
     def next_day(self) -> None:
         """
-        Advances game to next day, updating model and view as necessary.
+        Advances game to next day. The views are redrawn in response to the
+        model's events.
         """
         (self.FarmModel).new_day()
-        self.redraw()
 
-    def redraw(self) -> None:
+    def handle_model_events(self, events: list) -> None:
+        """
+        Schedules a redraw for a batch of model events, marking the cells
+        whose ground or plant changed as dirty.
+
+        Parameters:
+            events (list):
+                Events published by the model for one action or day.
+        """
+        self.redraw([event.position for event in events
+                     if isinstance(event, _CELL_EVENTS)])
+
+    def redraw(self, dirty: Optional[Iterable[tuple[int, int]]] = None) -> None:
+        """
+        Schedules a redraw of the game. Requests made within one frame are
+        merged into a single call to draw.
+
+        Parameters:
+            dirty (Optional[Iterable[tuple[int, int]]]):
+                Farm cells whose ground or plant may have changed. If None,
+                every visible cell is compared against what is drawn.
+        """
+        self._scheduler.request(dirty)
+
+    def get_redraw_stats(self) -> dict[str, int]:
+        """
+        Returns counts of redraws requested, performed, and coalesced.
+        """
+        return self._scheduler.get_stats()
+
+    def get_profiler(self) -> FrameProfiler:
+        """
+        Returns the profiler timing model actions and render stages.
+        """
+        return self._profiler
+
+    def toggle_profiler_overlay(self, event: Optional[tk.Event] = None) -> None:
+        """
+        Shows or hides the timing statistics drawn over the farm.
+        """
+        self._overlay_shown = not self._overlay_shown
+        if not self._overlay_shown:
+            self.FarmView.delete("profiler")
+        self.redraw(())
+
+    def draw_profiler_overlay(self) -> None:
+        """
+        Draws the timing statistics in the top left of the farm view,
+        recreating the text item if the view has been cleared.
+        """
+        text = self._profiler.format_stats() + "\n" + " ".join(
+            f"{name}={count}" for name, count in self.get_redraw_stats().items())
+        overlay = self.FarmView.find_withtag("profiler")
+        if overlay:
+            self.FarmView.itemconfig(overlay[0], text=text)
+        else:
+            self.FarmView.create_text(4, 4, text=text, anchor=tk.NW,
+                                      font=("Courier", 9), fill="white",
+                                      tags="profiler")
+        self.FarmView.tag_raise("profiler")
+
+    def close(self) -> None:
+        """
+        Writes timing statistics to the profile path, if one was given, then
+        closes the game window.
+        """
+        if self._loop is not None:
+            self._loop.stop()
+        if self._profile_path is not None:
+            self._profiler.dump(self._profile_path)
+        self._master.destroy()
+
+    def draw(self, dirty: Optional[Iterable[tuple[int, int]]] = None) -> None:
         """
         Redraws entire game based on current model state.
+
+        Parameters:
+            dirty (Optional[Iterable[tuple[int, int]]]):
+                Farm cells whose ground or plant may have changed. If None,
+                every visible cell is compared against what is drawn.
+        """
+        with self._profiler.timer("frame"):
+            self._draw_views(dirty)
+        if self._overlay_shown:
+            self.draw_profiler_overlay()
+
+    def _draw_views(self, dirty: Optional[Iterable[tuple[int, int]]]) -> None:
+        """
+        Brings every view up to date with the model.
         """
         # Retrieve some information from model
         farm_model = self.FarmModel
@@ -474,43 +883,17 @@ class FarmGame:
         player_direction = (player).get_direction()
         player_inventory = (player).get_inventory()
 
-        # clear farm view and redraw
-        (self.FarmView).clear()
+        # bring farm view up to date
         (self.FarmView).redraw(map, FarmModel_plants, player_position, 
-                               player_direction)
+                               player_direction, dirty)
 
         (self.InfoView).redraw(day_count, player_money, player_energy)
 
 
-        # get a list of how many items there are
-        item_count_list = []
-        for item in ITEMS:
-            try:
-                item_count_in_inventory = player_inventory[item]
-            except KeyError:
-                item_count_in_inventory = 0
-            item_count_list.append(item_count_in_inventory)
-        
-        # get index of selected item
-        selected_index = None
-        index = -1
-        for panel in self.panels:
-            index += 1
-            if self._selected_seed == panel._item_name:
-                selected_index = index
-                break
-
-        # update all item views and reset all selected item view's colours
-        for index in range(0, 6):
-            self.panels[index].update(item_count_list[index])
-        
-        # update selected item view and colour selected panel
-        try:
-            self.panels[selected_index].update(item_count_list[selected_index], 
-                                               True)
-        except TypeError:
-            pass
-        
+        # update each item view with its amount and whether it is selected
+        for panel, item in zip(self.panels, ITEMS):
+            panel.update(player_inventory.get(item, 0),
+                         item == self._selected_seed)
 
     def handle_keypress(self, event: tk.Event) -> None:
         """
@@ -620,8 +1003,6 @@ class FarmGame:
             # untill soil
             farm_model.untill_soil(player_position)
 
-        self.redraw()
-
     def select_item(self, item_name: str) -> None:
         """
         Sets selected item to be item name then redraws view.
@@ -631,7 +1012,7 @@ class FarmGame:
                 Name of item to be selected.
         """
         self._selected_seed = item_name
-        self.redraw()
+        self.redraw(())
 
     def buy_item(self, item_name: str) -> None:
         """
@@ -643,9 +1024,8 @@ class FarmGame:
                 Name of item to be bought.
         """
         player = self.FarmModel.get_player()
-        player.buy(item_name, BUY_PRICES[item_name])
-
-        self.redraw()
+        with self._profiler.timer("Player.buy"):
+            player.buy(item_name, BUY_PRICES[item_name])
 
     def sell_item(self, item_name: str) -> None:
         """
@@ -657,9 +1037,8 @@ class FarmGame:
                 Name of item to be sold.
         """
         player = self.FarmModel.get_player()
-        player.sell(item_name, SELL_PRICES[item_name])
-        
-        self.redraw()
+        with self._profiler.timer("Player.sell"):
+            player.sell(item_name, SELL_PRICES[item_name])
 
 
 def main():
@@ -0,0 +1,375 @@
+"""Compact binary log of every change to a farm, with fast replay.
+
+ActionLog listens to a FarmModel's events and appends one fixed-size record
+per change: the player moving or turning, tiles being tilled or untilled,
+plants being planted, harvested or removed, inventory, money and energy
+changing (which covers buying and selling), and days passing. Growth is not
+logged, as it follows from the days passing, except that days advanced in
+slices with FarmModel.iter_advance_days log each slice, so plants planted or
+harvested part way through are aged exactly as they were in play. The log
+starts with a snapshot of the farm as it was when logging began, so it can be
+replayed on its own.
+
+ActionReplay rebuilds the farm from a log headlessly by applying the records
+directly to a model. While replaying, it takes a snapshot every
+snapshot_interval records (outside sliced days), so seeking back to any
+record only replays the records after the nearest snapshot.
+
+Usage:
+    python action_log.py log_file [record_index]
+"""
+import struct
+import sys
+import time
+from typing import BinaryIO, Optional
+
+from constants import *
+from events import (
+    DayAdvanced,
+    DaySliceAged,
+    EnergyChanged,
+    Event,
+    InventoryChanged,
+    MoneyChanged,
+    PlantAdded,
+    PlantHarvested,
+    PlantRemoved,
+    PlayerMoved,
+    TileChanged,
+)
+from model import FarmModel, HarvestIndex, PotatoPlant, KalePlant, BerryPlant
+from tile_grid import TileGrid
+
+MAGIC = b"FARMLOG2"
+
+# Every record is (opcode, small argument, a, b). Money, energy and
+# inventory amounts are not bounded by the game, so a and b are 64-bit.
+_RECORD = struct.Struct("<BBqq")
+(OP_MOVE, OP_TILE, OP_PLANT, OP_HARVEST, OP_REMOVE, OP_ITEM, OP_MONEY,
+ OP_ENERGY, OP_DAY, OP_SLICE, OP_SLICED_DAYS) = range(1, 12)
+
+# Plant kinds and items are logged as indices into these
+PLANT_KINDS = (PotatoPlant, KalePlant, BerryPlant)
+_PLANT_CODES = {plant_class().get_name(): code
+                for code, plant_class in enumerate(PLANT_KINDS)}
+_ITEM_CODES = {item: code for code, item in enumerate(ITEMS)}
+
+# Snapshot layout: a header, the inventory, the tiles, then the plants
+_STATE_HEADER = struct.Struct("<IIqqqiiBII")
+_INVENTORY_ENTRY = struct.Struct("<Bq")
+_PLANT_ENTRY = struct.Struct("<iiBbqq")
+_LENGTH = struct.Struct("<I")
+
+
+def _item_code(item: str) -> int:
+    """Returns the code an item is logged as, raising ValueError for items
+    the log cannot record.
+    """
+    try:
+        return _ITEM_CODES[item]
+    except KeyError:
+        raise ValueError(f"Cannot log unknown item {item!r}") from None
+
+
+def _plant_code(name: str) -> int:
+    """Returns the code a kind of plant is logged as, raising ValueError
+    for kinds the log cannot record.
+    """
+    try:
+        return _PLANT_CODES[name]
+    except KeyError:
+        raise ValueError(f"Cannot log unknown plant {name!r}") from None
+
+
+def encode_state(model: FarmModel) -> bytes:
+    """Returns a compact binary snapshot of the whole farm."""
+    player = model.get_player()
+    rows, columns = model.get_dimensions()
+    inventory = player.get_inventory()
+    plants = model.get_plants()
+    parts = [
+        _STATE_HEADER.pack(
+            rows, columns, model.get_days_elapsed(), player.get_energy(),
+            player.get_money(), *player.get_position(),
+            ord(player.get_direction()), len(inventory), len(plants)),
+    ]
+    parts.extend(_INVENTORY_ENTRY.pack(_item_code(item), amount)
+                 for item, amount in inventory.items())
+    parts.append(model.get_map().to_bytes())
+    parts.extend(_PLANT_ENTRY.pack(row, col, _plant_code(plant.get_name()),
+                                   *plant.get_state())
+                 for (row, col), plant in plants.items())
+    return b"".join(parts)
+
+
+def decode_state(data: bytes, vectorized: bool = False) -> FarmModel:
+    """Returns a new model in the state captured by encode_state.
+
+    Parameters:
+        data: A snapshot returned by encode_state.
+        vectorized: As for the FarmModel constructor.
+    """
+    (rows, columns, day, energy, money, player_row, player_col, direction,
+     item_count, plant_count) = _STATE_HEADER.unpack_from(data)
+    offset = _STATE_HEADER.size
+    inventory = {}
+    for code, amount in _INVENTORY_ENTRY.iter_unpack(
+            data[offset : offset + item_count * _INVENTORY_ENTRY.size]):
+        inventory[ITEMS[code]] = amount
+    offset += item_count * _INVENTORY_ENTRY.size
+
+    tiles = bytearray(data[offset : offset + rows * columns])
+    offset += rows * columns
+    model = FarmModel.from_grid(TileGrid(tiles, (rows, columns)), vectorized)
+
+    plants = model.get_plants()
+    for row, col, kind, *state in _PLANT_ENTRY.iter_unpack(
+            data[offset : offset + plant_count * _PLANT_ENTRY.size]):
+        plant = PLANT_KINDS[kind]()
+        plant.set_state(*state)
+        plants[(row, col)] = plant
+
+    player = model.get_player()
+    player.set_energy(energy)
+    player.set_money(money)
+    player.set_position((player_row, player_col))
+    player.set_direction(chr(direction))
+    player.get_inventory().clear()
+    player.get_inventory().update(inventory)
+    model.set_days_elapsed(day)
+    model.rebuild_harvest_index()
+    return model
+
+
+class ActionLog:
+    """Appends every change to a farm to a log file."""
+
+    def __init__(self, path: str, model: FarmModel,
+                 buffer_size: int = 1 << 16) -> None:
+        """Constructor for a log, which snapshots the farm and then records
+            each change to it.
+
+        Parameters:
+            path: The file to write the log to. Any existing file is replaced.
+            model: The farm to log.
+            buffer_size: The number of bytes of records to collect before
+                writing them to the file.
+        """
+        self._model = model
+        self._file = open(path, "wb")
+        snapshot = encode_state(model)
+        self._file.write(MAGIC + _LENGTH.pack(len(snapshot)) + snapshot)
+        self._buffer = bytearray()
+        self._buffer_size = buffer_size
+        self._records = 0
+        model.get_events().subscribe(self.handle_events)
+
+    def __enter__(self) -> "ActionLog":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def get_record_count(self) -> int:
+        """Returns the number of records logged."""
+        return self._records
+
+    def handle_events(self, events: list[Event]) -> None:
+        """Appends a record for each event in a batch."""
+        pack = _RECORD.pack
+        buffer = self._buffer
+        before = len(buffer)
+        for event in events:
+            event_type = type(event)
+            if event_type is EnergyChanged:
+                buffer += pack(OP_ENERGY, 0, event.energy, 0)
+            elif event_type is PlayerMoved:
+                buffer += pack(OP_MOVE, ord(event.direction), *event.position)
+            elif event_type is TileChanged:
+                buffer += pack(OP_TILE, ord(event.tile), *event.position)
+            elif event_type is PlantAdded:
+                buffer += pack(OP_PLANT, _plant_code(event.name), *event.position)
+            elif event_type is PlantHarvested:
+                buffer += pack(OP_HARVEST, 0, *event.position)
+            elif event_type is PlantRemoved:
+                buffer += pack(OP_REMOVE, 0, *event.position)
+            elif event_type is InventoryChanged:
+                buffer += pack(OP_ITEM, _item_code(event.item), event.delta, 0)
+            elif event_type is MoneyChanged:
+                buffer += pack(OP_MONEY, 0, event.money, 0)
+            elif event_type is DaySliceAged:
+                if event.start == 0:
+                    # Begins the days, recording how many
+                    buffer += pack(OP_SLICED_DAYS, 0, event.days, 0)
+                buffer += pack(OP_SLICE, 0, event.start, event.end)
+            elif event_type is DayAdvanced:
+                buffer += pack(OP_DAY, 0, event.day, 0)
+        self._records += (len(buffer) - before) // _RECORD.size
+        if len(buffer) >= self._buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes buffered records to the file."""
+        self._file.write(self._buffer)
+        self._file.flush()
+        self._buffer.clear()
+
+    def close(self) -> None:
+        """Writes any buffered records, closes the file and stops logging."""
+        self._model.get_events().unsubscribe(self.handle_events)
+        self.flush()
+        self._file.close()
+
+
+class ActionReplay:
+    """Rebuilds the states of a farm from its log."""
+
+    def __init__(self, source: BinaryIO, snapshot_interval: int = 10000,
+                 vectorized: bool = False) -> None:
+        """Constructor for a replay of a complete log.
+
+        Parameters:
+            source: A binary file open on the log.
+            snapshot_interval: Take a snapshot after this many records while
+                replaying.
+            vectorized: As for the FarmModel constructor.
+        """
+        data = source.read()
+        if data[: len(MAGIC)] != MAGIC:
+            raise ValueError("not a farm action log")
+        offset = len(MAGIC)
+        (length,) = _LENGTH.unpack_from(data, offset)
+        offset += _LENGTH.size
+        self._snapshots = {0: data[offset : offset + length]}
+        offset += length
+        self._records = memoryview(data)[offset:]
+        self._interval = snapshot_interval
+        self._vectorized = vectorized
+        # For days being replayed in slices: how many, the positions of the
+        # plants when they began, and those removed since
+        self._day_count = 0
+        self._day_positions = None
+        self._day_removed = set()
+
+    def get_record_count(self) -> int:
+        """Returns the number of complete records in the log."""
+        return len(self._records) // _RECORD.size
+
+    def seek(self, index: Optional[int] = None) -> FarmModel:
+        """Returns a new model in the state after the first index records,
+            replaying from the nearest snapshot at or before index.
+
+        Parameters:
+            index: The number of records to apply, or None for all of them.
+        """
+        count = self.get_record_count()
+        index = count if index is None else max(0, min(index, count))
+        start = max(i for i in self._snapshots if i <= index)
+        model = decode_state(self._snapshots[start], self._vectorized)
+        self._day_positions = None
+        self._day_removed.clear()
+
+        # Replay in steps of the snapshot interval, snapshotting after each
+        position = start
+        while position < index:
+            end = min(index, (position // self._interval + 1) * self._interval)
+            self.apply(model, position, end)
+            position = end
+            # A snapshot cannot hold a day part way through
+            if (position % self._interval == 0 and position not in self._snapshots
+                    and self._day_positions is None):
+                self._snapshots[position] = encode_state(model)
+        return model
+
+    def apply(self, model: FarmModel, start: int, end: int) -> None:
+        """Applies records start to end (exclusive) to the model. Records
+        must be applied in order, as a day played in slices spans several.
+        """
+        player = model.get_player()
+        plants = model.get_plants()
+        grid = model.get_map()
+        index = model.get_harvest_index()
+        size = _RECORD.size
+        for op, arg, a, b in _RECORD.iter_unpack(
+                self._records[start * size : end * size]):
+            if op == OP_ENERGY:
+                player.set_energy(a)
+            elif op == OP_MOVE:
+                player.set_position((a, b))
+                player.set_direction(chr(arg))
+            elif op == OP_TILE:
+                grid.set_tile((a, b), chr(arg))
+            elif op == OP_PLANT:
+                plant = plants[(a, b)] = PLANT_KINDS[arg]()
+                index.add((a, b), plant.get_name(), plant.get_stage())
+            elif op == OP_HARVEST:
+                plant = plants[(a, b)]
+                stage = plant.get_stage()
+                plant.harvest()
+                index.update((a, b), plant.get_name(), stage, plant.get_stage())
+            elif op == OP_REMOVE:
+                plant = plants[(a, b)]
+                index.remove((a, b), plant.get_name(), plant.get_stage())
+                del plants[(a, b)]
+                if self._day_positions is not None:
+                    self._day_removed.add((a, b))
+            elif op == OP_ITEM:
+                if a > 0:
+                    player.add_item((ITEMS[arg], a))
+                else:
+                    player.remove_item((ITEMS[arg], -a))
+            elif op == OP_MONEY:
+                player.set_money(a)
+            elif op == OP_SLICED_DAYS:
+                self._day_count = a
+                self._day_positions = list(plants)
+                self._day_removed.clear()
+            elif op == OP_SLICE:
+                self._age_slice(plants, index, a, b)
+            elif op == OP_DAY:
+                if self._day_positions is not None:
+                    # The end of sliced days; their plants are already aged
+                    self._day_positions = None
+                    model.set_days_elapsed(a)
+                else:
+                    model.advance_days(a - model.get_days_elapsed())
+            else:
+                raise ValueError(f"Unknown record type {op}")
+
+    def _age_slice(self, plants: dict, index: HarvestIndex, start: int,
+                   end: int) -> None:
+        """Ages one slice of the plants of days being replayed in slices,
+        as FarmModel.iter_advance_days did.
+        """
+        removed = self._day_removed
+        days = self._day_count
+        for position in self._day_positions[start:end]:
+            if position in removed:
+                continue
+            plant = plants[position]
+            stage = plant.get_stage()
+            plant.age_days(days)
+            if plant.get_stage() != stage:
+                index.update(position, plant.get_name(), stage, plant.get_stage())
+
+
+def main() -> None:
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    with open(sys.argv[1], "rb") as file:
+        replay = ActionReplay(file)
+    index = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    start = time.perf_counter()
+    model = replay.seek(index)
+    elapsed = time.perf_counter() - start
+    records = replay.get_record_count() if index is None else index
+    player = model.get_player()
+    print(f"replayed {records} records in {elapsed:.3f} s")
+    print(f"day {model.get_days_elapsed()}, money {player.get_money()}, "
+          f"energy {player.get_energy()}, position {player.get_position()}, "
+          f"{len(model.get_plants())} plants, inventory {player.get_inventory()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""Headless batch simulation of many farms across processes.
+
+Each farm is a FarmModel loaded from the same map and driven by a scripted
+sequence of actions. Farms are distributed to a process pool in chunks, and
+the result for each farm is yielded as soon as it finishes. Only the model
+layer is imported, so workers never load tkinter or PIL.
+
+Actions are tuples whose first element names the action:
+    ("move", direction)  direction in {UP, DOWN, LEFT, RIGHT}
+    ("till",)            till the soil at the player's position
+    ("untill",)          untill the soil at the player's position
+    ("plant", seed)      plant one of the given seed, e.g. "Kale Seed"
+    ("harvest",)         harvest the plant at the player's position
+    ("remove",)          remove the plant at the player's position
+    ("buy", item)        buy one of the item at its BUY_PRICES price
+    ("sell", item)       sell one of the item at its SELL_PRICES price
+    ("new_day",)         advance to the next day
+    ("advance", days)    advance by the given number of days
+
+Usage:
+    python batch.py map_file scripts.json [workers]
+
+where scripts.json holds a list of action lists. One JSON result is printed
+per farm as it finishes.
+"""
+import json
+import multiprocessing
+import os
+import sys
+from collections.abc import Iterable, Iterator, Sequence
+from typing import NamedTuple, Optional
+
+from constants import *
+from model import FarmModel, PotatoPlant, KalePlant, BerryPlant
+
+# The plant grown from each seed
+SEED_PLANTS = {
+    "Potato Seed": PotatoPlant,
+    "Kale Seed": KalePlant,
+    "Berry Seed": BerryPlant,
+}
+
+
+class FarmResult(NamedTuple):
+    """The final state of one simulated farm."""
+
+    index: int
+    money: int
+    inventory: dict[str, int]
+    days: int
+
+
+def apply_action(model: FarmModel, action: Sequence) -> None:
+    """Applies one scripted action to the model, with the same rules as the
+        keypresses and buttons handled by FarmGame. Actions which cannot be
+        performed are ignored.
+
+    Parameters:
+        model: The model to update.
+        action: The action to apply, as described in the module docstring.
+    """
+    name = action[0]
+    player = model.get_player()
+    position = player.get_position()
+
+    if name == "move":
+        model.move_player(action[1])
+    elif name == "till":
+        model.till_soil(position)
+    elif name == "untill":
+        model.untill_soil(position)
+    elif name == "plant":
+        seed = action[1]
+        row, col = position
+        if (
+            seed in SEED_PLANTS
+            and player.get_inventory().get(seed, 0) > 0
+            and model.get_map()[row][col] == SOIL
+            and model.add_plant(position, SEED_PLANTS[seed]())
+        ):
+            player.remove_item((seed, 1))
+    elif name == "harvest":
+        result = model.harvest_plant(position)
+        if result is not None:
+            player.add_item(result)
+    elif name == "remove":
+        model.remove_plant(position)
+    elif name == "buy":
+        if action[1] in BUY_PRICES:
+            player.buy(action[1], BUY_PRICES[action[1]])
+    elif name == "sell":
+        if action[1] in SELL_PRICES:
+            player.sell(action[1], SELL_PRICES[action[1]])
+    elif name == "new_day":
+        model.new_day()
+    elif name == "advance":
+        model.advance_days(action[1])
+    else:
+        raise ValueError(f"Unknown action: {name!r}")
+
+
+def simulate_farm(
+    map_file: str, actions: Iterable[Sequence], index: int = 0
+) -> FarmResult:
+    """Runs one farm through the given actions.
+
+    Parameters:
+        map_file: The path to the map to load.
+        actions: The actions to apply, in order.
+        index: The index of the farm within its batch.
+
+    Returns:
+        The final state of the farm.
+    """
+    model = FarmModel(map_file)
+    for action in actions:
+        apply_action(model, action)
+    player = model.get_player()
+    return FarmResult(
+        index,
+        player.get_money(),
+        dict(player.get_inventory()),
+        model.get_days_elapsed(),
+    )
+
+
+def _simulate_job(job: tuple[int, str, Sequence[Sequence]]) -> FarmResult:
+    """Pool entry point, unpacking a (index, map_file, actions) job."""
+    index, map_file, actions = job
+    return simulate_farm(map_file, actions, index)
+
+
+def run_batch(
+    map_file: str,
+    scripts: Sequence[Sequence[Sequence]],
+    workers: Optional[int] = None,
+    chunksize: Optional[int] = None,
+) -> Iterator[FarmResult]:
+    """Simulates one farm per script in a pool of worker processes, yielding
+        each farm's result as soon as it finishes. Results arrive in
+        completion order; use FarmResult.index to match them to scripts.
+
+    Parameters:
+        map_file: The path to the map every farm starts from.
+        scripts: One sequence of actions per farm.
+        workers: The number of worker processes. Defaults to the number of
+            CPUs.
+        chunksize: The number of farms sent to a worker at a time. Defaults
+            to splitting the scripts into about four chunks per worker.
+    """
+    workers = workers or os.cpu_count() or 1
+    if chunksize is None:
+        chunksize = max(1, len(scripts) // (4 * workers))
+    jobs = ((index, map_file, actions) for index, actions in enumerate(scripts))
+
+    if workers == 1:
+        yield from map(_simulate_job, jobs)
+        return
+
+    with multiprocessing.Pool(workers) as pool:
+        yield from pool.imap_unordered(_simulate_job, jobs, chunksize)
+
+
+def main() -> None:
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(1)
+    map_file, scripts_file = sys.argv[1], sys.argv[2]
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    with open(scripts_file) as file:
+        scripts = json.load(file)
+    for result in run_batch(map_file, scripts, workers):
+        print(json.dumps(result._asdict()), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Measures the cost of logging a long game with action_log, how fast the log
+replays, and how long seeking to a random point takes once snapshots exist.
+
+Usage:
+    python benchmarks/bench_action_log.py [days]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from action_log import ActionLog, ActionReplay
+from batch import apply_action
+from benchmarks.bench_batch import season_script
+from model import FarmModel
+
+MAP_FILE = os.path.join(ROOT, "maps", "map2.txt")
+
+
+def play(model: FarmModel, script: list[tuple]) -> float:
+    """Applies the script to the model and returns the elapsed time."""
+    start = time.perf_counter()
+    for action in script:
+        apply_action(model, action)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    script = season_script(days)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "game.log")
+        unlogged = play(FarmModel(MAP_FILE), script)
+        model = FarmModel(MAP_FILE)
+        with ActionLog(path, model) as log:
+            logged = play(model, script)
+        print(f"{len(script)} actions: {len(script) / unlogged:,.0f} actions/s "
+              f"unlogged, {len(script) / logged:,.0f} actions/s logged")
+        print(f"{log.get_record_count()} records, "
+              f"{os.path.getsize(path) / 1024:.0f} KiB")
+
+        with open(path, "rb") as file:
+            replay = ActionReplay(file)
+        start = time.perf_counter()
+        replay.seek()
+        elapsed = time.perf_counter() - start
+        print(f"replay: {replay.get_record_count() / elapsed:,.0f} records/s")
+
+        rng = random.Random(0)
+        seeks = 100
+        start = time.perf_counter()
+        for _ in range(seeks):
+            replay.seek(rng.randrange(replay.get_record_count()))
+        elapsed = time.perf_counter() - start
+        print(f"seek to a random record: {elapsed / seeks * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Measures how batch.run_batch scales with the number of worker processes.
+
+Usage:
+    python benchmarks/bench_batch.py [farms] [max_workers]
+"""
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from batch import run_batch
+from constants import DOWN, LEFT, RIGHT, UP
+
+MAP_FILE = os.path.join(ROOT, "maps", "map2.txt")
+
+
+def season_script(days: int = 30) -> list[tuple]:
+    """Returns a script which tills and plants a row of potatoes each day,
+    harvests what is ready, and sells the harvest.
+    """
+    script = [("move", DOWN), ("move", RIGHT)]
+    for _ in range(days):
+        for _ in range(8):
+            script += [("till",), ("plant", "Potato Seed"), ("harvest",),
+                       ("move", RIGHT)]
+        script += [("move", LEFT)] * 8
+        script += [("sell", "Potato"), ("buy", "Potato Seed"), ("new_day",)]
+    return script
+
+
+def main() -> None:
+    farms = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 1
+    scripts = [season_script()] * farms
+
+    baseline = None
+    workers = 1
+    print(f"{farms} farms")
+    print(f"{'workers':>8} {'farms/s':>10} {'speedup':>8}")
+    while workers <= max_workers:
+        start = time.perf_counter()
+        for _ in run_batch(MAP_FILE, scripts, workers):
+            pass
+        rate = farms / (time.perf_counter() - start)
+        baseline = baseline or rate
+        print(f"{workers:>8} {rate:>10.1f} {rate / baseline:>7.2f}x")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Farms scattered regions of a huge chunked world and reports the cost of
+actions and days, the chunk cache's behaviour and the process's peak memory.
+
+Usage:
+    python benchmarks/bench_chunked_world.py [regions] [budget_mb]
+"""
+import os
+import random
+import resource
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from chunked_world import ChunkedFarmModel
+from model import BerryPlant, KalePlant, PotatoPlant
+
+SIZE = 1_000_000
+REGION = 40
+
+
+def farm_region(model: ChunkedFarmModel, origin: tuple[int, int],
+                rng: random.Random) -> int:
+    """Tills, plants and harvests a square region, returning the number of
+    actions taken.
+    """
+    player = model.get_player()
+    actions = 0
+    for row in range(origin[0], origin[0] + REGION):
+        for col in range(origin[1], origin[1] + REGION):
+            position = (row, col)
+            player.set_energy(100)
+            player.set_position(position)
+            model.harvest_plant(position)
+            model.till_soil(position)
+            model.add_plant(position, rng.choice(
+                (PotatoPlant, KalePlant, BerryPlant))())
+            actions += 3
+    return actions
+
+
+def main() -> None:
+    regions = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    budget = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    model = ChunkedFarmModel((SIZE, SIZE), memory_budget=budget * 2 ** 20)
+    rng = random.Random(0)
+    origins = [(rng.randrange(SIZE - REGION), rng.randrange(SIZE - REGION))
+               for _ in range(regions)]
+    try:
+        actions = 0
+        action_time = day_time = 0.0
+        for origin in origins:
+            start = time.perf_counter()
+            actions += farm_region(model, origin, rng)
+            action_time += time.perf_counter() - start
+            start = time.perf_counter()
+            model.new_day()
+            day_time += time.perf_counter() - start
+
+        # Revisit every region, catching up its plants
+        start = time.perf_counter()
+        for origin in origins:
+            actions += farm_region(model, origin, rng)
+        revisit_time = time.perf_counter() - start
+
+        print(f"{SIZE}x{SIZE} world, {regions} regions of {REGION}x{REGION}, "
+              f"{budget} MiB budget")
+        print(f"actions: {actions / (action_time + revisit_time):,.0f}/s")
+        print(f"new_day: {day_time / regions * 1000:.2f} ms")
+        print(f"revisiting after up to {regions} days: "
+              f"{revisit_time / regions * 1000:.1f} ms per region")
+        print(f"plants: {len(model.get_plants())}")
+        print("chunks:", model.get_chunks().get_stats())
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f"peak memory: {peak:.0f} MiB")
+    finally:
+        model.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Benchmarks FarmModel.new_day with plants stored as objects against the
+vectorized CropArrays engine, at 10k, 100k and 1M plants.
+
+Usage:
+    python benchmarks/bench_crop_engine.py [repeats]
+"""
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from model import FarmModel, PotatoPlant, KalePlant, BerryPlant
+
+MAP_FILE = os.path.join(ROOT, "maps", "map1.txt")
+SIZES = [10_000, 100_000, 1_000_000]
+CROPS = [PotatoPlant, KalePlant, BerryPlant]
+
+
+def build_model(num_plants: int, vectorized: bool) -> FarmModel:
+    """Returns a model with num_plants plants of mixed types, placed
+    directly into the plant mapping.
+
+    Parameters:
+        num_plants: The number of plants to add.
+        vectorized: Whether the model should use the vectorized engine.
+    """
+    model = FarmModel(MAP_FILE, vectorized=vectorized)
+    plants = model.get_plants()
+    for i in range(num_plants):
+        plants[(i // 1000, i % 1000)] = CROPS[i % len(CROPS)]()
+    model.rebuild_harvest_index()
+    return model
+
+
+def time_new_day(model: FarmModel, repeats: int) -> float:
+    """Returns the best time in seconds of one call to new_day."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.new_day()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print(f"{'plants':>10} {'objects (s)':>12} {'vectorized (s)':>15} {'speedup':>8}")
+    for size in SIZES:
+        objects = time_new_day(build_model(size, False), repeats)
+        vectorized = time_new_day(build_model(size, True), repeats)
+        print(f"{size:>10} {objects:>12.4f} {vectorized:>15.4f} "
+              f"{objects / vectorized:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Guards the cold-start cost of `import model` using `python -X importtime`.
+
+Runs a fresh interpreter several times, reports the cumulative import time of
+model and its heaviest dependencies, and exits with status 1 if the median
+exceeds the budget or if tkinter or PIL were imported.
+
+Usage:
+    python benchmarks/bench_import.py [budget_ms] [runs]
+"""
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+GUI_MODULES = ("tkinter", "_tkinter", "PIL")
+
+
+def import_times(module: str) -> dict[str, int]:
+    """Imports module in a fresh interpreter and returns the cumulative import
+    time in microseconds of every module loaded.
+    """
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in process.stderr.splitlines():
+        # Lines look like: "import time:   self [us] | cumulative | name"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def main() -> None:
+    budget_ms = float(sys.argv[1]) if len(sys.argv) > 1 else 50.0
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 7
+
+    samples = [import_times("model") for _ in range(runs)]
+    total_ms = statistics.median(times["model"] for times in samples) / 1000
+
+    print(f"import model: {total_ms:.2f} ms (median of {runs}, budget {budget_ms} ms)")
+    slowest = sorted(samples[-1].items(), key=lambda item: item[1], reverse=True)
+    for name, cumulative in slowest[:5]:
+        print(f"  {cumulative / 1000:8.2f} ms  {name}")
+
+    gui = [name for name in samples[-1] if name.split(".")[0] in GUI_MODULES]
+    if gui:
+        print(f"FAIL: GUI modules imported: {', '.join(gui)}")
+        sys.exit(1)
+    if total_ms > budget_ms:
+        print("FAIL: import time over budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
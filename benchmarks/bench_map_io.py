@@ -0,0 +1,89 @@
+"""Compares loading a large map from text with loading it from the RLE
+format, compressed and uncompressed. Each load runs in a fresh process so its
+peak memory can be reported.
+
+Usage:
+    python benchmarks/bench_map_io.py [size]
+"""
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from constants import *
+from map_io import convert_map
+
+_LOAD = """
+import resource, sys, time
+sys.path.insert(0, {root!r})
+from map_io import load_tiles
+start = time.perf_counter()
+grid = load_tiles({path!r})
+elapsed = time.perf_counter() - start
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(elapsed, peak)
+"""
+
+
+def write_map(path: str, size: int, rng: random.Random) -> None:
+    """Writes a map like maps/map2.txt: grass around fields of untilled soil,
+    divided by grass paths every few rows and columns.
+    """
+    def field_row() -> str:
+        tiles = []
+        while len(tiles) < size - 2:
+            tiles += UNTILLED * rng.randrange(20, 400) + GRASS * rng.randrange(1, 4)
+        return GRASS + "".join(tiles[: size - 2]) + GRASS + "\n"
+
+    with open(path, "w") as file:
+        file.write(GRASS * size + "\n")
+        row = 1
+        while row < size - 1:
+            line = field_row()
+            height = min(rng.randrange(10, 200), size - 1 - row)
+            file.write(line * height)
+            row += height
+            if row < size - 1:
+                file.write(GRASS * size + "\n")
+                row += 1
+        file.write(GRASS * size + "\n")
+
+
+def load(path: str) -> tuple[float, float]:
+    """Loads a map in a new process, returning the seconds taken and the
+    process's peak memory in MiB.
+    """
+    output = subprocess.run(
+        [sys.executable, "-c", _LOAD.format(root=ROOT, path=path)],
+        check=True, capture_output=True, text=True).stdout
+    elapsed, peak = output.split()
+    return float(elapsed), float(peak)
+
+
+def main() -> None:
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    with tempfile.TemporaryDirectory() as directory:
+        text = os.path.join(directory, "map.txt")
+        write_map(text, size, random.Random(0))
+        paths = {"text": text}
+        for name, compress in (("rle", False), ("rle+zlib", True)):
+            paths[name] = os.path.join(directory, f"{name}.rle")
+            start = time.perf_counter()
+            convert_map(text, paths[name], compress)
+            print(f"convert to {name}: {time.perf_counter() - start:.2f} s")
+
+        print(f"{size}x{size} map")
+        print(f"{'format':>10} {'file MiB':>10} {'load s':>8} {'peak MiB':>9}")
+        for name, path in paths.items():
+            elapsed, peak = load(path)
+            megabytes = os.path.getsize(path) / 2 ** 20
+            print(f"{name:>10} {megabytes:>10.2f} {elapsed:>8.3f} {peak:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
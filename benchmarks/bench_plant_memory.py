@@ -0,0 +1,63 @@
+"""Measures the memory used per plant with tracemalloc, for each crop type.
+
+Compares the slotted plant classes in model.py against equivalent classes
+with a per-instance __dict__ (the layout before __slots__ was added), and
+against the vectorized CropArrays engine where NumPy is available.
+
+Usage:
+    python benchmarks/bench_plant_memory.py [plants]
+"""
+import os
+import sys
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from model import PotatoPlant, KalePlant, BerryPlant
+
+
+def bytes_per_plant(make_plants, count: int) -> float:
+    """Returns the traced memory allocated per plant by make_plants(count),
+    including the mapping from positions to plants.
+    """
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        plants = make_plants(count)
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del plants
+    return (after - before) / count
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    try:
+        from crop_engine import CropArrays
+    except ImportError:
+        CropArrays = None
+
+    print(f"bytes per plant over {count} plants")
+    print(f"{'crop':>8} {'__dict__':>10} {'__slots__':>10} {'arrays':>10}")
+    for crop in (PotatoPlant, KalePlant, BerryPlant):
+        # Subclassing without __slots__ gives instances a __dict__ again
+        dict_crop = type(f"Dict{crop.__name__}", (crop,), {})
+        with_dict = bytes_per_plant(
+            lambda n: {(i, 0): dict_crop() for i in range(n)}, count
+        )
+        slotted = bytes_per_plant(lambda n: {(i, 0): crop() for i in range(n)}, count)
+
+        def make_arrays(n: int) -> "CropArrays":
+            plants = CropArrays(n)
+            for i in range(n):
+                plants[(i, 0)] = crop()
+            return plants
+
+        arrays = f"{bytes_per_plant(make_arrays, count):10.1f}" if CropArrays else "n/a"
+        print(f"{crop._NAME:>8} {with_dict:10.1f} {slotted:10.1f} {arrays:>10}")
+
+
+if __name__ == "__main__":
+    main()
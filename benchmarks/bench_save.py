@@ -0,0 +1,65 @@
+"""Measures save and load throughput of farm_save on a large farm, and
+checks that the loaded farm matches the one saved.
+
+Usage:
+    python benchmarks/bench_save.py [size] [plants]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import farm_save
+from action_log import encode_state
+from constants import *
+from model import FarmModel, PotatoPlant, KalePlant, BerryPlant
+from tile_grid import TileGrid
+
+
+def make_farm(size: int, plants: int, vectorized: bool) -> FarmModel:
+    """Returns a square farm of soil with plants at random positions."""
+    model = FarmModel.from_grid(
+        TileGrid(bytearray(SOIL.encode() * (size * size)), (size, size)),
+        vectorized)
+    rng = random.Random(0)
+    farm_plants = model.get_plants()
+    for cell in rng.sample(range(size * size), plants):
+        plant = rng.choice((PotatoPlant, KalePlant, BerryPlant))()
+        plant.age_days(rng.randrange(20))
+        farm_plants[divmod(cell, size)] = plant
+    model.get_player().add_item(("Potato Seed", 5))
+    return model
+
+
+def timed(function, *args) -> tuple[object, float]:
+    """Returns the result of calling function and the seconds it took."""
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main() -> None:
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 4000
+    plants = int(sys.argv[2]) if len(sys.argv) > 2 else 200000
+    print(f"{size}x{size} tiles, {plants} plants")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "farm.save")
+        for vectorized in (False, True):
+            model = make_farm(size, plants, vectorized)
+            _, elapsed = timed(farm_save.save, model, path)
+            megabytes = os.path.getsize(path) / 2 ** 20
+            print(f"vectorized={vectorized}")
+            print(f"  save: {elapsed * 1000:8.1f} ms  {megabytes / elapsed:8.0f} MB/s")
+            loaded, elapsed = timed(farm_save.load, path, vectorized)
+            print(f"  load: {elapsed * 1000:8.1f} ms  {megabytes / elapsed:8.0f} MB/s")
+            if encode_state(loaded) != encode_state(model):
+                raise SystemExit("loaded farm differs from the saved farm")
+        print("loaded farms match the saved farms")
+
+
+if __name__ == "__main__":
+    main()
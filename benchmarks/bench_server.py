@@ -0,0 +1,114 @@
+"""Load generator for farm_server.
+
+Opens one connection per session and plays a scripted season on each,
+keeping a window of requests in flight, then reports actions per second and
+checks that every session's responses came back in the order sent. Starts a
+server on a temporary Unix socket unless --port is given, in which case the
+server's own CPU time is also reported, since the client competes with it for
+the CPU when both run on one machine.
+
+Usage:
+    python benchmarks/bench_server.py [--sessions N] [--actions N]
+                                      [--window N] [--port PORT]
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.bench_batch import season_script
+
+
+async def play(open_connection, session: str, actions: list, window: int) -> None:
+    """Plays the actions on a new session, with at most window requests
+    awaiting a response at once.
+    """
+    reader, writer = await open_connection()
+    writer.write(json.dumps({"op": "open", "session": session,
+                             "map": "map2.txt"}).encode() + b"\n")
+    response = json.loads(await reader.readline())
+    if not response["ok"]:
+        raise RuntimeError(response["error"])
+
+    sent = received = 0
+    while received < len(actions):
+        requests = []
+        while sent < len(actions) and sent - received < window:
+            requests.append(json.dumps(
+                {"id": sent, "session": session, "action": actions[sent]}))
+            sent += 1
+        if requests:
+            writer.write(("\n".join(requests) + "\n").encode())
+            await writer.drain()
+        response = json.loads(await reader.readline())
+        if response["id"] != received:
+            raise RuntimeError(f"{session}: expected response {received}, "
+                               f"got {response['id']}")
+        received += 1
+
+    writer.write(json.dumps({"op": "close", "session": session}).encode() + b"\n")
+    await reader.readline()
+    writer.close()
+
+
+async def run(open_connection, sessions: int, actions: list, window: int) -> float:
+    """Plays every session concurrently and returns the elapsed time."""
+    start = time.perf_counter()
+    await asyncio.gather(*(play(open_connection, f"farm{index}", actions, window)
+                           for index in range(sessions)))
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--actions", type=int, default=2000)
+    parser.add_argument("--window", type=int, default=64)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int)
+    args = parser.parse_args()
+
+    actions = season_script()
+    actions = (actions * (args.actions // len(actions) + 1))[: args.actions]
+
+    server = None
+    if args.port is None:
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, "farm.sock")
+        server = subprocess.Popen(
+            [sys.executable, os.path.join(ROOT, "farm_server.py"), "--unix", path,
+             "--maps", os.path.join(ROOT, "maps")],
+            stdout=subprocess.PIPE,
+        )
+        server.stdout.readline()  # Wait until it is listening
+        open_connection = lambda: asyncio.open_unix_connection(path)
+    else:
+        open_connection = lambda: asyncio.open_connection(args.host, args.port)
+
+    try:
+        elapsed = asyncio.run(run(open_connection, args.sessions, actions,
+                                  args.window))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    total = args.sessions * len(actions)
+    print(f"{args.sessions} sessions x {len(actions)} actions in {elapsed:.2f} s: "
+          f"{total / elapsed:,.0f} actions/s, responses in order")
+    if server is not None:
+        usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+        cpu = usage.ru_utime + usage.ru_stime
+        print(f"server CPU {cpu:.2f} s: {total / cpu:,.0f} actions per CPU second")
+
+
+if __name__ == "__main__":
+    main()
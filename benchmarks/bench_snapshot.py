@@ -0,0 +1,52 @@
+"""Benchmarks headless rendering of a large farm with snapshot.FarmRenderer.
+
+Usage:
+    python benchmarks/bench_snapshot.py [size] [cell_size] [plant_density]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from constants import GRASS, SOIL, UNTILLED
+from model import FarmModel, PotatoPlant, KalePlant, BerryPlant
+from snapshot import FarmRenderer
+
+
+def main() -> None:
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    cell = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    density = float(sys.argv[3]) if len(sys.argv) > 3 else 0.1
+    rng = random.Random(0)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "map.txt")
+        with open(path, "w") as file:
+            for _ in range(size):
+                file.write("".join(rng.choice((GRASS, SOIL, UNTILLED))
+                                   for _ in range(size)) + "\n")
+        model = FarmModel(path)
+
+    plants = model.get_plants()
+    crops = (PotatoPlant, KalePlant, BerryPlant)
+    for _ in range(int(size * size * density)):
+        plants[(rng.randrange(size), rng.randrange(size))] = rng.choice(crops)()
+    model.rebuild_harvest_index()
+    model.advance_days(rng.randrange(1, 20))
+
+    renderer = FarmRenderer((cell, cell))
+    renderer.render(model)
+    start = time.perf_counter()
+    image = renderer.render(model)
+    elapsed = time.perf_counter() - start
+    print(f"{size}x{size} farm, {len(plants)} plants, {cell}px cells -> "
+          f"{image.shape[1]}x{image.shape[0]} image in {elapsed * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Measures saving, loading and daily recording of a large farm with
+farm_store. Full saves and loads scale with the number of plants; only the
+daily recording is expected to take milliseconds.
+
+Usage:
+    python benchmarks/bench_store.py [plants]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from constants import *
+from farm_store import FarmRecorder, FarmStore
+from model import FarmModel, PotatoPlant, KalePlant, BerryPlant
+
+
+def make_farm(directory: str, plants: int) -> FarmModel:
+    """Returns a square farm with the given number of plants."""
+    size = int((2 * plants) ** 0.5) + 1
+    map_file = os.path.join(directory, "map.txt")
+    with open(map_file, "w") as file:
+        file.write((SOIL * size + "\n") * size)
+    model = FarmModel(map_file)
+    rng = random.Random(0)
+    cells = rng.sample(range(size * size), plants)
+    farm_plants = model.get_plants()
+    for cell in cells:
+        farm_plants[divmod(cell, size)] = rng.choice(
+            (PotatoPlant, KalePlant, BerryPlant))()
+    return model
+
+
+def main() -> None:
+    plants = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    with tempfile.TemporaryDirectory() as directory:
+        model = make_farm(directory, plants)
+        with FarmStore(os.path.join(directory, "farms.db")) as store:
+            start = time.perf_counter()
+            store.save("farm", model)
+            print(f"save {plants} plants: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+            start = time.perf_counter()
+            store.load("farm")
+            print(f"load {plants} plants: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+            start = time.perf_counter()
+            store.load("farm", vectorized=True)
+            print(f"load {plants} plants vectorized: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+            # A day of play writes only what the player's actions changed
+            recorder = FarmRecorder(store, "farm", model)
+            player = model.get_player()
+            rows, columns = model.get_dimensions()
+            rng = random.Random(1)
+            elapsed = 0.0
+            for day in range(10):
+                for _ in range(50):
+                    position = (rng.randrange(rows), rng.randrange(columns))
+                    player.set_position(position)
+                    model.harvest_plant(position)
+                    model.till_soil(position)
+                start = time.perf_counter()
+                recorder.flush()
+                elapsed += time.perf_counter() - start
+                model.new_day()
+            recorder.close()
+            print(f"write one day's changes: {elapsed / 10 * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
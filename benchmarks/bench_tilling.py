@@ -0,0 +1,88 @@
+"""Benchmarks bulk tilling and untilling of large maps, comparing the
+TileGrid used by FarmModel with rebuilding row strings on every edit.
+
+Usage:
+    python benchmarks/bench_tilling.py [rows] [columns]
+"""
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from constants import SOIL, TILL_COST, UNTILL_COST, UNTILLED
+from model import FarmModel
+
+
+def write_map(path: str, rows: int, cols: int) -> None:
+    """Writes a map of untilled soil with the given dimensions."""
+    with open(path, "w") as file:
+        for _ in range(rows):
+            file.write(UNTILLED * cols + "\n")
+
+
+class StringFarmModel(FarmModel):
+    """FarmModel which stores its map as a list of strings and rebuilds a
+    row string on every edit, as FarmModel did before TileGrid.
+    """
+
+    def __init__(self, map_file: str) -> None:
+        super().__init__(map_file)
+        self._map = self._map.to_rows()
+
+    def get_dimensions(self) -> tuple[int, int]:
+        return (len(self._map), len(self._map[0]))
+
+    def till_soil(self, position: tuple[int, int]) -> None:
+        if self._player.get_energy() < TILL_COST:
+            return
+        row, col = position
+        if self._map[row][col] == UNTILLED:
+            self._player.reduce_energy(TILL_COST)
+            self._map[row] = self._map[row][:col] + SOIL + self._map[row][col + 1 :]
+
+    def untill_soil(self, position: tuple[int, int]) -> None:
+        if self._player.get_energy() < UNTILL_COST:
+            return
+        row, col = position
+        if position not in self._plants and self._map[row][col] == SOIL:
+            self._player.reduce_energy(UNTILL_COST)
+            self._map[row] = (
+                self._map[row][:col] + UNTILLED + self._map[row][col + 1 :]
+            )
+
+
+def till_model(model: FarmModel) -> float:
+    """Tills then untills every tile of the model's map, returning the
+    elapsed time in seconds.
+    """
+    # Give the player enough energy to edit every tile
+    model.get_player().reduce_energy(-(10**12))
+    num_rows, num_cols = model.get_dimensions()
+    positions = [(row, col) for row in range(num_rows) for col in range(num_cols)]
+    start = time.perf_counter()
+    for position in positions:
+        model.till_soil(position)
+    for position in positions:
+        model.untill_soil(position)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    cols = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "map.txt")
+        write_map(path, rows, cols)
+        edits = 2 * rows * cols
+        baseline = till_model(StringFarmModel(path))
+        grid = till_model(FarmModel(path))
+    print(f"{rows}x{cols} map, {edits} edits")
+    print(f"  row strings: {baseline:.3f} s ({baseline / edits * 1e6:.2f} us/edit)")
+    print(f"  tile grid:   {grid:.3f} s ({grid / edits * 1e6:.2f} us/edit)")
+
+
+if __name__ == "__main__":
+    main()
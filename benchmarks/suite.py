@@ -0,0 +1,449 @@
+"""Reproducible performance benchmark suite over synthetic maps.
+
+Generates maps from 10x10 up to 2000x2000 with a fixed random seed, fills
+them with plants at several densities and crop mixes, and times read_map,
+FarmModel.new_day, move_player, till_soil, harvest_plant, the Player.buy and
+sell loops, and FarmView.redraw. Without a Tk display, FarmView.redraw is
+timed against a stub canvas instead (under names ending in _stub), which
+covers the view's own work but not Tk's. Results are the median seconds per
+operation over several samples, written as JSON with the spread of each
+benchmark's samples so runs can be compared.
+
+Usage:
+    python benchmarks/suite.py [--sizes 10 100] [--output results.json]
+                               [--compare baseline.json] [--threshold 0.2]
+                               [--normalize]
+
+With --compare, exits with status 1 if any benchmark is slower than the
+baseline by more than the threshold (a fraction, e.g. 0.2 for 20%) plus a
+noise allowance: the sum of the benchmark's spreads in the two runs, and at
+least NOISE_FLOOR. On a shared machine whose speed drifts between runs,
+--normalize also divides out the median slowdown of all benchmarks, at the
+cost of missing a slowdown which affects every benchmark equally.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import types
+from collections.abc import Callable
+from typing import Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from constants import *
+from map_io import read_map
+from model import FarmModel, Player, PotatoPlant, KalePlant, BerryPlant
+
+SIZES = [10, 100, 500, 2000]
+DENSITIES = [0.01, 0.1, 0.5]
+CROP_MIXES = {
+    "potato": (PotatoPlant,),
+    "mixed": (PotatoPlant, KalePlant, BerryPlant),
+    "berry": (BerryPlant,),
+}
+SEED = 1234
+# Operations are repeated until each timing covers at least this many cells or
+# plants, so small maps are not dominated by timer noise
+MIN_WORK = 20000
+# Each sample repeats its operations until it takes at least this long
+MIN_SAMPLE_TIME = 0.05
+REPEATS = 9
+# The smallest noise allowance when comparing runs, as a fraction
+NOISE_FLOOR = 0.1
+# Enough energy that no benchmarked action is refused
+UNLIMITED_ENERGY = 10**12
+
+
+def spread(samples: list[float]) -> float:
+    """Returns the spread of samples relative to their median, as the
+    difference between the upper and lower quartiles over the median.
+    """
+    if len(samples) < 2:
+        return 0.0
+    lower, _, upper = statistics.quantiles(samples, n=4)
+    return (upper - lower) / statistics.median(samples)
+
+
+def time_samples(function: Callable[[], None], operations: int,
+                 repeats: int = REPEATS) -> list[float]:
+    """Returns several samples of the time per operation in seconds, with
+        garbage collection paused as timeit does.
+
+    Parameters:
+        function: Performs the operations being timed, once per call. Each
+            sample calls it as many times as needed to take MIN_SAMPLE_TIME.
+        operations: The number of operations each call performs.
+        repeats: The number of samples.
+    """
+    calls = 1
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        # Find how many calls make a sample long enough, as timeit does
+        while True:
+            start = time.perf_counter()
+            for _ in range(calls):
+                function()
+            elapsed = time.perf_counter() - start
+            if elapsed >= MIN_SAMPLE_TIME:
+                break
+            calls *= 2
+        samples = [elapsed / (calls * operations)]
+        for _ in range(repeats - 1):
+            start = time.perf_counter()
+            for _ in range(calls):
+                function()
+            samples.append((time.perf_counter() - start) / (calls * operations))
+    finally:
+        if enabled:
+            gc.enable()
+    return samples
+
+
+def record(results: dict, spreads: dict, name: str, samples: list[float]) -> None:
+    """Stores the median and spread of a benchmark's samples."""
+    results[name] = statistics.median(samples)
+    spreads[name] = spread(samples)
+
+
+def write_map(path: str, size: int, rng: random.Random) -> None:
+    """Writes a size x size map of grass bordering a mix of soil and untilled
+    soil.
+    """
+    with open(path, "w") as file:
+        for row in range(size):
+            if row in (0, size - 1):
+                file.write(GRASS * size + "\n")
+            else:
+                inner = "".join(rng.choice((SOIL, UNTILLED)) for _ in range(size - 2))
+                file.write(GRASS + inner + GRASS + "\n")
+
+
+def make_model(map_file: str, density: float, crops: tuple, rng: random.Random) -> FarmModel:
+    """Returns a model of the map with plants of the given crops covering
+    roughly density of its cells.
+    """
+    model = FarmModel(map_file)
+    model.get_player().reduce_energy(-UNLIMITED_ENERGY)
+    rows, columns = model.get_dimensions()
+    plants = model.get_plants()
+    for _ in range(int(rows * columns * density)):
+        plants[(rng.randrange(rows), rng.randrange(columns))] = rng.choice(crops)()
+    model.rebuild_harvest_index()
+    return model
+
+
+def bench_map(results: dict, spreads: dict, map_file: str, size: int,
+              rng: random.Random) -> None:
+    """Times benchmarks which depend only on the map."""
+    calls = max(1, MIN_WORK // size**2)
+
+    def read() -> None:
+        for _ in range(calls):
+            read_map(map_file)
+
+    record(results, spreads, f"read_map/size={size}", time_samples(read, calls))
+
+    model = make_model(map_file, 0, (PotatoPlant,), rng)
+    moves = [rng.choice((UP, DOWN, LEFT, RIGHT)) for _ in range(10000)]
+
+    def move() -> None:
+        for direction in moves:
+            model.move_player(direction)
+
+    record(results, spreads, f"move_player/size={size}",
+           time_samples(move, len(moves)))
+
+    positions = [(rng.randrange(size), rng.randrange(size)) for _ in range(10000)]
+
+    def till() -> None:
+        for position in positions:
+            model.till_soil(position)
+            model.untill_soil(position)
+
+    record(results, spreads, f"till_soil/size={size}",
+           time_samples(till, 2 * len(positions)))
+
+
+def bench_plants(results: dict, spreads: dict, map_file: str, size: int,
+                 density: float, mix: str, rng: random.Random) -> None:
+    """Times benchmarks which depend on the plants on the farm."""
+    key = f"size={size}/density={density}/mix={mix}"
+    model = make_model(map_file, density, CROP_MIXES[mix], rng)
+    plants = len(model.get_plants())
+    if not plants:
+        return
+    copies = max(1, MIN_WORK // plants)
+
+    def new_day() -> None:
+        for _ in range(copies):
+            model.new_day()
+
+    record(results, spreads, f"new_day/{key}", time_samples(new_day, copies))
+
+    # Harvest every plant of fresh, fully grown copies of the farm, built
+    # before timing starts
+    samples = []
+    for _ in range(5):
+        farms = []
+        for _ in range(copies):
+            farm = make_model(map_file, density, CROP_MIXES[mix], random.Random(SEED))
+            farm.advance_days(20)
+            farm.get_player().reduce_energy(-UNLIMITED_ENERGY)
+            farms.append((farm, list(farm.get_plants())))
+        start = time.perf_counter()
+        for farm, positions in farms:
+            for position in positions:
+                farm.harvest_plant(position)
+        samples.append((time.perf_counter() - start) / (copies * plants))
+        del farms
+    record(results, spreads, f"harvest_plant/{key}", samples)
+
+
+def bench_trading(results: dict, spreads: dict) -> None:
+    """Times repeated Player.buy and Player.sell."""
+    operations = 100000
+    player = Player()
+
+    def buy() -> None:
+        player.add_item(("Potato", operations))
+        for _ in range(operations):
+            player.sell("Potato", SELL_PRICES["Potato"])
+        for _ in range(operations):
+            player.buy("Potato Seed", BUY_PRICES["Potato Seed"])
+
+    record(results, spreads, "player_buy_sell", time_samples(buy, 2 * operations))
+
+
+def _stub_farm_view(tk, FarmView) -> type:
+    """Returns a FarmView whose canvas keeps its items in a dictionary instead
+    of drawing them with Tk, so it can be created without a display.
+    """
+
+    class StubTk:
+        """Stands in for the Tcl interpreter of a widget."""
+
+        def call(self, *args) -> None:
+            pass
+
+    class StubCanvas(tk.Canvas):
+        """Canvas which records its image items without Tk."""
+
+        def __init__(self, master=None, **kwargs) -> None:
+            self.tk = StubTk()
+            self._items = {}
+            self._next_item = 0
+
+        def create_image(self, x: int, y: int, **options) -> int:
+            self._next_item += 1
+            self._items[self._next_item] = [x, y, options]
+            return self._next_item
+
+        def itemconfig(self, item: int, **options) -> None:
+            self._items[item][2].update(options)
+
+        def coords(self, item: int, x: int, y: int) -> None:
+            self._items[item][:2] = [x, y]
+
+        def delete(self, *items) -> None:
+            for item in items:
+                if item == "all":
+                    self._items.clear()
+                else:
+                    self._items.pop(item, None)
+
+        def tag_raise(self, *args) -> None:
+            pass
+
+        def tag_lower(self, *args) -> None:
+            pass
+
+    class StubFarmView(FarmView, StubCanvas):
+        pass
+
+    return StubFarmView
+
+
+def bench_farm_view(results: dict, spreads: dict, map_file: str, size: int,
+                    rng: random.Random) -> Optional[str]:
+    """Times full and single-cell FarmView.redraw, on a hidden Tk window if
+        Tk can open a display and otherwise against a stub canvas.
+
+    Returns:
+        "tk" or "stub" for how the view was drawn, or None if the benchmark
+        was skipped because tkinter or PIL is not installed.
+    """
+    try:
+        import tkinter as tk
+        import a3
+        from sprites import SpriteAtlas
+    except ImportError:
+        return None
+
+    model = make_model(map_file, 0.1, CROP_MIXES["mixed"], rng)
+    dimensions = model.get_dimensions()
+    viewport = tuple(min(d, MAX_VIEW_CELLS) for d in dimensions)
+    args = (model.get_map(), model.get_plants(),
+            model.get_player_position(), model.get_player_direction())
+
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        root = None
+    if root is not None:
+        root.withdraw()
+        view = a3.FarmView(root, dimensions, (FARM_WIDTH, FARM_WIDTH), viewport)
+        update = root.update_idletasks
+        suffix = ""
+    else:
+        # Without a display, PIL images stand in for Tk images
+        class StubAtlas(SpriteAtlas):
+            def get_photo(self, sprite, size):
+                return self.get_image(sprite, size)
+
+        image_tk = a3.ImageTk
+        a3.ImageTk = types.SimpleNamespace(PhotoImage=lambda image: image)
+        view = _stub_farm_view(tk, a3.FarmView)(
+            None, dimensions, (FARM_WIDTH, FARM_WIDTH), viewport, StubAtlas())
+        update = lambda: None
+        suffix = "_stub"
+
+    def full() -> None:
+        view.clear()
+        view.redraw(*args)
+        update()
+
+    def dirty() -> None:
+        view.redraw(*args, [model.get_player_position()])
+        update()
+
+    try:
+        record(results, spreads, f"farm_view_redraw_full{suffix}/size={size}",
+               time_samples(full, 1))
+        record(results, spreads, f"farm_view_redraw_dirty{suffix}/size={size}",
+               time_samples(dirty, 1))
+    finally:
+        if root is not None:
+            root.destroy()
+        else:
+            a3.ImageTk = image_tk
+    return "tk" if root is not None else "stub"
+
+
+def run(sizes: list[int], densities: list[float]
+        ) -> tuple[dict[str, float], dict[str, float]]:
+    """Runs every benchmark and returns the median seconds per operation and
+    the spread of the samples, each by name.
+    """
+    results = {}
+    spreads = {}
+    bench_trading(results, spreads)
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            rng = random.Random(SEED)
+            map_file = os.path.join(directory, f"map_{size}.txt")
+            write_map(map_file, size, rng)
+            bench_map(results, spreads, map_file, size, rng)
+            for density in densities:
+                for mix in CROP_MIXES:
+                    bench_plants(results, spreads, map_file, size, density,
+                                 mix, rng)
+            view = bench_farm_view(results, spreads, map_file, size, rng)
+            if view is None:
+                print("FarmView.redraw skipped: tkinter or PIL is not installed",
+                      file=sys.stderr)
+            elif view == "stub":
+                print("FarmView.redraw timed against a stub canvas: no Tk display",
+                      file=sys.stderr)
+            print(f"size {size} done", file=sys.stderr)
+    return results, spreads
+
+
+def compare(results: dict[str, float], baseline: dict[str, float],
+            threshold: float, spreads: dict[str, float],
+            baseline_spreads: dict[str, float],
+            normalize: bool = False) -> list[str]:
+    """Returns a description of each benchmark slower than in baseline by more
+        than threshold plus its noise allowance.
+
+    Parameters:
+        results: The median seconds per operation of this run, by name.
+        baseline: The same for the run to compare against.
+        threshold: The allowed slowdown, as a fraction.
+        spreads: The spread of each benchmark's samples in this run.
+        baseline_spreads: The same for the baseline run.
+        normalize: If True, first divides out the median ratio of this run's
+            times to the baseline's, over every benchmark in both.
+    """
+    common = [name for name in results if baseline.get(name)]
+    scale = 1.0
+    if normalize and common:
+        scale = statistics.median(results[name] / baseline[name]
+                                  for name in common)
+    regressions = []
+    for name in sorted(common):
+        seconds = results[name]
+        before = baseline[name] * scale
+        noise = max(NOISE_FLOOR, spreads.get(name, 0.0)
+                    + baseline_spreads.get(name, 0.0))
+        if seconds > before * (1 + threshold + noise):
+            regressions.append(
+                f"{name}: {before * 1e6:.2f} us -> {seconds * 1e6:.2f} us "
+                f"(+{(seconds / before - 1) * 100:.0f}%, noise {noise * 100:.0f}%)"
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--densities", type=float, nargs="+", default=DENSITIES)
+    parser.add_argument("--output", help="file to write results to as JSON")
+    parser.add_argument("--compare", help="JSON results of a previous run")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    parser.add_argument("--normalize", action="store_true",
+                        help="divide out the median slowdown of the whole run")
+    args = parser.parse_args()
+
+    # Sprites are loaded relative to the repository root
+    os.chdir(ROOT)
+    results, spreads = run(args.sizes, args.densities)
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "seed": SEED,
+        },
+        "results": results,
+        "spreads": spreads,
+    }
+    for name, seconds in sorted(results.items()):
+        print(f"{name:<55} {seconds * 1e6:12.2f} us "
+              f"+/-{spreads[name] * 100:3.0f}%")
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline["results"], args.threshold,
+                              spreads, baseline.get("spreads", {}),
+                              args.normalize)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,617 @@
+"""A farm split into fixed-size chunks, of which only the recently used ones
+are kept in memory.
+
+ChunkedFarmModel behaves like FarmModel, but its map and plants are divided
+into square chunks of chunk_size x chunk_size tiles. A chunk is loaded the
+first time a tile or plant in it is used, and the chunks in memory are kept
+in least-recently-used order within a memory budget. When the budget is
+exceeded the least recently used chunk is evicted, and written to a spill
+directory if it has anything worth keeping. A chunk that was never changed is
+simply generated again from the initial tiles the next time it is needed.
+
+new_day only ages the plants in resident chunks. Each chunk records the day
+its plants were last aged, and when an evicted chunk is loaded again its
+plants are caught up with Plant.age_days. Since age_days is equivalent to
+aging day by day, the farm is always in the same state as if every plant
+had been aged every day, while dormant chunks cost nothing.
+
+Plants returned by get_plants() belong to their chunk, so a plant object must
+not be kept and changed after other chunks have been used, in case its chunk
+was evicted in between.
+
+The harvest index still answers for the whole farm. Plants in resident
+chunks are indexed as usual. When a chunk is evicted, only the number of its
+plants in each growth state is kept in memory, since plants in the same state
+grow alike. Counts for evicted chunks are found by aging each state to the
+current day. Listing the plants ready for harvest also reads the spill files
+of the evicted chunks which have any.
+"""
+import os
+import shutil
+import struct
+import tempfile
+import weakref
+from collections import OrderedDict
+from collections.abc import Iterator, MutableMapping
+from typing import Optional
+
+from constants import *
+from events import EventBus, PlantAged
+from model import (HARVEST_STAGES, FarmModel, HarvestIndex, Plant, PotatoPlant,
+                   KalePlant, BerryPlant)
+from tile_grid import TileGrid
+
+DEFAULT_CHUNK_SIZE = 64
+DEFAULT_MEMORY_BUDGET = 64 * 2 ** 20
+# Approximate memory used by a plant, including its dictionary entry
+PLANT_BYTES = 200
+
+# Plant kinds are spilled as indices into this
+PLANT_KINDS = (PotatoPlant, KalePlant, BerryPlant)
+_KIND_CODES = {plant_class().get_name(): code
+               for code, plant_class in enumerate(PLANT_KINDS)}
+
+# Spilled chunk: day aged to and plant count, the tiles, then the plants
+_CHUNK_HEADER = struct.Struct("<qI")
+_PLANT_RECORD = struct.Struct("<iiBbqq")
+
+
+class Chunk:
+    """The tiles and plants of one chunk of the farm."""
+
+    __slots__ = ("tiles", "plants", "day", "dirty")
+
+    def __init__(self, tiles: bytearray, plants: dict[tuple[int, int], Plant],
+                 day: int) -> None:
+        """Constructor for a chunk.
+
+        Parameters:
+            tiles: The chunk's tiles in row-major order, one byte each.
+            plants: The chunk's plants, by their position on the farm.
+            day: The day to which the plants have been aged.
+        """
+        self.tiles = tiles
+        self.plants = plants
+        self.day = day
+        # True if the tiles or plants have changed since the chunk was loaded.
+        # Plants can also change in place (e.g. when harvested), so chunks
+        # with plants are always written when evicted.
+        self.dirty = False
+
+
+class ChunkCache:
+    """The chunks of a farm, keeping recently used chunks in memory and
+    spilling the rest to disk.
+    """
+
+    def __init__(self, dimensions: tuple[int, int], chunk_size: int,
+                 memory_budget: int, spill_dir: str,
+                 initial: Optional[TileGrid] = None) -> None:
+        """Constructor for the chunks of a farm on day 1.
+
+        Parameters:
+            dimensions: The dimensions of the farm as (#rows, #columns).
+            chunk_size: The number of rows and columns in each chunk.
+            memory_budget: The approximate number of bytes the resident chunks
+                may use. The most recently used chunk is always kept.
+            spill_dir: An empty directory for evicted chunks.
+            initial: The tiles the farm starts with. Tiles outside it start
+                as UNTILLED.
+        """
+        self._dimensions = dimensions
+        self._size = chunk_size
+        self._budget = memory_budget
+        self._dir = spill_dir
+        self._initial = initial
+        self._events = None
+        self._index = None
+        self._day = 1
+        self._chunks = OrderedDict()
+        self._bytes = 0
+        # Number of plants in every chunk with plants, resident or not
+        self._plant_counts = {}
+        # For each evicted chunk with plants, the day it was aged to and the
+        # number of its plants in each (kind, stage, days, days since harvest)
+        self._dormant = {}
+        # The number of plants in evicted chunks by (name, stage) on the
+        # current day, or None until next needed
+        self._dormant_stages = None
+        self.loads = 0
+        self.evictions = 0
+        self.spills = 0
+
+    def set_events(self, events: EventBus) -> None:
+        """Sets the bus on which plants aged when reloading are published."""
+        self._events = events
+
+    def set_harvest_index(self, index: HarvestIndex) -> None:
+        """Sets the index to keep up to date with the plants in resident
+        chunks. Plants are added to it when their chunk is loaded and removed
+        when it is evicted.
+        """
+        self._index = index
+
+    def get_chunk_size(self) -> int:
+        """Returns the number of rows and columns in each chunk."""
+        return self._size
+
+    def get_day(self) -> int:
+        """Returns the day to which every plant is aged."""
+        return self._day
+
+    def set_day(self, day: int) -> None:
+        """Sets the current day without aging the plants in resident chunks.
+        Evicted chunks still catch up from the day they were evicted.
+        """
+        self._day = day
+        for chunk in self._chunks.values():
+            chunk.day = day
+        self._dormant_stages = None
+
+    def key(self, position: tuple[int, int]) -> tuple[int, int]:
+        """Returns the key of the chunk containing a position."""
+        row, col = position
+        return (row // self._size, col // self._size)
+
+    def index(self, position: tuple[int, int]) -> int:
+        """Returns the index of a position in its chunk's tiles."""
+        row, col = position
+        return (row % self._size) * self._size + col % self._size
+
+    def get(self, key: tuple[int, int]) -> Chunk:
+        """Returns the chunk with the given key, loading it if necessary, and
+            marks it as most recently used.
+        """
+        chunk = self._chunks.get(key)
+        if chunk is not None:
+            self._chunks.move_to_end(key)
+            return chunk
+        chunk = self._load(key)
+        self._chunks[key] = chunk
+        self._bytes += self._chunk_bytes(chunk)
+        self._evict()
+        return chunk
+
+    def get_resident(self) -> list[Chunk]:
+        """Returns the chunks currently in memory."""
+        return list(self._chunks.values())
+
+    def get_plant_chunks(self) -> list[tuple[int, int]]:
+        """Returns the keys of every chunk with plants."""
+        return list(self._plant_counts)
+
+    def get_plant_count(self) -> int:
+        """Returns the number of plants on the farm."""
+        return sum(self._plant_counts.values())
+
+    def plants_changed(self, key: tuple[int, int], delta: int) -> None:
+        """Records that plants were added to or removed from a resident
+            chunk, evicting other chunks if it no longer fits in the budget.
+
+        Parameters:
+            key: The key of the chunk.
+            delta: The change in the chunk's number of plants.
+        """
+        count = self._plant_counts.get(key, 0) + delta
+        if count:
+            self._plant_counts[key] = count
+        else:
+            self._plant_counts.pop(key, None)
+        self._chunks[key].dirty = True
+        self._bytes += delta * PLANT_BYTES
+        self._evict()
+
+    def age(self, days: int, publish: bool) -> list[tuple[tuple[int, int], int]]:
+        """Ages the plants in resident chunks by the given number of days and
+            advances the current day. Other chunks catch up when loaded.
+
+        Parameters:
+            days: The number of days to age by.
+            publish: If True, returns the (position, new stage) of each plant
+                whose stage changed.
+        """
+        self._day += days
+        self._dormant_stages = None
+        changes = []
+        for chunk in self._chunks.values():
+            changes += self._catch_up(chunk, publish, self._index)
+        return changes
+
+    def _catch_up(self, chunk: Chunk, publish: bool,
+                  index: Optional[HarvestIndex]
+                  ) -> list[tuple[tuple[int, int], int]]:
+        """Ages a chunk's plants to the current day, updating index if given
+        and returning the stage changes if publish is True.
+        """
+        days = self._day - chunk.day
+        chunk.day = self._day
+        changes = []
+        if days <= 0 or not chunk.plants:
+            return changes
+        chunk.dirty = True
+        if not publish and index is None:
+            for plant in chunk.plants.values():
+                plant.age_days(days)
+            return changes
+        for position, plant in chunk.plants.items():
+            stage = plant.get_stage()
+            plant.age_days(days)
+            new_stage = plant.get_stage()
+            if new_stage != stage:
+                if index is not None:
+                    index.update(position, plant.get_name(), stage, new_stage)
+                if publish:
+                    changes.append((position, new_stage))
+        return changes
+
+    def _chunk_bytes(self, chunk: Chunk) -> int:
+        """Returns the approximate memory used by a chunk."""
+        return len(chunk.tiles) + len(chunk.plants) * PLANT_BYTES
+
+    def _path(self, key: tuple[int, int]) -> str:
+        """Returns the spill file for a chunk."""
+        return os.path.join(self._dir, f"{key[0]}_{key[1]}.chunk")
+
+    def get_dormant_stages(self) -> dict[tuple[str, int], int]:
+        """Returns the number of plants in evicted chunks with each
+        (name, stage) on the current day.
+        """
+        if self._dormant_stages is None:
+            stages = {}
+            for day, states in self._dormant.values():
+                for (kind, *state), number in states.items():
+                    plant = PLANT_KINDS[kind]()
+                    plant.set_state(*state)
+                    plant.age_days(self._day - day)
+                    key = (plant.get_name(), plant.get_stage())
+                    stages[key] = stages.get(key, 0) + number
+            self._dormant_stages = stages
+        return self._dormant_stages
+
+    def get_dormant_ready(self, name: Optional[str] = None
+                          ) -> list[tuple[int, int]]:
+        """Returns the positions of the plants in evicted chunks which are
+            ready for harvest on the current day, reading the spill files of
+            the chunks which have any. The chunks are not loaded.
+
+        Parameters:
+            name: If given, only plants with this name.
+        """
+        ready = []
+        for key, (day, states) in self._dormant.items():
+            if not any(self._is_ready(kind, state, day, name)
+                       for kind, *state in states):
+                continue
+            _, plants, _ = self._read(key)
+            ready.extend(position for position, plant in plants.items()
+                         if self._is_ready(_KIND_CODES[plant.get_name()],
+                                           plant.get_state(), day, name))
+        return ready
+
+    def _is_ready(self, kind: int, state: tuple[int, int, int], day: int,
+                  name: Optional[str]) -> bool:
+        """Returns True iff a plant of the given kind, in the given state on
+        the given day, is ready for harvest today and has the given name (if
+        not None).
+        """
+        plant = PLANT_KINDS[kind]()
+        if name is not None and plant.get_name() != name:
+            return False
+        plant.set_state(*state)
+        plant.age_days(self._day - day)
+        return plant.get_stage() in HARVEST_STAGES[plant.get_name()]
+
+    def _read(self, key: tuple[int, int]
+              ) -> tuple[bytearray, dict[tuple[int, int], Plant], int]:
+        """Returns the tiles and plants of a chunk from its spill file, and
+        the day its plants were aged to.
+        """
+        with open(self._path(key), "rb") as file:
+            data = file.read()
+        day, plant_count = _CHUNK_HEADER.unpack_from(data)
+        offset = _CHUNK_HEADER.size
+        tiles = bytearray(data[offset : offset + self._size * self._size])
+        offset += len(tiles)
+        plants = {}
+        for row, col, kind, *state in _PLANT_RECORD.iter_unpack(
+                data[offset : offset + plant_count * _PLANT_RECORD.size]):
+            plant = PLANT_KINDS[kind]()
+            plant.set_state(*state)
+            plants[(row, col)] = plant
+        return tiles, plants, day
+
+    def _load(self, key: tuple[int, int]) -> Chunk:
+        """Reads a chunk from its spill file, or generates it if it has never
+        been spilled, and ages its plants to the current day.
+        """
+        self.loads += 1
+        if self._dormant.pop(key, None) is not None:
+            self._dormant_stages = None
+        try:
+            tiles, plants, day = self._read(key)
+        except FileNotFoundError:
+            return Chunk(self._generate(key), {}, self._day)
+        chunk = Chunk(tiles, plants, day)
+
+        publish = self._events is not None and self._events.has_subscribers()
+        changes = self._catch_up(chunk, publish, None)
+        if changes:
+            self._events.emit_all(PlantAged(*change) for change in changes)
+        if self._index is not None:
+            for position, plant in plants.items():
+                self._index.add(position, plant.get_name(), plant.get_stage())
+        return chunk
+
+    def _generate(self, key: tuple[int, int]) -> bytearray:
+        """Returns the initial tiles of a chunk."""
+        size = self._size
+        tiles = bytearray(UNTILLED.encode() * (size * size))
+        if self._initial is None:
+            return tiles
+        rows, columns = self._initial.get_dimensions()
+        first_row, first_col = key[0] * size, key[1] * size
+        last_col = min(first_col + size, columns)
+        for row in range(first_row, min(first_row + size, rows)):
+            if first_col < last_col:
+                start = (row - first_row) * size
+                tiles[start : start + last_col - first_col] = (
+                    self._initial.row_bytes(row)[first_col:last_col])
+        return tiles
+
+    def _spill(self, key: tuple[int, int], chunk: Chunk) -> None:
+        """Writes a chunk to its spill file."""
+        parts = [_CHUNK_HEADER.pack(chunk.day, len(chunk.plants)), chunk.tiles]
+        parts.extend(
+            _PLANT_RECORD.pack(row, col, _KIND_CODES[plant.get_name()],
+                               *plant.get_state())
+            for (row, col), plant in chunk.plants.items())
+        with open(self._path(key), "wb") as file:
+            file.write(b"".join(parts))
+        self.spills += 1
+
+    def _evict(self) -> None:
+        """Evicts least recently used chunks while over the budget, always
+        keeping the newest.
+        """
+        while self._bytes > self._budget and len(self._chunks) > 1:
+            key, chunk = self._chunks.popitem(last=False)
+            self._bytes -= self._chunk_bytes(chunk)
+            if chunk.dirty or chunk.plants:
+                self._spill(key, chunk)
+            if chunk.plants:
+                states = {}
+                for plant in chunk.plants.values():
+                    state = (_KIND_CODES[plant.get_name()], *plant.get_state())
+                    states[state] = states.get(state, 0) + 1
+                self._dormant[key] = (chunk.day, states)
+                self._dormant_stages = None
+            if self._index is not None:
+                for position, plant in chunk.plants.items():
+                    self._index.remove(position, plant.get_name(),
+                                       plant.get_stage())
+            self.evictions += 1
+
+    def spill_all(self) -> None:
+        """Writes every changed resident chunk to disk, keeping it resident."""
+        for key, chunk in self._chunks.items():
+            if chunk.dirty or chunk.plants:
+                self._spill(key, chunk)
+                chunk.dirty = False
+
+    def get_size(self) -> int:
+        """Returns the approximate memory used by the resident chunks."""
+        return self._bytes
+
+    def get_stats(self) -> dict[str, int]:
+        """Returns the number of chunk loads, evictions and spills, and the
+        number and approximate size of resident chunks.
+        """
+        return {
+            "loads": self.loads,
+            "evictions": self.evictions,
+            "spills": self.spills,
+            "chunks": len(self._chunks),
+            "bytes": self._bytes,
+        }
+
+
+class ChunkedHarvestIndex(HarvestIndex):
+    """A harvest index over a whole chunked farm. The plants in resident
+    chunks are indexed as in HarvestIndex; queries add the plants in evicted
+    chunks, from the summaries the chunk cache keeps of them.
+    """
+
+    def __init__(self, chunks: ChunkCache) -> None:
+        """Constructor for an empty index over the given chunks."""
+        super().__init__()
+        self._chunks = chunks
+
+    def get_ready(self, name: Optional[str] = None) -> list[tuple[int, int]]:
+        return super().get_ready(name) + self._chunks.get_dormant_ready(name)
+
+    def count_ready(self, name: Optional[str] = None) -> int:
+        dormant = sum(number for (plant_name, stage), number
+                      in self._chunks.get_dormant_stages().items()
+                      if (name is None or plant_name == name)
+                      and stage in HARVEST_STAGES[plant_name])
+        return super().count_ready(name) + dormant
+
+    def count(self, name: Optional[str] = None, stage: Optional[int] = None) -> int:
+        dormant = sum(number for (plant_name, plant_stage), number
+                      in self._chunks.get_dormant_stages().items()
+                      if (name is None or plant_name == name)
+                      and (stage is None or plant_stage == stage))
+        return super().count(name, stage) + dormant
+
+    def get_stage_counts(self, name: str) -> dict[int, int]:
+        counts = super().get_stage_counts(name)
+        for (plant_name, stage), number in self._chunks.get_dormant_stages().items():
+            if plant_name == name:
+                counts[stage] = counts.get(stage, 0) + number
+        return counts
+
+    def __len__(self) -> int:
+        return super().__len__() + sum(self._chunks.get_dormant_stages().values())
+
+
+class ChunkedTileGrid(TileGrid):
+    """The tiles of a chunked farm, with the interface of TileGrid."""
+
+    def __init__(self, chunks: ChunkCache, dimensions: tuple[int, int]) -> None:
+        """Constructor for a grid over the tiles in the given chunks.
+
+        Parameters:
+            chunks: The chunks of the farm.
+            dimensions: The dimensions of the grid as (#rows, #columns).
+        """
+        self._chunks = chunks
+        self._rows, self._cols = dimensions
+
+    def get_tile(self, position: tuple[int, int]) -> str:
+        chunks = self._chunks
+        return chr(chunks.get(chunks.key(position)).tiles[chunks.index(position)])
+
+    def set_tile(self, position: tuple[int, int], tile: str) -> None:
+        chunks = self._chunks
+        chunk = chunks.get(chunks.key(position))
+        chunk.tiles[chunks.index(position)] = ord(tile)
+        chunk.dirty = True
+
+    def row_bytes(self, row: int) -> bytes:
+        """Returns the tiles in the given row as bytes. Loads every chunk the
+        row passes through.
+        """
+        size = self._chunks.get_chunk_size()
+        start = (row % size) * size
+        parts = []
+        for col in range(0, self._cols, size):
+            chunk = self._chunks.get(self._chunks.key((row, col)))
+            parts.append(chunk.tiles[start : start + min(size, self._cols - col)])
+        return b"".join(parts)
+
+    def to_bytes(self) -> bytes:
+        """Returns every tile in row-major order as bytes, one per tile. Loads
+        every chunk of the farm.
+        """
+        return b"".join(self.row_bytes(row) for row in range(self._rows))
+
+
+class ChunkedPlants(MutableMapping):
+    """Mapping from (row, col) positions to the plants of a chunked farm.
+    Iterating loads every chunk with plants.
+    """
+
+    def __init__(self, chunks: ChunkCache) -> None:
+        """Constructor for the plants in the given chunks."""
+        self._chunks = chunks
+
+    def _plants(self, position: tuple[int, int]) -> dict[tuple[int, int], Plant]:
+        """Returns the plants of the chunk containing position."""
+        return self._chunks.get(self._chunks.key(position)).plants
+
+    def __getitem__(self, position: tuple[int, int]) -> Plant:
+        return self._plants(position)[position]
+
+    def __setitem__(self, position: tuple[int, int], plant: Plant) -> None:
+        plants = self._plants(position)
+        added = position not in plants
+        plants[position] = plant
+        self._chunks.plants_changed(self._chunks.key(position), int(added))
+
+    def __delitem__(self, position: tuple[int, int]) -> None:
+        del self._plants(position)[position]
+        self._chunks.plants_changed(self._chunks.key(position), -1)
+
+    def __contains__(self, position: object) -> bool:
+        return position in self._plants(position)
+
+    def __iter__(self) -> Iterator[tuple[int, int]]:
+        for key in self._chunks.get_plant_chunks():
+            yield from list(self._chunks.get(key).plants)
+
+    def __len__(self) -> int:
+        return self._chunks.get_plant_count()
+
+
+class ChunkedFarmModel(FarmModel):
+    """A FarmModel whose map and plants are held in chunks, of which only
+    those recently used stay in memory.
+    """
+
+    def __init__(self, dimensions: tuple[int, int],
+                 initial: Optional[TileGrid] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 memory_budget: int = DEFAULT_MEMORY_BUDGET,
+                 spill_dir: Optional[str] = None) -> None:
+        """Constructor for a chunked farm on day 1, with no plants.
+
+        Parameters:
+            dimensions: The dimensions of the farm as (#rows, #columns), which
+                may be far larger than fits in memory.
+            initial: The tiles the farm starts with, e.g. the map of a
+                FarmModel. Tiles outside it start as UNTILLED.
+            chunk_size: The number of rows and columns in each chunk.
+            memory_budget: The approximate number of bytes resident chunks may
+                use.
+            spill_dir: The directory in which to create a directory for
+                evicted chunks, or None for the system's temporary directory.
+                The chunks' directory is removed by close(), on leaving a with
+                block, or at the latest when the farm is garbage collected.
+        """
+        self._spill_dir = tempfile.mkdtemp(prefix="chunks-", dir=spill_dir)
+        self._remove_spill_dir = weakref.finalize(
+            self, shutil.rmtree, self._spill_dir, True)
+        self._chunks = ChunkCache(dimensions, chunk_size, memory_budget,
+                                  self._spill_dir, initial)
+        self._start(ChunkedTileGrid(self._chunks, dimensions), False,
+                    ChunkedPlants(self._chunks))
+        self._harvest_index = ChunkedHarvestIndex(self._chunks)
+        self._chunks.set_events(self._events)
+        self._chunks.set_harvest_index(self._harvest_index)
+
+    def get_chunks(self) -> ChunkCache:
+        """Returns the chunks of the farm."""
+        return self._chunks
+
+    def close(self) -> None:
+        """Removes the evicted chunks from disk. The farm must not be used
+        afterwards.
+        """
+        self._remove_spill_dir()
+
+    def __enter__(self) -> "ChunkedFarmModel":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def rebuild_harvest_index(self) -> None:
+        """Rebuilds the harvest index from the plants in resident chunks.
+        Evicted chunks are already summarized by the chunk cache.
+        """
+        self._harvest_index.clear()
+        for chunk in self._chunks.get_resident():
+            for position, plant in chunk.plants.items():
+                self._harvest_index.add(position, plant.get_name(),
+                                        plant.get_stage())
+
+    def _age_plants(self, days: int) -> None:
+        """Ages the plants in resident chunks, leaving the others to catch up
+        when next loaded.
+        """
+        publish = self._events.has_subscribers()
+        changes = self._chunks.age(days, publish)
+        if changes:
+            self._events.emit_all(PlantAged(*change) for change in changes)
+
+    def set_days_elapsed(self, days: int) -> None:
+        super().set_days_elapsed(days)
+        self._chunks.set_day(days)
+
+    def iter_advance_days(self, days: int, batch_size: int = 10000
+                          ) -> Iterator[None]:
+        """Advances the game by the given number of days in a single step, as
+        only the resident chunks, which fit in the memory budget, are aged.
+        """
+        self.advance_days(days)
+        yield from ()
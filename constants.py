@@ -42,6 +42,13 @@ INVENTORY_WIDTH = 200
 INFO_BAR_HEIGHT = 90
 BANNER_HEIGHT = 130
 
+# Maximum number of rows and columns of the farm shown at once; larger maps
+# scroll to follow the player
+MAX_VIEW_CELLS = 20
+
+# Maximum number of times per second the game is redrawn
+MAX_FRAME_RATE = 60
+
 # Energy cost of actions (only applied if action was successful)
 MOVE_COST = 1
 HARVEST_COST = 3
@@ -0,0 +1,392 @@
+"""Struct-of-arrays storage for the plants on a farm.
+
+CropArrays keeps the type, stage, days and days since harvest of every plant
+in NumPy arrays, so that FarmModel.new_day can age the whole farm in one
+vectorized pass instead of calling Plant.age() on each plant. It behaves like
+the dictionary returned by FarmModel.get_plants(): looking up a position
+returns a plant view whose methods read and write the arrays directly.
+"""
+from collections.abc import Iterator, MutableMapping
+from typing import Optional
+
+import numpy as np
+
+from model import HARVEST_STAGES, HarvestIndex, Plant, PotatoPlant, KalePlant, BerryPlant
+
+# Kind codes stored in the kinds array, indexing into PLANT_KINDS
+POTATO, KALE, BERRY = 0, 1, 2
+PLANT_KINDS = (PotatoPlant, KalePlant, BerryPlant)
+_NAMES = tuple(plant_class._NAME for plant_class in PLANT_KINDS)
+# Whether a plant of each kind is ready for harvest at each stage
+_READY = np.zeros((len(PLANT_KINDS), 256), dtype=bool)
+for _kind, _name in enumerate(_NAMES):
+    _READY[_kind, list(HARVEST_STAGES[_name])] = True
+
+_BERRY_DAYS_TO_STAGE = np.array(BerryPlant._DAYS_TO_STAGE, dtype=np.int8)
+_INITIAL_CAPACITY = 1024
+
+
+def _column(name: str) -> property:
+    """Returns a property that reads and writes one element of the named
+    column of the owning CropArrays.
+
+    Parameters:
+        name: The attribute name of the column on CropArrays.
+    """
+
+    def getter(self) -> int:
+        return int(getattr(self._store, name)[self._slot])
+
+    def setter(self, value: int) -> None:
+        getattr(self._store, name)[self._slot] = value
+
+    return property(getter, setter)
+
+
+class _ArrayPlant:
+    """Mixin which redirects a plant's state attributes to a slot in a
+    CropArrays, so the usual Plant methods operate on the arrays.
+    """
+
+    __slots__ = ()
+
+    _stage = _column("_stages")
+    _days = _column("_days")
+    _days_since_harvest = _column("_since_harvest")
+
+    def __init__(self, store: "CropArrays", slot: int) -> None:
+        """Constructor for a view onto the plant in the given slot.
+
+        Parameters:
+            store: The arrays holding the plant's state.
+            slot: The index of the plant in the arrays.
+        """
+        self._store = store
+        self._slot = slot
+
+
+class ArrayPotatoPlant(_ArrayPlant, PotatoPlant):
+    """A PotatoPlant whose state is held in a CropArrays."""
+
+    __slots__ = ("_store", "_slot")
+
+
+class ArrayKalePlant(_ArrayPlant, KalePlant):
+    """A KalePlant whose state is held in a CropArrays."""
+
+    __slots__ = ("_store", "_slot")
+
+
+class ArrayBerryPlant(_ArrayPlant, BerryPlant):
+    """A BerryPlant whose state is held in a CropArrays."""
+
+    __slots__ = ("_store", "_slot")
+
+
+_VIEW_CLASSES = (ArrayPotatoPlant, ArrayKalePlant, ArrayBerryPlant)
+_KIND_CODES = {
+    **{plant_class: kind for kind, plant_class in enumerate(PLANT_KINDS)},
+    **{view_class: kind for kind, view_class in enumerate(_VIEW_CLASSES)},
+}
+
+
+class CropArrays(MutableMapping):
+    """Mapping from (row, col) positions to plants, with the state of every
+    plant held in parallel NumPy arrays.
+
+    Plants stored in the mapping are copied into the arrays; the objects
+    returned when looking up a position are views onto those arrays, so a
+    view must not be used after its plant has been removed.
+    """
+
+    def __init__(self, capacity: int = _INITIAL_CAPACITY) -> None:
+        """Constructor for an empty set of crop arrays.
+
+        Parameters:
+            capacity: The number of plants to allocate room for initially.
+        """
+        self._kinds = np.zeros(capacity, dtype=np.uint8)
+        self._stages = np.zeros(capacity, dtype=np.int8)
+        self._days = np.zeros(capacity, dtype=np.int64)
+        self._since_harvest = np.zeros(capacity, dtype=np.int64)
+        self._alive = np.zeros(capacity, dtype=bool)
+        # Changes whenever a plant is stored in the slot, so a plant replaced
+        # part way through a sliced day can be told apart from the original
+        self._serials = np.zeros(capacity, dtype=np.int64)
+        self._next_serial = 1
+        self._slots = {}
+        self._positions = []
+        self._free = []
+        self._size = 0
+
+    @classmethod
+    def from_columns(cls, positions: list[tuple[int, int]], kinds: np.ndarray,
+                     stages: np.ndarray, days: np.ndarray,
+                     since_harvest: np.ndarray) -> "CropArrays":
+        """Returns crop arrays which use the given arrays as storage without
+            copying them, such as arrays over a memory-mapped save file.
+
+        Parameters:
+            positions: The position of the plant in each slot.
+            kinds: The kind code of each plant (uint8).
+            stages: The stage of each plant (int8).
+            days: The days each plant has been growing (int64).
+            since_harvest: The days since each plant was harvested (int64).
+
+        Pre-condition:
+            The arrays are writable, have the dtypes above and are as long
+            as positions.
+        """
+        crops = cls(0)
+        crops._kinds = kinds
+        crops._stages = stages
+        crops._days = days
+        crops._since_harvest = since_harvest
+        crops._alive = np.ones(len(positions), dtype=bool)
+        crops._serials = np.zeros(len(positions), dtype=np.int64)
+        crops._positions = list(positions)
+        crops._slots = dict(zip(crops._positions, range(len(positions))))
+        crops._size = len(positions)
+        return crops
+
+    def get_columns(self) -> tuple[list[tuple[int, int]], np.ndarray, np.ndarray,
+                                   np.ndarray, np.ndarray]:
+        """Returns the positions, kinds, stages, days and days since harvest
+        of every plant, as arrays in the layout accepted by from_columns.
+        """
+        slots = np.fromiter(self._slots.values(), dtype=np.intp,
+                            count=len(self._slots))
+        return (list(self._slots), self._kinds[slots], self._stages[slots],
+                self._days[slots], self._since_harvest[slots])
+
+    def _grow(self) -> None:
+        """Doubles the capacity of every array."""
+        capacity = max(2 * len(self._kinds), _INITIAL_CAPACITY)
+        for name in ("_kinds", "_stages", "_days", "_since_harvest", "_alive",
+                     "_serials"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[: len(old)] = old
+            setattr(self, name, new)
+
+    def _allocate(self) -> int:
+        """Returns the index of an unused slot, growing the arrays if
+        necessary.
+        """
+        if self._free:
+            return self._free.pop()
+        if self._size == len(self._kinds):
+            self._grow()
+        self._positions.append(None)
+        self._size += 1
+        return self._size - 1
+
+    def __getitem__(self, position: tuple[int, int]) -> Plant:
+        slot = self._slots[position]
+        return _VIEW_CLASSES[self._kinds[slot]](self, slot)
+
+    def __setitem__(self, position: tuple[int, int], plant: Plant) -> None:
+        kind = _KIND_CODES.get(type(plant))
+        if kind is None:
+            raise TypeError(f"Cannot store {type(plant).__name__} in CropArrays")
+        stage, days, days_since_harvest = plant.get_state()
+        slot = self._slots.get(position)
+        if slot is None:
+            slot = self._allocate()
+            self._slots[position] = slot
+            self._positions[slot] = position
+        self._kinds[slot] = kind
+        self._stages[slot] = stage
+        self._days[slot] = days
+        self._since_harvest[slot] = days_since_harvest
+        self._alive[slot] = True
+        self._serials[slot] = self._next_serial
+        self._next_serial += 1
+
+    def __delitem__(self, position: tuple[int, int]) -> None:
+        slot = self._slots.pop(position)
+        self._alive[slot] = False
+        self._free.append(slot)
+
+    def __iter__(self) -> Iterator[tuple[int, int]]:
+        return iter(self._slots)
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, position: object) -> bool:
+        return position in self._slots
+
+    def age(self, days: int = 1) -> None:
+        """Ages every plant by the given number of days, following the same
+            rules as the age() methods of PotatoPlant, KalePlant and
+            BerryPlant. The cost does not depend on the number of days.
+
+        Parameters:
+            days: The number of days to age the plants by.
+        """
+        if days <= 0:
+            return
+        self._age(days)
+
+    def age_changed(self, days: int = 1) -> list[tuple[tuple[int, int], int]]:
+        """Ages every plant like age(), returning the (position, new stage)
+            of each plant whose stage changed.
+
+        Parameters:
+            days: The number of days to age the plants by.
+        """
+        if days <= 0:
+            return []
+        n = self._size
+        before = self._stages[:n].copy()
+        self._age(days)
+        stages = self._stages[:n]
+        changed = np.flatnonzero((stages != before) & self._alive[:n])
+        positions = self._positions
+        return [(positions[slot], int(stages[slot])) for slot in changed]
+
+    def age_indexed(self, days: int, index: HarvestIndex, publish: bool = False
+                    ) -> list[tuple[tuple[int, int], int]]:
+        """Ages every plant like age(), updating a harvest index with the
+            changes. The index is updated in bulk, so only plants which become
+            or stop being ready for harvest are handled one at a time.
+
+        Parameters:
+            days: The number of days to age the plants by.
+            index: The index of these plants.
+            publish: If True, returns the (position, new stage) of each plant
+                whose stage changed, as age_changed does.
+        """
+        if days <= 0:
+            return []
+        n = self._size
+        before = self._stages[:n].copy()
+        self._age(days)
+        changed = np.flatnonzero((self._stages[:n] != before) & self._alive[:n])
+        return self._index_changes(changed, before[changed], index, publish)
+
+    def iter_age_indexed(self, days: int, index: HarvestIndex,
+                         publish: bool = False, batch_size: int = 10000
+                         ) -> Iterator[list[tuple[tuple[int, int], int]]]:
+        """Ages the plants like age_indexed, batch_size plants at a time, and
+            yields the changes of each batch as age_indexed returns them.
+            Plants are those stored when iteration starts, in iteration order;
+            those removed or replaced part way through are skipped, and those
+            added are not aged.
+
+        Parameters:
+            days: The number of days to age the plants by.
+            index: The index of these plants.
+            publish: As for age_indexed.
+            batch_size: The number of plants to age in each batch.
+        """
+        slots = np.fromiter(self._slots.values(), dtype=np.intp,
+                            count=len(self._slots))
+        serials = self._serials[slots]
+        for start in range(0, len(slots), batch_size):
+            batch = slots[start : start + batch_size]
+            batch = batch[self._alive[batch] & (
+                self._serials[batch] == serials[start : start + batch_size])]
+            changes = []
+            if days > 0 and len(batch):
+                before = self._stages[batch]
+                self._age(days, batch)
+                changed = self._stages[batch] != before
+                changes = self._index_changes(batch[changed], before[changed],
+                                              index, publish)
+            yield changes
+
+    def _index_changes(self, changed: np.ndarray, before: np.ndarray,
+                       index: HarvestIndex, publish: bool
+                       ) -> list[tuple[tuple[int, int], int]]:
+        """Updates a harvest index with the plants in the changed slots,
+        which were at the stages in before, returning their changes if publish
+        is True.
+        """
+        if not len(changed):
+            return []
+        kinds = self._kinds[changed].astype(np.intp)
+        old = before.astype(np.intp)
+        new = self._stages[changed].astype(np.intp)
+
+        # Move the counts of each (kind, old stage, new stage) together
+        codes, numbers = np.unique((kinds * 256 + old) * 256 + new,
+                                   return_counts=True)
+        for code, number in zip(codes.tolist(), numbers.tolist()):
+            kind_old, new_stage = divmod(code, 256)
+            kind, old_stage = divmod(kind_old, 256)
+            index.change_count(_NAMES[kind], old_stage, new_stage, number)
+
+        ready = _READY[kinds, new]
+        positions = self._positions
+        for i in np.flatnonzero(ready != _READY[kinds, old]).tolist():
+            index.set_ready(positions[changed[i]], _NAMES[kinds[i]], bool(ready[i]))
+
+        if not publish:
+            return []
+        return [(positions[slot], stage)
+                for slot, stage in zip(changed.tolist(), new.tolist())]
+
+    def rebuild_index(self, index: HarvestIndex) -> None:
+        """Replaces the contents of a harvest index with these plants."""
+        index.clear()
+        slots = np.flatnonzero(self._alive[: self._size])
+        kinds = self._kinds[slots].astype(np.intp)
+        stages = self._stages[slots].astype(np.intp)
+        codes, numbers = np.unique(kinds * 256 + stages, return_counts=True)
+        for code, number in zip(codes.tolist(), numbers.tolist()):
+            kind, stage = divmod(code, 256)
+            index.change_count(_NAMES[kind], None, stage, number)
+        positions = self._positions
+        ready = _READY[kinds, stages]
+        for kind, name in enumerate(_NAMES):
+            index.add_ready(name, [positions[slot] for slot
+                                   in slots[ready & (kinds == kind)].tolist()])
+
+    def _age(self, days: int, slots: Optional[np.ndarray] = None) -> None:
+        """Ages every plant, or only the plants in the given slots, by a
+        positive number of days.
+        """
+        if slots is None:
+            n = self._size
+            alive = self._alive[:n]
+            kinds = self._kinds[:n]
+            stages = self._stages[:n]
+            ages = self._days[:n]
+            since_harvest = self._since_harvest[:n]
+        else:
+            # Work on copies of just these slots, written back at the end
+            alive = np.ones(len(slots), dtype=bool)
+            kinds = self._kinds[slots]
+            stages = self._stages[slots]
+            ages = self._days[slots]
+            since_harvest = self._since_harvest[slots]
+
+        potato = alive & (kinds == POTATO)
+        stages[potato] = np.minimum(stages[potato] + min(days, 5), 5)
+
+        kale = alive & (kinds == KALE)
+        ages[kale] += days
+        kale_days = ages[kale]
+        stages[kale] = np.where(kale_days >= 6, 5, (kale_days + 1) // 2 + 1)
+
+        berry = alive & (kinds == BERRY)
+        old_days = ages.copy()
+        ages[berry] += days
+        young = berry & (ages <= 13)
+        stages[young] = _BERRY_DAYS_TO_STAGE[ages[young]]
+
+        # Days spent past maturity count towards regrowth. A plant which
+        # matured during this period reached stage 6 on day 13.
+        mature = berry & (ages > 13)
+        previous = np.where(old_days[mature] >= 13, stages[mature], 6)
+        since_harvest[mature] += ages[mature] - np.maximum(old_days[mature], 13)
+        stages[mature] = np.where(
+            (since_harvest[mature] >= 4) | (previous == 6), 6, 5
+        )
+
+        if slots is not None:
+            self._stages[slots] = stages
+            self._days[slots] = ages
+            self._since_harvest[slots] = since_harvest
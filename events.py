@@ -0,0 +1,201 @@
+"""Change events published by FarmModel and Player.
+
+Each mutation of the model publishes one or more small, typed events
+describing exactly what changed. Subscribers to an EventBus receive events in
+batches: every event caused by one model action (e.g. a harvest, which changes
+the plant, the player's energy and possibly removes the plant) or by one day
+is delivered in a single call, so consumers such as views can do work
+proportional to the number of changes rather than the size of the farm.
+"""
+import functools
+from collections.abc import Callable, Iterable
+from typing import NamedTuple, Optional
+
+
+class TileChanged(NamedTuple):
+    """The tile at position was changed to tile (e.g. by tilling)."""
+
+    position: tuple[int, int]
+    tile: str
+
+
+class PlantAdded(NamedTuple):
+    """A plant with the given name was planted at position."""
+
+    position: tuple[int, int]
+    name: str
+
+
+class PlantAged(NamedTuple):
+    """The plant at position grew (or regrew) to a new stage. Aging which
+    does not change a plant's stage is not published.
+    """
+
+    position: tuple[int, int]
+    stage: int
+
+
+class PlantHarvested(NamedTuple):
+    """The plant at position was harvested, yielding amount of item."""
+
+    position: tuple[int, int]
+    item: str
+    amount: int
+
+
+class PlantRemoved(NamedTuple):
+    """The plant at position was removed from the farm."""
+
+    position: tuple[int, int]
+
+
+class InventoryChanged(NamedTuple):
+    """The player's amount of item changed by delta, to amount."""
+
+    item: str
+    delta: int
+    amount: int
+
+
+class EnergyChanged(NamedTuple):
+    """The player's energy changed to energy."""
+
+    energy: int
+
+
+class MoneyChanged(NamedTuple):
+    """The player's money changed to money."""
+
+    money: int
+
+
+class PlayerMoved(NamedTuple):
+    """The player moved to position or turned to face direction."""
+
+    position: tuple[int, int]
+    direction: str
+
+
+class DaySliceAged(NamedTuple):
+    """Part way through days advanced by FarmModel.iter_advance_days (or
+    iter_new_day), the plants from start to end (exclusive) were aged by the
+    given number of days. Plants are numbered in the order they were on the
+    farm when the days began; those removed since were skipped. The stage
+    changes are published as PlantAged when the days end.
+    """
+
+    start: int
+    end: int
+    days: int
+
+
+class DayAdvanced(NamedTuple):
+    """The game advanced to the given day."""
+
+    day: int
+
+
+Event = (TileChanged | PlantAdded | PlantAged | PlantHarvested | PlantRemoved
+         | InventoryChanged | EnergyChanged | MoneyChanged | PlayerMoved
+         | DaySliceAged | DayAdvanced)
+
+
+class EventBus:
+    """Delivers batches of events to subscribers.
+
+    Events emitted outside a batch are delivered immediately. Within a batch,
+    opened by using the bus as a context manager, events are queued and
+    delivered together when the outermost batch closes. Nothing is queued or
+    delivered while there are no subscribers.
+    """
+
+    def __init__(self) -> None:
+        """Constructor for a bus with no subscribers."""
+        self._subscribers = []
+        self._pending = []
+        self._depth = 0
+
+    def subscribe(self, callback: Callable[[list[Event]], None],
+                  event_types: Optional[Iterable[type]] = None) -> None:
+        """Registers callback to be called with each batch of events.
+
+        Parameters:
+            callback: Called with a non-empty list of events, in the order
+                they were emitted.
+            event_types: If given, only events of these types are passed to
+                callback, and it is not called for batches containing none.
+        """
+        types = None if event_types is None else frozenset(event_types)
+        self._subscribers.append((callback, types))
+
+    def unsubscribe(self, callback: Callable[[list[Event]], None]) -> None:
+        """Stops delivering events to callback."""
+        self._subscribers = [(subscriber, types)
+                             for subscriber, types in self._subscribers
+                             if subscriber != callback]
+
+    def has_subscribers(self) -> bool:
+        """Returns True iff any callback is subscribed. Publishers may check
+        this before doing extra work to describe a change.
+        """
+        return bool(self._subscribers)
+
+    def emit(self, event_type: type, *fields) -> None:
+        """Publishes an event, delivering it now if no batch is open. The
+            event is only constructed if something is subscribed, so
+            publishing to an unobserved bus is cheap.
+
+        Parameters:
+            event_type: The type of event to publish, e.g. TileChanged.
+            fields: The values of the event's fields, in order.
+        """
+        if self._subscribers:
+            self._pending.append(event_type(*fields))
+            if not self._depth:
+                self.flush()
+
+    def emit_all(self, events: Iterable[Event]) -> None:
+        """Publishes several events as part of one batch."""
+        if self._subscribers:
+            self._pending.extend(events)
+            if not self._depth:
+                self.flush()
+
+    def flush(self) -> None:
+        """Delivers every queued event now."""
+        events, self._pending = self._pending, []
+        if not events:
+            return
+        for callback, types in list(self._subscribers):
+            if types is None:
+                callback(events)
+            else:
+                selected = [event for event in events if type(event) in types]
+                if selected:
+                    callback(selected)
+
+    def __enter__(self) -> "EventBus":
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._depth -= 1
+        if not self._depth and self._pending:
+            self.flush()
+
+
+def batched(method: Callable) -> Callable:
+    """Decorates a method of an object whose bus is in its _events attribute,
+    so that every event the method publishes, including through methods it
+    calls, is delivered as one batch.
+    """
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        events = self._events
+        if not events._subscribers:
+            return method(self, *args, **kwargs)
+        with events:
+            return method(self, *args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,225 @@
+"""Versioned binary save files, loaded through a memory map.
+
+A save file holds everything needed to restore a FarmModel: the tiles, every
+plant's kind and growth state, the player's position, direction, energy,
+money and inventory, and the day. Loading a saved game and saving it again
+gives an identical file, and the loaded model behaves exactly like the one
+that was saved.
+
+The file is laid out so that loading does not parse the large sections:
+    header      64 bytes, see _HEADER
+    tiles       rows * columns bytes, one per tile in row-major order
+    plants      at the next multiple of 8, one column per field:
+                days (int64), days since harvest (int64), row (int32),
+                column (int32), kind (uint8), stage (int8)
+    inventory   for each item: name length (uint16), amount (int64), name
+All values are little-endian. Loading maps the file with ACCESS_COPY, and the
+model's TileGrid uses the mapped tiles directly, so pages are only read from
+disk when tiles are used, and changes to the game never reach the file. By
+default the loaded model is vectorized, and uses the mapped plant columns as
+its CropArrays storage, so no object is created per plant. Every section is
+checked against the size of the file before it is read.
+
+Saves are written to a temporary file which then replaces the old save, so
+a save never changes a file that a loaded game is still mapping.
+"""
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from model import FarmModel, Plant, PotatoPlant, KalePlant, BerryPlant
+from tile_grid import TileGrid
+
+MAGIC = b"FARMSAVE"
+VERSION = 1
+
+# magic, version, reserved, rows, columns, day, energy, money, player row,
+# player column, direction, item count, plant count
+_HEADER = struct.Struct("<8sHHIIqqqiiBxxxII")
+_ITEM = struct.Struct("<Hq")
+
+# Plant kinds are saved as indices into this
+PLANT_KINDS = (PotatoPlant, KalePlant, BerryPlant)
+_KIND_CODES = {plant_class().get_name(): code
+               for code, plant_class in enumerate(PLANT_KINDS)}
+
+
+def _align(offset: int) -> int:
+    """Returns the first multiple of 8 at or after offset."""
+    return (offset + 7) & ~7
+
+
+def _little_endian(column: array) -> bytes:
+    """Returns the contents of an array as little-endian bytes."""
+    if sys.byteorder == "big":
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+
+def _plant_columns(plants: dict[tuple[int, int], Plant]) -> list[bytes]:
+    """Returns the plants section of a save file as one bytes per column."""
+    if hasattr(plants, "get_columns"):
+        # CropArrays already stores the plants as columns
+        import numpy as np
+
+        positions, kinds, stages, days, since_harvest = plants.get_columns()
+        positions = np.array(positions, dtype="<i4").reshape(-1, 2)
+        return [days.astype("<i8").tobytes(),
+                since_harvest.astype("<i8").tobytes(),
+                positions[:, 0].tobytes(), positions[:, 1].tobytes(),
+                kinds.astype("u1").tobytes(), stages.astype("i1").tobytes()]
+
+    states = [plant.get_state() for plant in plants.values()]
+    return [
+        _little_endian(array("q", [state[1] for state in states])),
+        _little_endian(array("q", [state[2] for state in states])),
+        _little_endian(array("i", [row for row, _ in plants])),
+        _little_endian(array("i", [col for _, col in plants])),
+        bytes(_KIND_CODES[plant.get_name()] for plant in plants.values()),
+        array("b", [state[0] for state in states]).tobytes(),
+    ]
+
+
+def save(model: FarmModel, path: str) -> None:
+    """Saves the game to a file, replacing any existing file.
+
+    Parameters:
+        model: The game to save.
+        path: The file to save to.
+    """
+    player = model.get_player()
+    rows, columns = model.get_dimensions()
+    plants = model.get_plants()
+    inventory = player.get_inventory()
+    header = _HEADER.pack(
+        MAGIC, VERSION, 0, rows, columns, model.get_days_elapsed(),
+        player.get_energy(), player.get_money(), *player.get_position(),
+        ord(player.get_direction()), len(inventory), len(plants))
+
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as file:
+        file.write(header)
+        file.write(model.get_map().to_bytes())
+        file.write(bytes(_align(file.tell()) - file.tell()))
+        for column in _plant_columns(plants):
+            file.write(column)
+        for item, amount in inventory.items():
+            name = item.encode()
+            file.write(_ITEM.pack(len(name), amount) + name)
+    os.replace(temporary, path)
+
+
+def load(path: str, vectorized: bool = True) -> FarmModel:
+    """Returns the game saved in a file. Raises ValueError if the file is not
+        a save file, was written by a newer version, or is truncated or
+        corrupt.
+
+    Parameters:
+        path: The file to load.
+        vectorized: As for the FarmModel constructor. Loading a model which
+            is not vectorized creates every plant, which is much slower for
+            large farms.
+    """
+    with open(path, "rb") as file:
+        data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+    if len(data) < _HEADER.size or data[: len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not a farm save file")
+    (_, version, _, rows, columns, day, energy, money, player_row, player_col,
+     direction, item_count, plant_count) = _HEADER.unpack_from(data)
+    if version > VERSION:
+        raise ValueError(f"{path} has save version {version}, "
+                         f"but only versions up to {VERSION} can be loaded")
+
+    def check(end: int, section: str) -> None:
+        if end > len(data):
+            raise ValueError(f"{path} is truncated: the {section} end at byte "
+                             f"{end}, but the file has {len(data)} bytes")
+
+    offset = _HEADER.size
+    check(offset + rows * columns, "tiles")
+    tiles = TileGrid(memoryview(data)[offset : offset + rows * columns],
+                     (rows, columns))
+    offset = _align(offset + rows * columns)
+
+    n = plant_count
+    check(offset + 26 * n, "plants")
+    kinds = data[offset + 24 * n : offset + 25 * n]
+    if n and max(kinds) >= len(PLANT_KINDS):
+        raise ValueError(f"{path} has a plant of unknown kind {max(kinds)}")
+    if vectorized:
+        plants = _load_crop_arrays(data, offset, n)
+    else:
+        plants = _load_plants(data, offset, n)
+    offset += 26 * n
+
+    inventory = {}
+    for _ in range(item_count):
+        check(offset + _ITEM.size, "inventory")
+        length, amount = _ITEM.unpack_from(data, offset)
+        offset += _ITEM.size
+        check(offset + length, "inventory")
+        try:
+            inventory[data[offset : offset + length].decode()] = amount
+        except UnicodeDecodeError as error:
+            raise ValueError(f"{path} has a corrupt item name: {error}") from None
+        offset += length
+
+    model = FarmModel.from_grid(tiles, vectorized, plants)
+    player = model.get_player()
+    player.set_energy(energy)
+    player.set_money(money)
+    player.set_position((player_row, player_col))
+    player.set_direction(chr(direction))
+    player.get_inventory().clear()
+    player.get_inventory().update(inventory)
+    model.set_days_elapsed(day)
+    return model
+
+
+def _column(data: mmap.mmap, typecode: str, offset: int, count: int) -> array:
+    """Returns count values of the given array typecode read from offset."""
+    column = array(typecode)
+    column.frombytes(data[offset : offset + count * column.itemsize])
+    if sys.byteorder == "big":
+        column.byteswap()
+    return column
+
+
+def _load_plants(data: mmap.mmap, offset: int, n: int
+                 ) -> dict[tuple[int, int], Plant]:
+    """Returns the plants section of a save file as a dictionary of plants."""
+    days = _column(data, "q", offset, n)
+    since_harvest = _column(data, "q", offset + 8 * n, n)
+    rows = _column(data, "i", offset + 16 * n, n)
+    cols = _column(data, "i", offset + 20 * n, n)
+    kinds = data[offset + 24 * n : offset + 25 * n]
+    stages = _column(data, "b", offset + 25 * n, n)
+
+    plants = {}
+    for row, col, kind, stage, age, since in zip(rows, cols, kinds, stages,
+                                                 days, since_harvest):
+        plant = PLANT_KINDS[kind]()
+        plant.set_state(stage, age, since)
+        plants[(row, col)] = plant
+    return plants
+
+
+def _load_crop_arrays(data: mmap.mmap, offset: int, n: int) -> "CropArrays":
+    """Returns the plants section of a save file as a CropArrays over the
+    mapped file.
+    """
+    import numpy as np
+
+    from crop_engine import CropArrays
+
+    def column(dtype: str, start: int) -> np.ndarray:
+        return np.frombuffer(data, dtype, n, offset + start)
+
+    positions = list(zip(column("<i4", 16 * n).tolist(),
+                         column("<i4", 20 * n).tolist()))
+    return CropArrays.from_columns(
+        positions, column("u1", 24 * n), column("i1", 25 * n),
+        column("<i8", 0), column("<i8", 8 * n))
@@ -0,0 +1,372 @@
+"""Asyncio server hosting many farm sessions in one process.
+
+Clients connect over TCP or a Unix socket and send newline-delimited JSON
+requests. Each request names a session and an op:
+    {"op": "open", "session": "a", "map": "map1.txt"}
+    {"op": "action", "session": "a", "action": ["move", "s"]}
+    {"op": "state", "session": "a"}
+    {"op": "close", "session": "a"}
+Actions are those of batch.apply_action. An optional "id" is echoed in the
+response. Each request gets exactly one response line:
+    {"id": 1, "session": "a", "ok": true, "events": [...]}
+where events are the model's change events for that action (see events.py),
+e.g. {"type": "TileChanged", "position": [3, 4], "tile": "S"}. Failures
+respond with "ok": false and an "error" message.
+
+Requests for one session are processed in the order they were received, by a
+single task per session reading from a bounded queue. Any connection may send
+requests to any session, but a session belongs to the connection that opened
+it, and is closed when that connection disconnects. When a session's queue
+is full, the connection that sent the request stops being read until there is
+room, so a client sending faster than its farm can keep up is slowed down by
+TCP flow control rather than growing the server's memory. Requests still
+queued, or waiting for room, when their session closes are answered with a
+"session closed" error. A request line longer than the stream limit (64 KiB)
+is answered with an error and its connection is closed.
+
+Usage:
+    python farm_server.py [--host HOST] [--port PORT] [--unix PATH]
+                          [--maps DIR] [--queue-size N]
+"""
+import argparse
+import asyncio
+import json
+import os
+from typing import Optional
+
+from batch import apply_action
+from events import Event
+from model import FarmModel
+
+# Most requests queued for one session before its senders are paused
+DEFAULT_QUEUE_SIZE = 256
+# Most queued requests a session handles before giving other tasks a turn
+_MAX_BATCH = 256
+
+
+def event_to_json(event: Event) -> dict:
+    """Returns a JSON-serializable description of a model event."""
+    data = event._asdict()
+    data["type"] = type(event).__name__
+    return data
+
+
+class _Connection:
+    """One client connection. Responses are buffered and written together,
+    so a batch of responses costs one socket write.
+    """
+
+    def __init__(self, writer: asyncio.StreamWriter) -> None:
+        self._writer = writer
+        self._buffer = []
+        # Sessions opened by this connection
+        self.sessions = []
+
+    def send(self, response: dict) -> None:
+        """Buffers a response to be written to the client by flush()."""
+        self._buffer.append(json.dumps(response).encode())
+
+    async def flush(self) -> None:
+        """Writes the buffered responses, then waits until the client has
+        accepted them.
+        """
+        lines, self._buffer = self._buffer, []
+        if self._writer.is_closing():
+            return
+        self._writer.write(b"\n".join(lines) + b"\n")
+        try:
+            await self._writer.drain()
+        except ConnectionError:
+            pass
+
+
+class Session:
+    """A farm and the queue of requests waiting to be applied to it."""
+
+    def __init__(self, session_id: str, model: FarmModel, queue_size: int,
+                 owner: Optional[_Connection] = None) -> None:
+        """Constructor for a session, which starts processing requests
+            immediately. Must be called from within the event loop.
+
+        Parameters:
+            session_id: The name clients use for this session.
+            model: The farm being played.
+            queue_size: The most requests which may wait to be processed.
+            owner: The connection which opened the session, if any. The
+                session is removed from its sessions when closed.
+        """
+        self._id = session_id
+        self._model = model
+        self._owner = owner
+        self._queue = asyncio.Queue(queue_size)
+        self._changes = []
+        model.get_events().subscribe(self._changes.extend)
+        self._closed = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        self._actions = 0
+
+    def get_id(self) -> str:
+        """Returns the name clients use for this session."""
+        return self._id
+
+    def get_model(self) -> FarmModel:
+        """Returns the session's farm."""
+        return self._model
+
+    def get_action_count(self) -> int:
+        """Returns the number of actions applied to the farm."""
+        return self._actions
+
+    async def submit(self, connection: _Connection, request: dict) -> None:
+        """Queues a request, waiting for room if the queue is full. If the
+        session is closed first, the request is answered with an error.
+
+        Parameters:
+            connection: Where to send the response.
+            request: The decoded request.
+        """
+        if self._closed.is_set():
+            connection.send(self._closed_response(request))
+            await connection.flush()
+            return
+        await self._queue.put((connection, request))
+        if self._closed.is_set():
+            # Closed while this request waited for room
+            await self._fail_pending()
+
+    async def wait_closed(self) -> None:
+        """Waits until the session has processed a close request or been
+        stopped.
+        """
+        await self._closed.wait()
+
+    async def stop(self) -> None:
+        """Stops processing requests at once. Requests still queued, and
+        those waiting for room, are answered with an error.
+        """
+        self._task.cancel()
+        self._closed.set()
+        self._release()
+        await self._fail_pending()
+
+    def _release(self) -> None:
+        """Removes the session from its owner, so a closed session's farm is
+        not kept until the owner disconnects.
+        """
+        if self._owner is not None and self in self._owner.sessions:
+            self._owner.sessions.remove(self)
+        self._owner = None
+
+    def _closed_response(self, request: dict) -> dict:
+        """Returns the response to a request the session will never handle."""
+        return {"id": request.get("id"), "session": self._id, "ok": False,
+                "error": "session closed"}
+
+    async def _fail_pending(self) -> None:
+        """Answers every queued request with an error. Taking each one off
+        the queue wakes a sender waiting for room, which then fails its own
+        request in turn.
+        """
+        connections = set()
+        while not self._queue.empty():
+            connection, request = self._queue.get_nowait()
+            connection.send(self._closed_response(request))
+            connections.add(connection)
+        for connection in connections:
+            await connection.flush()
+
+    async def _run(self) -> None:
+        """Processes queued requests in order until the session is closed."""
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < _MAX_BATCH and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            connections = set()
+            for connection, request in batch:
+                connection.send(self._handle(request))
+                connections.add(connection)
+                if request.get("op") == "close":
+                    self._closed.set()
+            for connection in connections:
+                await connection.flush()
+            if self._closed.is_set():
+                self._release()
+                await self._fail_pending()
+                return
+
+    def _handle(self, request: dict) -> dict:
+        """Applies one request to the farm and returns its response."""
+        response = {"id": request.get("id"), "session": self._id, "ok": True}
+        op = request.get("op", "action")
+        try:
+            if op == "action":
+                apply_action(self._model, request["action"])
+                self._actions += 1
+            elif op == "state":
+                response["state"] = self.get_state()
+            elif op != "close":
+                raise ValueError(f"Unknown op: {op!r}")
+        except Exception as error:
+            # A bad request must not stop the session's task
+            response["ok"] = False
+            response["error"] = f"{type(error).__name__}: {error}"
+        response["events"] = [event_to_json(event) for event in self._changes]
+        self._changes.clear()
+        return response
+
+    def get_state(self) -> dict:
+        """Returns a summary of the player and day, for the state op."""
+        player = self._model.get_player()
+        return {
+            "day": self._model.get_days_elapsed(),
+            "money": player.get_money(),
+            "energy": player.get_energy(),
+            "inventory": player.get_inventory(),
+            "position": player.get_position(),
+            "direction": player.get_direction(),
+            "plants": len(self._model.get_plants()),
+        }
+
+
+class FarmServer:
+    """Serves farm sessions to any number of connections."""
+
+    def __init__(self, map_dir: str = "maps",
+                 queue_size: int = DEFAULT_QUEUE_SIZE) -> None:
+        """Constructor for a server with no sessions.
+
+        Parameters:
+            map_dir: The directory that maps named in open requests are
+                loaded from.
+            queue_size: The most requests which may wait for each session.
+        """
+        self._map_dir = map_dir
+        self._queue_size = queue_size
+        self._sessions = {}
+
+    def get_sessions(self) -> dict[str, Session]:
+        """Returns the open sessions, by name."""
+        return self._sessions
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0,
+                    unix_path: Optional[str] = None) -> asyncio.AbstractServer:
+        """Starts listening, on a Unix socket if unix_path is given and on
+            TCP otherwise.
+
+        Returns:
+            The listening asyncio server.
+        """
+        if unix_path is not None:
+            return await asyncio.start_unix_server(self.handle_connection, unix_path)
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    async def handle_connection(self, reader: asyncio.StreamReader,
+                                writer: asyncio.StreamWriter) -> None:
+        """Reads requests from one client until it disconnects."""
+        connection = _Connection(writer)
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # Longer than the stream limit: the rest of the stream
+                    # can't be split into requests, so give up on it
+                    connection.send({"id": None, "ok": False,
+                                     "error": "request line too long"})
+                    await connection.flush()
+                    break
+                if not line:
+                    break
+                await self._dispatch(connection, line)
+        except ConnectionError:
+            pass
+        finally:
+            # The sessions this client opened would otherwise never be closed
+            for session in list(connection.sessions):
+                if self._sessions.get(session.get_id()) is session:
+                    del self._sessions[session.get_id()]
+                await session.stop()
+            writer.close()
+
+    async def _dispatch(self, connection: _Connection, line: bytes) -> None:
+        """Routes one request line to its session."""
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+        except ValueError as error:
+            connection.send({"id": None, "ok": False, "error": str(error)})
+            await connection.flush()
+            return
+
+        session_id = request.get("session")
+        if request.get("op") == "open":
+            connection.send(self._open(connection, session_id, request))
+            await connection.flush()
+            return
+        session = self._sessions.get(session_id)
+        if session is None:
+            connection.send({"id": request.get("id"), "session": session_id,
+                             "ok": False, "error": "no such session"})
+            await connection.flush()
+            return
+        if request.get("op") == "close":
+            # Later requests for this name go to a new session, if one is
+            # opened; the old one finishes what it has queued
+            del self._sessions[session_id]
+        await session.submit(connection, request)
+
+    def _open(self, connection: _Connection, session_id: object,
+              request: dict) -> dict:
+        """Creates a session owned by connection and returns the response to
+        the open request.
+        """
+        response = {"id": request.get("id"), "session": session_id, "ok": False}
+        map_name = request.get("map", "")
+        if not isinstance(session_id, str) or session_id in self._sessions:
+            response["error"] = "session must be a new string"
+        elif not isinstance(map_name, str) or os.path.basename(map_name) != map_name:
+            response["error"] = "map must be a file name in the map directory"
+        else:
+            try:
+                model = FarmModel(os.path.join(self._map_dir, map_name))
+            except (OSError, ValueError) as error:
+                # Missing or unreadable maps, and malformed ones
+                response["error"] = f"{type(error).__name__}: {error}"
+            else:
+                session = Session(session_id, model, self._queue_size,
+                                  connection)
+                self._sessions[session_id] = session
+                connection.sessions.append(session)
+                response["ok"] = True
+        return response
+
+
+async def serve(host: str, port: int, unix_path: Optional[str],
+                map_dir: str, queue_size: int) -> None:
+    """Runs a server until cancelled."""
+    server = await FarmServer(map_dir, queue_size).start(host, port, unix_path)
+    for socket in server.sockets:
+        print("listening on", socket.getsockname(), flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="listen on this Unix socket instead")
+    parser.add_argument("--maps", default="maps")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, args.maps,
+                          args.queue_size))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,457 @@
+"""SQLite persistence for farms.
+
+FarmStore keeps any number of named farms in one SQLite database: the tiles
+(one blob per map row), every plant's growth state, the player and their
+inventory, and a ledger with one row per day played. The database runs in WAL
+mode so readers are never blocked by a save. Every write is a single
+transaction of batched statements. Loading streams rows from the database
+straight into a new FarmModel.
+
+A full save or load costs one row per plant, which SQLite alone takes a few
+hundred milliseconds to write or read for 100,000 plants. Only FarmRecorder's
+incremental writes, which touch just what changed, take milliseconds; use
+save and load when opening or closing a farm, not on every day.
+
+Each plant row records the day its state was captured. On loading, plants are
+caught up to the farm's day with Plant.age_days. So growth alone never needs
+to be written.
+
+FarmRecorder keeps a stored farm up to date while it is played. It listens to
+the model's events and, at the end of each day, writes only the tiles and
+plants changed by the player's actions, the player, and that day's ledger row
+in one transaction.
+"""
+import sqlite3
+from collections.abc import Iterator
+from typing import NamedTuple, Optional
+
+from events import (
+    DayAdvanced,
+    EnergyChanged,
+    Event,
+    PlantAdded,
+    PlantHarvested,
+    PlantRemoved,
+    TileChanged,
+)
+from model import FarmModel, Plant, PotatoPlant, KalePlant, BerryPlant
+from tile_grid import TileGrid
+
+# The class of each stored plant, by the name stored in the plants table
+PLANT_CLASSES = {
+    plant_class().get_name(): plant_class
+    for plant_class in (PotatoPlant, KalePlant, BerryPlant)
+}
+
+# Kind codes used by crop_engine.CropArrays, and the names they stand for
+_NAMES = tuple(plant_class().get_name()
+               for plant_class in (PotatoPlant, KalePlant, BerryPlant))
+_KIND_CODES = {name: code for code, name in enumerate(_NAMES)}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS farms (
+    farm_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    rows INTEGER NOT NULL,
+    columns INTEGER NOT NULL,
+    day INTEGER NOT NULL,
+    energy INTEGER NOT NULL,
+    money INTEGER NOT NULL,
+    player_row INTEGER NOT NULL,
+    player_col INTEGER NOT NULL,
+    direction TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tiles (
+    farm_id INTEGER NOT NULL REFERENCES farms,
+    row INTEGER NOT NULL,
+    tiles BLOB NOT NULL,
+    PRIMARY KEY (farm_id, row)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS plants (
+    farm_id INTEGER NOT NULL REFERENCES farms,
+    row INTEGER NOT NULL,
+    col INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    stage INTEGER NOT NULL,
+    days INTEGER NOT NULL,
+    days_since_harvest INTEGER NOT NULL,
+    day INTEGER NOT NULL,
+    PRIMARY KEY (farm_id, row, col)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS inventory (
+    farm_id INTEGER NOT NULL REFERENCES farms,
+    item TEXT NOT NULL,
+    amount INTEGER NOT NULL,
+    PRIMARY KEY (farm_id, item)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS ledger (
+    farm_id INTEGER NOT NULL REFERENCES farms,
+    day INTEGER NOT NULL,
+    money INTEGER NOT NULL,
+    energy_spent INTEGER NOT NULL,
+    harvests INTEGER NOT NULL,
+    PRIMARY KEY (farm_id, day)
+) WITHOUT ROWID;
+"""
+
+
+def _plant_rows(farm_id: int, plants: dict[tuple[int, int], Plant],
+                day: int) -> Iterator[tuple]:
+    """Yields a row of the plants table for each plant, as its state on the
+    given day.
+    """
+    if hasattr(plants, "get_columns"):
+        # CropArrays already stores the plants as columns
+        positions, kinds, stages, days, since_harvest = plants.get_columns()
+        for (row, col), kind, stage, age, since in zip(
+                positions, kinds.tolist(), stages.tolist(), days.tolist(),
+                since_harvest.tolist()):
+            yield farm_id, row, col, _NAMES[kind], stage, age, since, day
+        return
+    for (row, col), plant in plants.items():
+        yield (farm_id, row, col, plant.get_name(), *plant.get_state(), day)
+
+
+class LedgerEntry(NamedTuple):
+    """What happened on one day of a recorded farm."""
+
+    day: int
+    money: int
+    energy_spent: int
+    harvests: int
+
+
+class FarmStore:
+    """A database of named farms."""
+
+    def __init__(self, path: str) -> None:
+        """Constructor for a store, creating the database if necessary.
+
+        Parameters:
+            path: The database file, or ":memory:".
+        """
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA journal_mode = WAL")
+        # In WAL mode, NORMAL only syncs at checkpoints and is still safe
+        # against corruption
+        self._db.execute("PRAGMA synchronous = NORMAL")
+        self._db.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """Closes the database."""
+        self._db.close()
+
+    def __enter__(self) -> "FarmStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def list_farms(self) -> list[str]:
+        """Returns the names of the stored farms."""
+        return [name for name, in self._db.execute("SELECT name FROM farms ORDER BY name")]
+
+    def get_farm_id(self, name: str) -> int:
+        """Returns the id of the named farm, raising KeyError if there is
+        none.
+        """
+        row = self._db.execute("SELECT farm_id FROM farms WHERE name = ?",
+                               (name,)).fetchone()
+        if row is None:
+            raise KeyError(name)
+        return row[0]
+
+    def save(self, name: str, model: FarmModel) -> None:
+        """Stores the whole farm under the given name, replacing any farm
+            already stored with that name. The farm's ledger is kept.
+
+        Parameters:
+            name: The name to store the farm under.
+            model: The farm to store.
+        """
+        grid = model.get_map()
+        rows, columns = grid.get_dimensions()
+        with self._db:
+            self._db.execute(
+                "INSERT INTO farms (name, rows, columns, day, energy, money,"
+                " player_row, player_col, direction)"
+                " VALUES (?, ?, ?, 0, 0, 0, 0, 0, '')"
+                " ON CONFLICT (name) DO UPDATE SET"
+                " rows = excluded.rows, columns = excluded.columns",
+                (name, rows, columns),
+            )
+            farm_id = self.get_farm_id(name)
+            for table in ("tiles", "plants"):
+                self._db.execute(f"DELETE FROM {table} WHERE farm_id = ?",
+                                 (farm_id,))
+            self._db.executemany(
+                "INSERT INTO tiles VALUES (?, ?, ?)",
+                ((farm_id, row, grid.row_bytes(row)) for row in range(rows)),
+            )
+            # Inserting in primary key order appends to the table's B-tree
+            # instead of splitting pages all over it
+            self._db.executemany(
+                "INSERT INTO plants VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                sorted(_plant_rows(farm_id, model.get_plants(),
+                                   model.get_days_elapsed())),
+            )
+            self._write_player(farm_id, model)
+
+    def _write_plants(self, farm_id: int,
+                      plants: Iterator[tuple[tuple[int, int], Plant]],
+                      day: int) -> None:
+        """Inserts or replaces the given (position, plant) pairs, as their
+        state on the given day.
+        """
+        self._db.executemany(
+            "INSERT OR REPLACE INTO plants VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            ((farm_id, row, col, plant.get_name(), *plant.get_state(), day)
+             for (row, col), plant in plants),
+        )
+
+    def _write_player(self, farm_id: int, model: FarmModel) -> None:
+        """Updates the day, player and inventory of a stored farm."""
+        player = model.get_player()
+        row, col = player.get_position()
+        self._db.execute(
+            "UPDATE farms SET day = ?, energy = ?, money = ?, player_row = ?,"
+            " player_col = ?, direction = ? WHERE farm_id = ?",
+            (model.get_days_elapsed(), player.get_energy(), player.get_money(),
+             row, col, player.get_direction(), farm_id),
+        )
+        self._db.execute("DELETE FROM inventory WHERE farm_id = ?", (farm_id,))
+        self._db.executemany(
+            "INSERT INTO inventory VALUES (?, ?, ?)",
+            ((farm_id, item, amount)
+             for item, amount in player.get_inventory().items()),
+        )
+
+    def load(self, name: str, vectorized: bool = False) -> FarmModel:
+        """Returns the named farm, raising KeyError if there is none.
+
+        Parameters:
+            name: The name the farm was stored under.
+            vectorized: As for the FarmModel constructor.
+        """
+        row = self._db.execute(
+            "SELECT farm_id, rows, columns, day, energy, money, player_row,"
+            " player_col, direction FROM farms WHERE name = ?", (name,)
+        ).fetchone()
+        if row is None:
+            raise KeyError(name)
+        (farm_id, rows, columns, day, energy, money, player_row, player_col,
+         direction) = row
+
+        tiles = bytearray(rows * columns)
+        for row, data in self._db.execute(
+                "SELECT row, tiles FROM tiles WHERE farm_id = ?", (farm_id,)):
+            tiles[row * columns : (row + 1) * columns] = data
+        grid = TileGrid(tiles, (rows, columns))
+        if vectorized:
+            model = FarmModel.from_grid(grid, True,
+                                        self._load_crop_arrays(farm_id, day))
+        else:
+            model = FarmModel.from_grid(grid)
+            model.get_plants().update(self._iter_plants(farm_id, day))
+
+        player = model.get_player()
+        player.set_energy(energy)
+        player.set_money(money)
+        player.set_position((player_row, player_col))
+        player.set_direction(direction)
+        inventory = player.get_inventory()
+        inventory.clear()
+        inventory.update(self._db.execute(
+            "SELECT item, amount FROM inventory WHERE farm_id = ?", (farm_id,)))
+        model.set_days_elapsed(day)
+        model.rebuild_harvest_index()
+        return model
+
+    def _load_crop_arrays(self, farm_id: int, day: int) -> "CropArrays":
+        """Returns the plants of a stored farm, aged to the given day, as a
+        CropArrays built from columns rather than one plant at a time.
+        """
+        import numpy as np
+
+        from crop_engine import CropArrays
+
+        positions = []
+        kinds = []
+        states = []
+        for row, col, kind, stage, days, since_harvest, recorded in (
+                self._db.execute(
+                    "SELECT row, col, kind, stage, days, days_since_harvest,"
+                    " day FROM plants WHERE farm_id = ?", (farm_id,))):
+            if recorded != day:
+                plant = PLANT_CLASSES[kind]()
+                plant.set_state(stage, days, since_harvest)
+                plant.age_days(day - recorded)
+                stage, days, since_harvest = plant.get_state()
+            positions.append((row, col))
+            kinds.append(_KIND_CODES[kind])
+            states.append((stage, days, since_harvest))
+        states = np.array(states, dtype=np.int64).reshape(-1, 3)
+        return CropArrays.from_columns(
+            positions, np.array(kinds, dtype=np.uint8),
+            states[:, 0].astype(np.int8), states[:, 1].copy(),
+            states[:, 2].copy())
+
+    def iter_plants(self, name: str, kind: Optional[str] = None
+                    ) -> Iterator[tuple[tuple[int, int], Plant]]:
+        """Yields the (position, plant) pairs of the named farm, streamed
+            from the database.
+
+        Parameters:
+            name: The name the farm was stored under.
+            kind: If given, only plants with this name (e.g. "kale").
+        """
+        farm_id = self.get_farm_id(name)
+        day, = self._db.execute("SELECT day FROM farms WHERE farm_id = ?",
+                                (farm_id,)).fetchone()
+        return self._iter_plants(farm_id, day, kind)
+
+    def _iter_plants(self, farm_id: int, day: int, kind: Optional[str] = None
+                     ) -> Iterator[tuple[tuple[int, int], Plant]]:
+        """Yields the plants of a stored farm, aged to the given day."""
+        query = ("SELECT row, col, kind, stage, days, days_since_harvest, day"
+                 " FROM plants WHERE farm_id = ?")
+        parameters = (farm_id,)
+        if kind is not None:
+            query += " AND kind = ?"
+            parameters += (kind,)
+        for row, col, plant_kind, stage, days, since_harvest, recorded in (
+                self._db.execute(query, parameters)):
+            plant = PLANT_CLASSES[plant_kind]()
+            plant.set_state(stage, days, since_harvest)
+            plant.age_days(day - recorded)
+            yield (row, col), plant
+
+    def count_plants(self, name: str) -> dict[str, int]:
+        """Returns the number of plants of each kind on the named farm."""
+        return dict(self._db.execute(
+            "SELECT kind, COUNT(*) FROM plants WHERE farm_id = ? GROUP BY kind",
+            (self.get_farm_id(name),)))
+
+    def get_ledger(self, name: str) -> list[LedgerEntry]:
+        """Returns the ledger of the named farm, in order of day."""
+        return [
+            LedgerEntry(*row)
+            for row in self._db.execute(
+                "SELECT day, money, energy_spent, harvests FROM ledger"
+                " WHERE farm_id = ? ORDER BY day", (self.get_farm_id(name),))
+        ]
+
+    def delete(self, name: str) -> None:
+        """Removes the named farm and its ledger."""
+        farm_id = self.get_farm_id(name)
+        with self._db:
+            for table in ("tiles", "plants", "inventory", "ledger", "farms"):
+                self._db.execute(f"DELETE FROM {table} WHERE farm_id = ?",
+                                 (farm_id,))
+
+    def write_changes(self, farm_id: int, model: FarmModel, rows: set[int],
+                      plants: set[tuple[int, int]],
+                      removed: set[tuple[int, int]],
+                      ledger: Optional[LedgerEntry]) -> None:
+        """Writes the given changes to a stored farm in one transaction. Used
+            by FarmRecorder.
+
+        Parameters:
+            farm_id: The farm to update, as returned by get_farm_id.
+            model: The farm's current state.
+            rows: The map rows whose tiles changed.
+            plants: The positions of plants added or changed other than by
+                aging.
+            removed: The positions of plants removed.
+            ledger: A ledger row to write, if any.
+        """
+        grid = model.get_map()
+        current = model.get_plants()
+        with self._db:
+            self._db.executemany(
+                "UPDATE tiles SET tiles = ? WHERE farm_id = ? AND row = ?",
+                ((grid.row_bytes(row), farm_id, row) for row in rows),
+            )
+            self._db.executemany(
+                "DELETE FROM plants WHERE farm_id = ? AND row = ? AND col = ?",
+                ((farm_id, row, col) for row, col in removed),
+            )
+            self._write_plants(farm_id, ((position, current[position])
+                                         for position in plants),
+                               model.get_days_elapsed())
+            self._write_player(farm_id, model)
+            if ledger is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO ledger VALUES (?, ?, ?, ?, ?)",
+                    (farm_id, *ledger),
+                )
+
+
+class FarmRecorder:
+    """Keeps a stored farm up to date with a model as it is played."""
+
+    def __init__(self, store: FarmStore, name: str, model: FarmModel) -> None:
+        """Constructor for a recorder, which saves the farm in full and then
+            records its changes at the end of each day.
+
+        Parameters:
+            store: The store to record to.
+            name: The name to store the farm under.
+            model: The farm to record.
+        """
+        self._store = store
+        self._model = model
+        store.save(name, model)
+        self._farm_id = store.get_farm_id(name)
+
+        self._rows = set()
+        self._plants = set()
+        self._removed = set()
+        self._day = model.get_days_elapsed()
+        self._energy = model.get_player().get_energy()
+        self._energy_spent = 0
+        self._harvests = 0
+        model.get_events().subscribe(self.handle_events)
+
+    def handle_events(self, events: list[Event]) -> None:
+        """Accumulates a batch of model events, writing the day's changes
+        when the day advances.
+        """
+        for event in events:
+            event_type = type(event)
+            if event_type in (PlantAdded, PlantHarvested):
+                self._plants.add(event.position)
+                self._removed.discard(event.position)
+                if event_type is PlantHarvested:
+                    self._harvests += 1
+            elif event_type is PlantRemoved:
+                self._plants.discard(event.position)
+                self._removed.add(event.position)
+            elif event_type is TileChanged:
+                self._rows.add(event.position[0])
+            elif event_type is EnergyChanged:
+                self._energy_spent += max(0, self._energy - event.energy)
+                self._energy = event.energy
+            elif event_type is DayAdvanced:
+                self._write(LedgerEntry(
+                    self._day, self._model.get_player().get_money(),
+                    self._energy_spent, self._harvests))
+                self._day = event.day
+                self._energy_spent = 0
+                self._harvests = 0
+
+    def flush(self) -> None:
+        """Writes any changes made so far today, without a ledger row."""
+        self._write(None)
+
+    def close(self) -> None:
+        """Writes any outstanding changes and stops recording."""
+        self.flush()
+        self._model.get_events().unsubscribe(self.handle_events)
+
+    def _write(self, ledger: Optional[LedgerEntry]) -> None:
+        self._store.write_changes(self._farm_id, self._model, self._rows,
+                                  self._plants, self._removed, ledger)
+        self._rows.clear()
+        self._plants.clear()
+        self._removed.clear()
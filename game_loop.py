@@ -0,0 +1,143 @@
+"""Real-time mode for the farm game.
+
+RealTimeLoop advances a FarmModel at a fixed simulation rate, measured in
+days per real minute, using the Tk event loop. Simulation time is tracked
+against the wall clock, so a slow frame makes the loop catch up on the days
+it missed rather than slowing the simulation down. Each day is aged in small
+slices of plants between Tk events, so a new day on a large farm never
+blocks input handling. If the loop falls so far behind that more than
+max_catch_up days are owed, the extra days are aged together in one sliced
+pass with FarmModel.iter_advance_days, which costs about as much as one day,
+so no simulated day is ever lost and input is still handled in between.
+Drawing is left to the caller's on_day callback, which should only schedule a
+redraw (e.g. via RedrawScheduler), keeping rendering at its own capped frame
+rate.
+"""
+import time
+from collections.abc import Callable
+from typing import Optional
+
+from model import FarmModel
+
+
+class RealTimeLoop:
+    """Fixed-timestep simulation loop driven by Tk's after."""
+
+    def __init__(
+        self,
+        widget,
+        model: FarmModel,
+        days_per_minute: float,
+        on_day: Optional[Callable[[], None]] = None,
+        max_catch_up: int = 3,
+        slice_ms: float = 8,
+        plants_per_slice: int = 5000,
+    ) -> None:
+        """Constructor for a stopped loop.
+
+        Parameters:
+            widget: Any Tk widget, used to schedule callbacks with after.
+            model: The model to advance.
+            days_per_minute: The simulation rate.
+            on_day: Called after each simulated day completes, or once after
+                several days are aged together.
+            max_catch_up: The most days that are simulated one at a time when
+                the loop falls behind; any further days owed are aged together
+                in a single sliced pass.
+            slice_ms: The longest time spent simulating before returning to
+                the event loop.
+            plants_per_slice: The number of plants aged between checks of the
+                time budget.
+        """
+        self._widget = widget
+        self._model = model
+        self._step = 60 / days_per_minute
+        self._on_day = on_day
+        self._max_catch_up = max_catch_up
+        self._slice = slice_ms / 1000
+        self._plants_per_slice = plants_per_slice
+
+        self._pending = None
+        self._last_tick = None
+        self._accumulator = 0.0
+        self._queued_days = 0
+        # The sliced pass in progress, and the number of days it covers
+        self._day = None
+        self._day_count = 0
+        self._days_simulated = 0
+        self._days_advanced = 0
+
+    def start(self) -> None:
+        """Starts advancing the model in real time."""
+        if self._pending is None:
+            self._last_tick = time.perf_counter()
+            self._pending = self._widget.after(0, self._tick)
+
+    def stop(self) -> None:
+        """Stops advancing the model. A day in progress is resumed by the next
+        start().
+        """
+        if self._pending is not None:
+            self._widget.after_cancel(self._pending)
+            self._pending = None
+
+    def is_running(self) -> bool:
+        """Returns True iff the loop is running."""
+        return self._pending is not None
+
+    def _tick(self) -> None:
+        """Accumulates elapsed time into queued days, simulates for up to
+        one slice, and schedules the next tick.
+        """
+        now = time.perf_counter()
+        self._accumulator += now - self._last_tick
+        self._last_tick = now
+        while self._accumulator >= self._step:
+            self._accumulator -= self._step
+            self._queued_days += 1
+
+        self._simulate(now + self._slice)
+
+        if self._day is not None or self._queued_days:
+            # More work to do: yield to pending events, then continue
+            delay = 1
+        else:
+            delay = max(1, int((self._step - self._accumulator) * 1000))
+        self._pending = self._widget.after(delay, self._tick)
+
+    def _simulate(self, deadline: float) -> None:
+        """Works through queued days until they are done or the deadline
+        passes.
+        """
+        while time.perf_counter() < deadline:
+            if self._day is None:
+                if not self._queued_days:
+                    return
+                # Too far behind to simulate every day: age the days beyond
+                # max_catch_up together, which costs about as much as one
+                days = max(1, self._queued_days - self._max_catch_up)
+                self._queued_days -= days
+                self._day = self._model.iter_advance_days(
+                    days, self._plants_per_slice)
+                self._day_count = days
+            try:
+                next(self._day)
+            except StopIteration:
+                self._day = None
+                self._days_simulated += self._day_count
+                if self._day_count > 1:
+                    self._days_advanced += self._day_count
+                if self._on_day is not None:
+                    self._on_day()
+
+    def get_stats(self) -> dict[str, int]:
+        """Returns the number of days simulated, the number of those which
+        were aged together because the loop fell behind, and the number still
+        queued or in progress.
+        """
+        return {
+            "simulated": self._days_simulated,
+            "advanced": self._days_advanced,
+            "queued": self._queued_days + (self._day_count
+                                           if self._day is not None else 0),
+        }
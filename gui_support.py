@@ -0,0 +1,225 @@
+"""GUI helpers for the farm game, built on tkinter and PIL. Import these via
+a3_support, which loads this module lazily.
+"""
+import tkinter as tk
+from PIL import ImageTk, Image
+from collections import OrderedDict
+from typing import Union
+from constants import *
+
+# Default budget for an ImageCache (64 MiB of decoded pixels)
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+
+
+class ImageCache:
+    """Least-recently-used cache of images keyed by (path, size), bounded by
+    the number of bytes the decoded images occupy.
+
+    Evicting an image only drops the cache's reference to it; widgets which
+    display a Tk image must keep their own reference for as long as it is
+    shown.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES) -> None:
+        """Constructor for an empty cache.
+
+        Parameters:
+            max_bytes: The budget for the total size of cached images, at four
+                bytes per pixel.
+        """
+        self._images = OrderedDict()
+        self._max_bytes = max_bytes
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: tuple[str, tuple[int, int]], default=None):
+        """Returns the image cached under key, marking it as most recently
+            used, or default if it is not cached.
+
+        Parameters:
+            key: The (path, size) of the image.
+            default: The value to return if the image is not cached.
+        """
+        entry = self._images.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._images.move_to_end(key)
+        return entry[0]
+
+    def __setitem__(self, key: tuple[str, tuple[int, int]], image) -> None:
+        if key in self._images:
+            self._bytes -= self._images.pop(key)[1]
+        size = _image_bytes(image)
+        self._images[key] = (image, size)
+        self._bytes += size
+
+        # Evict least recently used images, always keeping the newest
+        while self._bytes > self._max_bytes and len(self._images) > 1:
+            _, (_, evicted_size) = self._images.popitem(last=False)
+            self._bytes -= evicted_size
+            self.evictions += 1
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._images
+
+    def __len__(self) -> int:
+        return len(self._images)
+
+    def get_size(self) -> int:
+        """Returns the total size in bytes of the cached images."""
+        return self._bytes
+
+    def get_stats(self) -> dict[str, int]:
+        """Returns the cache's hit, miss and eviction counts, and its size."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "images": len(self._images),
+            "bytes": self._bytes,
+        }
+
+
+def _image_bytes(image: Union[Image.Image, ImageTk.PhotoImage]) -> int:
+    """Returns the approximate decoded size of a PIL or Tk image in bytes."""
+    if isinstance(image, Image.Image):
+        width, height = image.size
+    else:
+        width, height = image.width(), image.height()
+    return width * height * 4
+
+
+def get_image(
+    image_name: str,
+    size: tuple[int, int],
+    cache: Union[ImageCache, dict[tuple, ImageTk.PhotoImage]] = None,
+) -> ImageTk.PhotoImage:
+    """Returns the cached image for (image_name, size) if one exists, otherwise
+        creates a new one, caches and returns it.
+
+    Parameters:
+        image_name: The path to the image to load.
+        size: The size to resize the image to, as (width, height).
+        cache: The cache to use, either an ImageCache or a dictionary. If None,
+            no caching is performed.
+
+    Returns:
+        The image for the given image_name, resized appropriately.
+    """
+    key = (image_name, size)
+    image = cache.get(key) if cache is not None else None
+    if image is None:
+        image = ImageTk.PhotoImage(image=Image.open(image_name).resize(size))
+        if cache is not None:
+            cache[key] = image
+    return image
+
+
+class AbstractGrid(tk.Canvas):
+    """A type of tkinter Canvas that provides support for using the canvas as a
+    grid (i.e. a collection of rows and columns)."""
+
+    def __init__(
+        self,
+        master: Union[tk.Tk, tk.Frame],
+        dimensions: tuple[int, int],
+        size: tuple[int, int],
+        **kwargs,
+    ) -> None:
+        """Constructor for AbstractGrid.
+
+        Parameters:
+            master:
+                The master frame for this Canvas.
+            dimensions:
+                (#rows, #columns)
+            size:
+                (width in pixels, height in pixels)
+        """
+        super().__init__(
+            master,
+            width=size[0] + 1,
+            height=size[1] + 1,
+            highlightthickness=0,
+            **kwargs,
+        )
+        self._size = size
+        self.set_dimensions(dimensions)
+
+    def set_dimensions(self, dimensions: tuple[int, int]) -> None:
+        """Sets the dimensions of the grid.
+
+        Parameters:
+            dimensions: Dimensions of this grid as (#rows, #columns)
+        """
+        self._dimensions = dimensions
+
+    def get_cell_size(self) -> tuple[int, int]:
+        """Returns the size of the cells (width, height) in pixels."""
+        rows, cols = self._dimensions
+        width, height = self._size
+        return width // cols, height // rows
+
+    def pixel_to_cell(self, x: int, y: int) -> tuple[int, int]:
+        """Converts a pixel position to a cell position.
+
+        Parameters:
+            x: The x pixel position.
+            y: The y pixel position.
+
+        Returns:
+            The (row, col) cell position.
+        """
+        cell_width, cell_height = self.get_cell_size()
+        return y // cell_height, x // cell_width
+
+    def get_bbox(self, position: tuple[int, int]) -> tuple[int, int, int, int]:
+        """Returns the bounding box of the given (row, col) position.
+
+        Parameters:
+            position: The (row, col) cell position.
+
+        Returns:
+            Bounding box for this position as (x_min, y_min, x_max, y_max).
+        """
+        row, col = position
+        cell_width, cell_height = self.get_cell_size()
+        x_min, y_min = col * cell_width, row * cell_height
+        x_max, y_max = x_min + cell_width, y_min + cell_height
+        return x_min, y_min, x_max, y_max
+
+    def get_midpoint(self, position: tuple[int, int]) -> tuple[int, int]:
+        """Gets the graphics coordinates for the center of the cell at the
+            given (row, col) position.
+
+        Parameters:
+            position: The (row, col) cell position.
+
+        Returns:
+            The x, y pixel position of the center of the cell.
+        """
+        row, col = position
+        cell_width, cell_height = self.get_cell_size()
+        x_pos = col * cell_width + cell_width // 2
+        y_pos = row * cell_height + cell_height // 2
+        return x_pos, y_pos
+
+    def annotate_position(
+        self, position: tuple[int, int], text: str, font=None
+    ) -> None:
+        """Annotates the cell at the given (row, col) position with the
+            provided text.
+
+        Parameters:
+            position: The (row, col) cell position.
+            text: The text to draw.
+        """
+        self.create_text(self.get_midpoint(position), text=text, font=font)
+
+    def clear(self):
+        """Clears all child widgets off the canvas."""
+        self.delete("all")
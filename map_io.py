@@ -0,0 +1,201 @@
+"""Loading of farm maps from disk. This module has no GUI dependencies, so
+the model can be used without tkinter or PIL installed.
+
+Maps are either text files with one line of tile characters per row, or
+run-length encoded files (extension RLE_EXTENSION), which are far smaller and
+faster to load for large maps. An RLE map is laid out as:
+    header      magic, version, flags, rows, columns, see _RLE_HEADER
+    body        for each row, its number of runs (uint32) followed by each
+                run as (tile, length) (uint8, uint32). A row with no runs
+                repeats the previous row.
+All values are little-endian. If flags has COMPRESSED set, the body is a
+single zlib stream.
+
+Usage, to convert a text map:
+    python map_io.py map.txt map.rle [--no-compress]
+"""
+import argparse
+import os
+import re
+import struct
+import zlib
+from collections.abc import Iterable, Iterator
+from typing import BinaryIO, Union
+
+from tile_grid import TileGrid
+
+RLE_EXTENSION = ".rle"
+RLE_MAGIC = b"FARMRLE"
+RLE_VERSION = 1
+COMPRESSED = 1
+
+_RLE_HEADER = struct.Struct("<7sBBII")
+_RUN_COUNT = struct.Struct("<I")
+_RUN = struct.Struct("<BI")
+_RUNS = re.compile(rb"(.)\1*", re.DOTALL)
+_TILE_BYTES = [bytes((tile,)) for tile in range(256)]
+# Bytes of the body read from the file at a time
+_BLOCK_SIZE = 1 << 20
+
+
+def read_map(map_file: str) -> list[str]:
+    """Reads the map file and returns a list of strings, where each string
+        represents one row of the farm (first string represents top row), and
+        each character in a string represents a tile.
+
+    Parameters:
+        map_file: The path to the map file.
+
+    Returns:
+        A list of strings representing the tiles in the map.
+    """
+    with open(map_file, "r") as file:
+        return [line.strip() for line in file.readlines()]
+
+
+def load_tiles(map_file: str) -> TileGrid:
+    """Loads a map in either format, chosen by the file's extension.
+
+    Parameters:
+        map_file: The path to the map file.
+
+    Returns:
+        A new grid containing the map's tiles.
+    """
+    if os.path.splitext(map_file)[1] == RLE_EXTENSION:
+        return read_rle_map(map_file)
+    return TileGrid.from_rows(read_map(map_file))
+
+
+def _encode_row(row: bytes) -> bytes:
+    """Returns the runs of a row in the RLE body format."""
+    runs = [_RUN.pack(match[0][0], len(match[0])) for match in _RUNS.finditer(row)]
+    return _RUN_COUNT.pack(len(runs)) + b"".join(runs)
+
+
+def write_rle_map(map_file: str, rows: Iterable[Union[str, bytes]],
+                  compress: bool = True) -> None:
+    """Writes a map in the RLE format, encoding the rows as they are read.
+
+    Parameters:
+        map_file: The path to write the map to.
+        rows: The rows of the map, top row first, such as the list returned
+            by read_map or the rows of a TileGrid.
+        compress: Whether to compress the body with zlib.
+    """
+    compressor = zlib.compressobj() if compress else None
+    num_rows = 0
+    num_cols = None
+    previous = None
+    with open(map_file, "wb") as file:
+        # The header is written again once the dimensions are known
+        file.write(bytes(_RLE_HEADER.size))
+        for row in rows:
+            if not isinstance(row, (bytes, bytearray)):
+                row = str(row).encode("ascii")
+            if num_cols is None:
+                num_cols = len(row)
+            elif len(row) != num_cols:
+                raise ValueError(
+                    f"Row {num_rows} has {len(row)} tiles, expected {num_cols}"
+                )
+            data = _RUN_COUNT.pack(0) if row == previous else _encode_row(row)
+            file.write(compressor.compress(data) if compress else data)
+            previous = row
+            num_rows += 1
+        if compress:
+            file.write(compressor.flush())
+        file.seek(0)
+        file.write(_RLE_HEADER.pack(RLE_MAGIC, RLE_VERSION,
+                                    COMPRESSED if compress else 0,
+                                    num_rows, num_cols or 0))
+
+
+def _read_body(file: BinaryIO, compressed: bool) -> Iterator[bytes]:
+    """Yields the body of an RLE map in blocks, decompressing if needed."""
+    decompressor = zlib.decompressobj() if compressed else None
+    try:
+        while block := file.read(_BLOCK_SIZE):
+            yield decompressor.decompress(block) if compressed else block
+        if compressed:
+            yield decompressor.flush()
+            if not decompressor.eof:
+                raise ValueError("Compressed map body is truncated")
+    except zlib.error as error:
+        raise ValueError(f"Corrupt compressed map body: {error}") from None
+
+
+def read_rle_map(map_file: str) -> TileGrid:
+    """Reads a map in the RLE format, decoding each row straight into the
+        grid's storage as the file is streamed in.
+
+    Parameters:
+        map_file: The path to the map file.
+
+    Returns:
+        A new grid containing the map's tiles.
+    """
+    with open(map_file, "rb") as file:
+        header = file.read(_RLE_HEADER.size)
+        if len(header) < _RLE_HEADER.size:
+            raise ValueError(f"{map_file} is not a supported RLE map")
+        magic, version, flags, rows, columns = _RLE_HEADER.unpack(header)
+        if magic != RLE_MAGIC or version > RLE_VERSION:
+            raise ValueError(f"{map_file} is not a supported RLE map")
+
+        tiles = bytearray(rows * columns)
+        row = 0
+        pending = bytearray()
+        for block in _read_body(file, bool(flags & COMPRESSED)):
+            pending += block
+            offset = 0
+            # Decode every complete row in the buffer
+            while row < rows and len(pending) - offset >= _RUN_COUNT.size:
+                (count,) = _RUN_COUNT.unpack_from(pending, offset)
+                end = offset + _RUN_COUNT.size + count * _RUN.size
+                if end > len(pending):
+                    break
+                start = row * columns
+                if count == 0:
+                    data = tiles[start - columns : start] if row else b""
+                else:
+                    data = b"".join(
+                        _TILE_BYTES[tile] * length for tile, length in
+                        _RUN.iter_unpack(pending[offset + _RUN_COUNT.size : end]))
+                if len(data) != columns:
+                    raise ValueError(
+                        f"Row {row} has {len(data)} tiles, expected {columns}")
+                tiles[start : start + columns] = data
+                offset = end
+                row += 1
+            del pending[:offset]
+
+    if row < rows:
+        raise ValueError(f"{map_file} ends after {row} of {rows} rows")
+    return TileGrid(tiles, (rows, columns))
+
+
+def convert_map(text_file: str, rle_file: str, compress: bool = True) -> None:
+    """Converts a text map to the RLE format, one line at a time.
+
+    Parameters:
+        text_file: The path of the text map.
+        rle_file: The path to write the RLE map to.
+        compress: Whether to compress the body with zlib.
+    """
+    with open(text_file, "r") as file:
+        write_rle_map(rle_file, (line.strip() for line in file), compress)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Convert a text map to RLE.")
+    parser.add_argument("text_file")
+    parser.add_argument("rle_file")
+    parser.add_argument("--no-compress", action="store_true",
+                        help="leave the body uncompressed")
+    args = parser.parse_args()
+    convert_map(args.text_file, args.rle_file, not args.no_compress)
+
+
+if __name__ == "__main__":
+    main()
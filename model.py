@@ -1,6 +1,23 @@
+from collections.abc import Iterable, Iterator
 from typing import Optional
 from constants import *
-from a3_support import *
+from events import (
+    DayAdvanced,
+    DaySliceAged,
+    EnergyChanged,
+    EventBus,
+    InventoryChanged,
+    MoneyChanged,
+    PlantAdded,
+    PlantAged,
+    PlantHarvested,
+    PlantRemoved,
+    PlayerMoved,
+    TileChanged,
+    batched,
+)
+from map_io import load_tiles
+from tile_grid import TileGrid
 
 
 class Plant:
@@ -8,6 +25,10 @@ class Plant:
     required functions for all plant subclasses.
     """
 
+    # Per-plant state lives in slots; constant data such as _NAME is shared
+    # by every plant of a type through the class.
+    __slots__ = ("_stage",)
+
     _NAME = "abstract plant"
 
     def __init__(self):
@@ -37,6 +58,17 @@ class Plant:
         """
         raise NotImplementedError("Plant subclasses must implement age()")
 
+    def age_days(self, days: int) -> None:
+        """Ages the plant by the given number of days. Equivalent to calling
+            age() that many times; subclasses override this with a closed
+            form that does not depend on the number of days.
+
+        Parameters:
+            days: The number of days to age the plant by.
+        """
+        for _ in range(days):
+            self.age()
+
     def harvest(self) -> Optional[tuple[str, int]]:
         """Harvests the plant if it is ready to be harvested. Otherwise, does
         nothing.
@@ -47,17 +79,39 @@ class Plant:
         """
         raise NotImplementedError("Plant subclasses must implement harvest()")
 
+    def get_state(self) -> tuple[int, int, int]:
+        """Returns the growth state of the plant, as
+        (stage, days, days since harvest).
+        """
+        return (self._stage, 0, 0)
+
+    def set_state(self, stage: int, days: int, days_since_harvest: int) -> None:
+        """Sets the growth state of the plant.
+
+        Parameters:
+            stage: The stage of the plant.
+            days: The number of days the plant has been growing.
+            days_since_harvest: The number of days since the plant was last
+                harvested.
+        """
+        self._stage = stage
+
 
 class PotatoPlant(Plant):
     """Potato plant has 5 stages, with stages 0-4 lasting one day each. At \
         stage 5 it is ready for harvest.
     """
 
+    __slots__ = ()
+
     _NAME = "potato"
 
     def age(self) -> None:
         self._stage = min(self._stage + 1, 5)
 
+    def age_days(self, days: int) -> None:
+        self._stage = min(self._stage + days, 5)
+
     def can_harvest(self) -> bool:
         return self._stage == 5
 
@@ -69,6 +123,8 @@ class PotatoPlant(Plant):
 class KalePlant(Plant):
     """Kale plant has 5 stages, with stage 5 being harvest."""
 
+    __slots__ = ("_days",)
+
     _NAME = "kale"
 
     def __init__(self) -> None:
@@ -79,6 +135,19 @@ class KalePlant(Plant):
         self._days += 1
         self._stage = 5 if self._days >= 6 else (self._days + 1) // 2 + 1
 
+    def age_days(self, days: int) -> None:
+        if days <= 0:
+            return
+        self._days += days
+        self._stage = 5 if self._days >= 6 else (self._days + 1) // 2 + 1
+
+    def get_state(self) -> tuple[int, int, int]:
+        return (self._stage, self._days, 0)
+
+    def set_state(self, stage: int, days: int, days_since_harvest: int) -> None:
+        self._stage = stage
+        self._days = days
+
     def can_harvest(self) -> bool:
         return self._stage == 5
 
@@ -93,8 +162,10 @@ class BerryPlant(Plant):
     days.
     """
 
+    __slots__ = ("_days", "_days_since_harvest")
+
     _NAME = "berry"
-    _DAYS_TO_STAGE = [1, 2, 2, 2, 3, 3, 3, 4, 4, 4, 4, 5, 5, 6]
+    _DAYS_TO_STAGE = (1, 2, 2, 2, 3, 3, 3, 4, 4, 4, 4, 5, 5, 6)
 
     def __init__(self) -> None:
         super().__init__()
@@ -117,6 +188,32 @@ class BerryPlant(Plant):
         else:
             self._stage = 5
 
+    def age_days(self, days: int) -> None:
+        if days <= 0:
+            return
+        old_days = self._days
+        self._days += days
+        if self._days <= 13:
+            self._stage = self._DAYS_TO_STAGE[self._days]
+            return
+
+        # Days spent past maturity count towards regrowth. A plant which
+        # matured during this period reached stage 6 on day 13.
+        previous_stage = self._stage if old_days >= 13 else 6
+        self._days_since_harvest += self._days - max(old_days, 13)
+        if self._days_since_harvest >= 4 or previous_stage == 6:
+            self._stage = 6
+        else:
+            self._stage = 5
+
+    def get_state(self) -> tuple[int, int, int]:
+        return (self._stage, self._days, self._days_since_harvest)
+
+    def set_state(self, stage: int, days: int, days_since_harvest: int) -> None:
+        self._stage = stage
+        self._days = days
+        self._days_since_harvest = days_since_harvest
+
     def remove_on_harvest(self) -> bool:
         return False
 
@@ -130,13 +227,207 @@ class BerryPlant(Plant):
             return ("Berry", 3)
 
 
+def _harvest_stages(plant_class: type) -> frozenset[int]:
+    """Returns the stages at which plants of the given class can be
+    harvested.
+    """
+    plant = plant_class()
+    stages = set()
+    for stage in range(8):
+        plant.set_state(stage, 0, 0)
+        if plant.can_harvest():
+            stages.add(stage)
+    return frozenset(stages)
+
+
+# The stages at which each kind of plant is ready for harvest, by name
+HARVEST_STAGES = {
+    plant_class._NAME: _harvest_stages(plant_class)
+    for plant_class in (PotatoPlant, KalePlant, BerryPlant)
+}
+
+
+class HarvestIndex:
+    """Index of the plants on a farm by name and stage, kept up to date by
+    FarmModel as plants are added, aged, harvested and removed. Finding the
+    plants ready for harvest or counting the plants at a stage costs time
+    proportional to the answer, not to the number of plants.
+    """
+
+    def __init__(self) -> None:
+        """Constructor for an empty index."""
+        # name -> {stage: number of plants}
+        self._counts = {}
+        # name -> positions of plants ready for harvest, in a dictionary
+        # used as an insertion-ordered set
+        self._ready = {}
+        self._total = 0
+
+    def clear(self) -> None:
+        """Removes every plant from the index."""
+        self._counts.clear()
+        self._ready.clear()
+        self._total = 0
+
+    def rebuild(self, plants: dict[tuple[int, int], Plant]) -> None:
+        """Replaces the contents of the index with the given plants.
+
+        Parameters:
+            plants: The plants on the farm, by position.
+        """
+        self.clear()
+        for position, plant in plants.items():
+            self.add(position, plant.get_name(), plant.get_stage())
+
+    def add(self, position: tuple[int, int], name: str, stage: int) -> None:
+        """Adds a plant to the index.
+
+        Parameters:
+            position: The position of the plant.
+            name: The name of the plant.
+            stage: The current stage of the plant.
+        """
+        self.change_count(name, None, stage)
+        if stage in HARVEST_STAGES.get(name, ()):
+            self._ready.setdefault(name, {})[position] = None
+
+    def remove(self, position: tuple[int, int], name: str, stage: int) -> None:
+        """Removes a plant from the index.
+
+        Parameters:
+            position: The position of the plant.
+            name: The name of the plant.
+            stage: The stage the plant was indexed at.
+        """
+        self.change_count(name, stage, None)
+        self._ready.get(name, {}).pop(position, None)
+
+    def update(self, position: tuple[int, int], name: str, old_stage: int,
+               stage: int) -> None:
+        """Records a change to the stage of a plant.
+
+        Parameters:
+            position: The position of the plant.
+            name: The name of the plant.
+            old_stage: The stage the plant was indexed at.
+            stage: The plant's new stage.
+        """
+        if stage == old_stage:
+            return
+        self.change_count(name, old_stage, stage)
+        ready_stages = HARVEST_STAGES.get(name, ())
+        ready = stage in ready_stages
+        if ready != (old_stage in ready_stages):
+            self.set_ready(position, name, ready)
+
+    def change_count(self, name: str, old_stage: Optional[int],
+                     stage: Optional[int], number: int = 1) -> None:
+        """Moves plants from one stage to another in the counts, without
+            changing which plants are ready for harvest. Used directly by
+            engines which age plants in bulk.
+
+        Parameters:
+            name: The name of the plants.
+            old_stage: The stage the plants were at, or None if they are new.
+            stage: The stage the plants are now at, or None if removed.
+            number: The number of plants.
+        """
+        counts = self._counts.setdefault(name, {})
+        if old_stage is None:
+            self._total += number
+        else:
+            remaining = counts.get(old_stage, 0) - number
+            if remaining > 0:
+                counts[old_stage] = remaining
+            else:
+                counts.pop(old_stage, None)
+        if stage is None:
+            self._total -= number
+        else:
+            counts[stage] = counts.get(stage, 0) + number
+
+    def set_ready(self, position: tuple[int, int], name: str, ready: bool) -> None:
+        """Records whether the plant at a position is ready for harvest."""
+        if ready:
+            self._ready.setdefault(name, {})[position] = None
+        else:
+            self._ready.get(name, {}).pop(position, None)
+
+    def add_ready(self, name: str, positions: Iterable[tuple[int, int]]) -> None:
+        """Records that the plants with the given name at many positions are
+        ready for harvest, e.g. when an engine rebuilds the index in bulk.
+        """
+        self._ready.setdefault(name, {}).update(dict.fromkeys(positions))
+
+    def get_ready(self, name: Optional[str] = None) -> list[tuple[int, int]]:
+        """Returns the positions of the plants ready for harvest.
+
+        Parameters:
+            name: If given, only plants with this name (e.g. "berry").
+        """
+        if name is not None:
+            return list(self._ready.get(name, ()))
+        return [position for ready in self._ready.values() for position in ready]
+
+    def count_ready(self, name: Optional[str] = None) -> int:
+        """Returns the number of plants ready for harvest.
+
+        Parameters:
+            name: If given, only plants with this name.
+        """
+        if name is not None:
+            return len(self._ready.get(name, ()))
+        return sum(len(ready) for ready in self._ready.values())
+
+    def count(self, name: Optional[str] = None, stage: Optional[int] = None) -> int:
+        """Returns the number of plants with the given name and at the given
+            stage, or of any name or stage if None.
+
+        Parameters:
+            name: The name of the plants to count.
+            stage: The stage of the plants to count.
+        """
+        if name is None and stage is None:
+            return self._total
+        names = self._counts if name is None else (name,)
+        total = 0
+        for plant_name in names:
+            counts = self._counts.get(plant_name, {})
+            total += sum(counts.values()) if stage is None else counts.get(stage, 0)
+        return total
+
+    def get_stage_counts(self, name: str) -> dict[int, int]:
+        """Returns the number of plants with the given name at each stage
+        which has any.
+        """
+        return dict(self._counts.get(name, {}))
+
+    def __len__(self) -> int:
+        return self._total
+
+
 class Player:
     """Represents the player in the game."""
 
+    __slots__ = (
+        "_energy",
+        "_money",
+        "_inventory",
+        "_position",
+        "_direction",
+        "_selected_item",
+        "_events",
+    )
+
     START_ENERGY = 100
 
-    def __init__(self) -> None:
-        """Constructor for the player."""
+    def __init__(self, events: Optional[EventBus] = None) -> None:
+        """Constructor for the player.
+
+        Parameters:
+            events: The bus on which changes to the player's energy, money
+                and inventory are published. If None, the player has its own.
+        """
         self._energy = self.START_ENERGY
         self._money = 0
         self._inventory = {
@@ -146,6 +437,11 @@ class Player:
         self._position = (0, 0)
         self._direction = DOWN
         self._selected_item = None
+        self._events = EventBus() if events is None else events
+
+    def get_events(self) -> EventBus:
+        """Returns the bus on which changes to the player are published."""
+        return self._events
 
     def get_energy(self) -> int:
         """Returns the player's current energy."""
@@ -176,9 +472,28 @@ class Player:
         """Returns the player's current (row, col) position."""
         return self._position
 
+    def set_energy(self, energy: int) -> None:
+        """Sets the player's energy, e.g. when restoring a saved game.
+
+        Parameters:
+            energy: The player's new energy.
+        """
+        self._energy = energy
+        self._events.emit(EnergyChanged, energy)
+
+    def set_money(self, money: int) -> None:
+        """Sets the player's money, e.g. when restoring a saved game.
+
+        Parameters:
+            money: The player's new money.
+        """
+        self._money = money
+        self._events.emit(MoneyChanged, money)
+
     def reset_energy(self) -> None:
         """Resets the player's energy to the starting amount."""
         self._energy = self.START_ENERGY
+        self._events.emit(EnergyChanged, self._energy)
 
     def reduce_energy(self, amount: int) -> None:
         """Reduces the player's energy by the given amount. Note that this
@@ -188,7 +503,9 @@ class Player:
             amount: The amount to reduce the player's energy by.
         """
         self._energy -= amount
+        self._events.emit(EnergyChanged, self._energy)
 
+    @batched
     def sell(self, item_name: str, price: int) -> None:
         """Sells one instance of the given item for the given price, if the
             player has some of the item available.
@@ -200,8 +517,10 @@ class Player:
         amount = self._inventory.get(item_name, 0)
         if amount > 0:
             self._money += price
+            self._events.emit(MoneyChanged, self._money)
             self.remove_item((item_name, 1))
 
+    @batched
     def buy(self, item_name: str, price: int) -> None:
         """Buys one instance of the given item for the given price, if the
             player has enough money.
@@ -212,6 +531,7 @@ class Player:
         """
         if self._money >= price:
             self._money -= price
+            self._events.emit(MoneyChanged, self._money)
             self.add_item((item_name, 1))
 
     def add_item(self, to_add: tuple[str, int]) -> None:
@@ -221,7 +541,9 @@ class Player:
             to_add: A tuple of the item name and amount to add.
         """
         item_name, amount = to_add
-        self._inventory[item_name] = self._inventory.get(item_name, 0) + amount
+        new_amount = self._inventory.get(item_name, 0) + amount
+        self._inventory[item_name] = new_amount
+        self._events.emit(InventoryChanged, item_name, amount, new_amount)
 
     def remove_item(self, to_remove: tuple[str, int]) -> None:
         """Removes the given amount of the given item from the player's
@@ -236,6 +558,8 @@ class Player:
             self._inventory.pop(item_name)
         else:
             self._inventory[item_name] = new_amount
+        self._events.emit(InventoryChanged, item_name, -amount,
+                          max(new_amount, 0))
 
     def set_position(self, position: tuple[int, int]) -> None:
         """Sets the player's position to the given position.
@@ -266,17 +590,28 @@ class FarmModel:
     Represents the model for the farm game.
     """
 
-    def __init__(self, map_file: str) -> None:
+    def __init__(self, map_file: str, vectorized: bool = False) -> None:
         """
         Constructor for the farm model.
 
         Parameters:
-            map_file: The path to the file containing the map to use.
+            map_file: The path to the file containing the map to use, either
+                a text map or an RLE map (see map_io).
+            vectorized: If True, plants are stored in NumPy arrays (see
+                crop_engine.CropArrays) and aged in one pass by new_day.
+                Requires NumPy.
+
+        Every change to the farm or player is published on the bus returned
+        by get_events(), batched per action and per day. The plants are
+        indexed by name and stage in get_harvest_index(), which every action
+        and day keeps up to date.
 
 
         Has the following methods:
         • get_plants()
         • get_player()
+        • get_events()
+        • get_harvest_index()
         • add_plant()
         • harvest_plant()
         • get_map()
@@ -290,9 +625,43 @@ class FarmModel:
         • untill_soil()
         • remove_plant()
         """
-        self._map = read_map(map_file)
-        self._plants = {}
-        self._player = Player()
+        self._start(load_tiles(map_file), vectorized)
+
+    @classmethod
+    def from_grid(cls, tiles: TileGrid, vectorized: bool = False,
+                  plants: Optional[dict[tuple[int, int], Plant]] = None
+                  ) -> "FarmModel":
+        """Returns a new game on the given tiles, with a new player. Used by
+            loaders which restore the map from somewhere other than a text map
+            file.
+
+        Parameters:
+            tiles: The map for the game.
+            vectorized: As for the constructor.
+            plants: The plants to start with, held in a CropArrays if
+                vectorized and a dictionary otherwise. No plants if None.
+        """
+        model = cls.__new__(cls)
+        model._start(tiles, vectorized, plants)
+        return model
+
+    def _start(self, tiles: TileGrid, vectorized: bool,
+               plants: Optional[dict[tuple[int, int], Plant]] = None) -> None:
+        """Initialises a game on day 1 on the given tiles."""
+        self._map = tiles
+        self._vectorized = vectorized
+        if plants is not None:
+            self._plants = plants
+        elif vectorized:
+            from crop_engine import CropArrays
+
+            self._plants = CropArrays()
+        else:
+            self._plants = {}
+        self._harvest_index = HarvestIndex()
+        self.rebuild_harvest_index()
+        self._events = EventBus()
+        self._player = Player(self._events)
         self._days_elapsed = 1
 
     def get_plants(self) -> dict[tuple[int, int], Plant]:
@@ -305,6 +674,27 @@ class FarmModel:
         """Returns the player in this game."""
         return self._player
 
+    def get_events(self) -> EventBus:
+        """Returns the bus on which changes to this game are published."""
+        return self._events
+
+    def get_harvest_index(self) -> HarvestIndex:
+        """Returns the index of this game's plants by name and stage, which
+        answers which plants are ready for harvest.
+        """
+        return self._harvest_index
+
+    def rebuild_harvest_index(self) -> None:
+        """Rebuilds the harvest index from the plants on the farm. Loaders
+        which fill in the plants returned by get_plants() directly must call
+        this afterwards.
+        """
+        if self._vectorized:
+            self._plants.rebuild_index(self._harvest_index)
+        else:
+            self._harvest_index.rebuild(self._plants)
+
+    @batched
     def add_plant(self, position: tuple[int, int], plant: Plant) -> bool:
         """
         Adds the given plant to the given position, if the player has enough
@@ -325,10 +715,13 @@ class FarmModel:
         if self._plants.get(position) is None:
             self._player.reduce_energy(PLANT_COST)
             self._plants[position] = plant
+            self._harvest_index.add(position, plant.get_name(), plant.get_stage())
+            self._events.emit(PlantAdded, position, plant.get_name())
             return True
 
         return False
 
+    @batched
     def harvest_plant(self, position: tuple[int, int]) -> Optional[tuple[str, int]]:
         """
         Harvests the plant at the given position, if there is one that is
@@ -349,34 +742,171 @@ class FarmModel:
 
         if self._plants.get(position) is not None:
             plant = self._plants[position]
+            stage = plant.get_stage()
             harvest_result = plant.harvest()
             if harvest_result is not None:
+                self._harvest_index.update(position, plant.get_name(), stage,
+                                           plant.get_stage())
+                self._events.emit(PlantHarvested, position, *harvest_result)
                 if plant.remove_on_harvest():
                     self.remove_plant(position)
                 self._player.reduce_energy(HARVEST_COST)
                 return harvest_result
 
-    def get_map(self) -> list[str]:
-        """Returns the map for this game."""
+    def get_map(self) -> TileGrid:
+        """Returns the map for this game. Each row can be indexed and iterated
+        like a string of tiles.
+        """
         return self._map
 
     def get_dimensions(self) -> tuple[int, int]:
         """Returns the dimensions of the map for this game, as
         (number of rows, number of columns).
         """
-        return (len(self._map), len(self._map[0]))
+        return self._map.get_dimensions()
 
+    @batched
     def new_day(self) -> None:
         """Advances the game by one day."""
-        for plant in self._plants.values():
-            plant.age()
-        self._days_elapsed += 1
+        self._age_plants(1)
+        self._end_days(1)
+
+    def _age_plants(self, days: int) -> None:
+        """Ages every plant by the given number of days, updating the harvest
+            index with the plants whose stage changed and publishing them if
+            anything is subscribed.
+
+        Parameters:
+            days: The number of days to age the plants by.
+        """
+        publish = self._events.has_subscribers()
+        if self._vectorized:
+            changes = self._plants.age_indexed(days, self._harvest_index, publish)
+        else:
+            # Stages are read directly, as this loop runs for every plant
+            changes = []
+            update = self._harvest_index.update
+            for position, plant in self._plants.items():
+                stage = plant._stage
+                if days == 1:
+                    plant.age()
+                else:
+                    plant.age_days(days)
+                new_stage = plant._stage
+                if new_stage != stage:
+                    update(position, plant.get_name(), stage, new_stage)
+                    if publish:
+                        changes.append((position, new_stage))
+        if changes:
+            self._events.emit_all(PlantAged(*change) for change in changes)
+
+    def _end_days(self, days: int) -> None:
+        """Counts the given number of days as elapsed and restores the
+        player's energy.
+        """
+        self._days_elapsed += days
         self._player.reset_energy()
+        self._events.emit(DayAdvanced, self._days_elapsed)
+
+    def iter_new_day(self, batch_size: int = 10000) -> Iterator[None]:
+        """Advances the game by one day in steps, as iter_advance_days(1)."""
+        return self.iter_advance_days(1, batch_size)
+
+    def iter_advance_days(self, days: int, batch_size: int = 10000
+                          ) -> Iterator[None]:
+        """Advances the game by the given number of days in steps, yielding
+            after each batch of plants has been aged so the caller can do
+            other work in between. The days are complete once the iterator is
+            exhausted, leaving the farm as advance_days would if nothing else
+            changed part way through.
+
+            Plants are those on the farm when iteration starts; plants added
+            part way through are not aged until the next day, and plants
+            removed part way through are not aged at all.
+
+        Parameters:
+            days: The number of days to advance by.
+            batch_size: The number of plants to age before each yield.
+        """
+        if days <= 0:
+            return
+        # Stage changes are indexed as plants age, and published together
+        # once the days are complete for the plants still on the farm, with
+        # their stage by then
+        publish = self._events.has_subscribers()
+        changes = []
+        current = self._plants
+        if self._vectorized:
+            count = len(current)
+            batches = current.iter_age_indexed(days, self._harvest_index,
+                                               publish, batch_size)
+            for start, batch in zip(range(0, count, batch_size), batches):
+                changes += batch
+                # Lets a log of the game (see action_log) age the same plants
+                self._events.emit(DaySliceAged, start,
+                                  min(start + batch_size, count), days)
+                yield
+            with self._events:
+                self._events.emit_all(PlantAged(position, current[position].get_stage())
+                                      for position, _ in changes
+                                      if position in current)
+                self._end_days(days)
+            return
+
+        update = self._harvest_index.update
+        plants = list(current.items())
+        for start in range(0, len(plants), batch_size):
+            for position, plant in plants[start : start + batch_size]:
+                if current.get(position) is not plant:
+                    # Removed (and perhaps replaced) since the day began
+                    continue
+                stage = plant._stage
+                if days == 1:
+                    plant.age()
+                else:
+                    plant.age_days(days)
+                new_stage = plant._stage
+                if new_stage != stage:
+                    update(position, plant.get_name(), stage, new_stage)
+                    if publish:
+                        changes.append((position, plant))
+            self._events.emit(DaySliceAged, start,
+                              min(start + batch_size, len(plants)), days)
+            yield
+        with self._events:
+            self._events.emit_all(PlantAged(position, plant.get_stage())
+                                  for position, plant in changes
+                                  if current.get(position) is plant)
+            self._end_days(days)
+
+    @batched
+    def advance_days(self, days: int) -> None:
+        """Advances the game by the given number of days, leaving the farm in
+            the same state as calling new_day() that many times. Each plant is
+            moved straight to its final state, so the cost does not depend on
+            the number of days.
+
+        Parameters:
+            days: The number of days to advance by.
+        """
+        if days <= 0:
+            return
+        self._age_plants(days)
+        self._end_days(days)
 
     def get_days_elapsed(self) -> int:
         """Returns the number of days elapsed in this game."""
         return self._days_elapsed
 
+    def set_days_elapsed(self, days: int) -> None:
+        """Sets the number of days elapsed, e.g. when restoring a saved game.
+            Plants are not aged.
+
+        Parameters:
+            days: The day the game is on.
+        """
+        self._days_elapsed = days
+
     def get_player_position(self) -> tuple[int, int]:
         """Returns the player's current position."""
         return self.get_player().get_position()
@@ -387,6 +917,7 @@ class FarmModel:
         """
         return self.get_player().get_direction()
 
+    @batched
     def move_player(self, direction: str) -> None:
         """Moves the player in the given direction, if possible. Also handles
             reducing the player's energy appropriately for moving.
@@ -412,13 +943,18 @@ class FarmModel:
         new_col = max(0, min(new_col, self.get_dimensions()[1] - 1))
 
         # Move player
+        old_direction = self._player.get_direction()
         self._player.set_position((new_row, new_col))
         self._player.set_direction(direction)
 
         # Reduce energy if the move succeeded
         if (new_row, new_col) != (old_row, old_col):
             self._player.reduce_energy(MOVE_COST)
+        elif direction == old_direction:
+            return
+        self._events.emit(PlayerMoved, (new_row, new_col), direction)
 
+    @batched
     def till_soil(self, position: tuple[int, int]) -> None:
         """Tills the soil at the given position, if it is untilled soil.
             Reduces the player's energy appropriately.
@@ -430,11 +966,12 @@ class FarmModel:
         if self._player.get_energy() < TILL_COST:
             return
 
-        row, col = position
-        if self._map[row][col] == UNTILLED:
+        if self._map.get_tile(position) == UNTILLED:
             self._player.reduce_energy(TILL_COST)
-            self._map[row] = self._map[row][:col] + SOIL + self._map[row][col + 1 :]
+            self._map.set_tile(position, SOIL)
+            self._events.emit(TileChanged, position, SOIL)
 
+    @batched
     def untill_soil(self, position: tuple[int, int]) -> None:
         """Untills the soil at the given position, if it is tilled soil.
             Reduces the player's energy appropriately.
@@ -446,11 +983,12 @@ class FarmModel:
         if self._player.get_energy() < UNTILL_COST:
             return
 
-        row, col = position
-        if position not in self._plants and self._map[row][col] == SOIL:
+        if position not in self._plants and self._map.get_tile(position) == SOIL:
             self._player.reduce_energy(UNTILL_COST)
-            self._map[row] = self._map[row][:col] + UNTILLED + self._map[row][col + 1 :]
+            self._map.set_tile(position, UNTILLED)
+            self._events.emit(TileChanged, position, UNTILLED)
 
+    @batched
     def remove_plant(self, position: tuple[int, int]) -> None:
         """Removes the plant at the given position, if there is one.
             Reduces the player's energy appropriately.
@@ -464,4 +1002,8 @@ class FarmModel:
 
         if position in self._plants:
             self._player.reduce_energy(REMOVE_COST)
+            plant = self._plants[position]
+            self._harvest_index.remove(position, plant.get_name(),
+                                       plant.get_stage())
             self._plants.pop(position)
+            self._events.emit(PlantRemoved, position)
@@ -0,0 +1,159 @@
+"""Timing instrumentation for the farm game.
+
+A FrameProfiler keeps a rolling window of durations for each named stage
+(model actions such as move_player or new_day, and render stages such as
+FarmView.draw_map) and reports p50/p95/max statistics over that window. It can
+wrap methods of existing objects so that every call is timed, and dump its
+statistics as CSV or JSON.
+"""
+import csv
+import functools
+import json
+import time
+from collections import deque
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+
+# Model actions timed by FrameProfiler.instrument_model
+MODEL_ACTIONS = (
+    "move_player",
+    "till_soil",
+    "untill_soil",
+    "add_plant",
+    "harvest_plant",
+    "remove_plant",
+    "new_day",
+    "advance_days",
+)
+
+_FIELDS = ("name", "count", "p50_ms", "p95_ms", "max_ms", "mean_ms")
+
+
+def _percentile(ordered: list[float], fraction: float) -> float:
+    """Returns the value at the given fraction of a sorted list, using the
+    nearest-rank method.
+    """
+    index = max(0, min(len(ordered) - 1, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+class FrameProfiler:
+    """Records durations of named stages over a rolling window."""
+
+    def __init__(self, window: int = 300) -> None:
+        """Constructor for a profiler with no recorded timings.
+
+        Parameters:
+            window: The number of most recent timings kept for each stage.
+        """
+        self._window = window
+        self._timings = {}
+        self._counts = {}
+
+    def record(self, name: str, seconds: float) -> None:
+        """Records one duration for the named stage.
+
+        Parameters:
+            name: The name of the stage.
+            seconds: How long the stage took.
+        """
+        timings = self._timings.get(name)
+        if timings is None:
+            timings = self._timings[name] = deque(maxlen=self._window)
+            self._counts[name] = 0
+        timings.append(seconds)
+        self._counts[name] += 1
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """Context manager which records how long its body takes.
+
+        Parameters:
+            name: The name of the stage being timed.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def wrap(self, obj: object, methods: Iterable[str], prefix: str = "") -> None:
+        """Replaces the given methods of obj with versions which record their
+            duration. Only affects this object, not its class.
+
+        Parameters:
+            obj: The object to instrument. It must have a __dict__.
+            methods: The names of the methods to time.
+            prefix: Prepended to each method name to name its stage.
+        """
+        for method_name in methods:
+            method = getattr(obj, method_name)
+            setattr(obj, method_name, self._timed(prefix + method_name, method))
+
+    def _timed(self, name: str, function):
+        """Returns function wrapped to record its duration under name."""
+        record = self.record
+        clock = time.perf_counter
+
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(name, clock() - start)
+
+        return timed
+
+    def instrument_model(self, model: object) -> None:
+        """Times the actions of a FarmModel (see MODEL_ACTIONS).
+
+        Parameters:
+            model: The model to instrument.
+        """
+        self.wrap(model, MODEL_ACTIONS, "FarmModel.")
+
+    def get_stats(self) -> dict[str, dict[str, float]]:
+        """Returns, for each stage, the total number of timings recorded and
+        the p50, p95, max and mean of the rolling window in milliseconds.
+        """
+        stats = {}
+        for name, timings in self._timings.items():
+            ordered = sorted(timings)
+            stats[name] = {
+                "count": self._counts[name],
+                "p50_ms": _percentile(ordered, 0.50) * 1000,
+                "p95_ms": _percentile(ordered, 0.95) * 1000,
+                "max_ms": ordered[-1] * 1000,
+                "mean_ms": sum(ordered) / len(ordered) * 1000,
+            }
+        return stats
+
+    def format_stats(self) -> str:
+        """Returns the statistics as a fixed-width table, one stage per
+        line.
+        """
+        lines = [f"{'stage':<24}{'p50':>8}{'p95':>8}{'max':>8}  ms"]
+        for name, stats in sorted(self.get_stats().items()):
+            lines.append(
+                f"{name:<24}{stats['p50_ms']:>8.2f}{stats['p95_ms']:>8.2f}"
+                f"{stats['max_ms']:>8.2f}"
+            )
+        return "\n".join(lines)
+
+    def dump(self, path: str) -> None:
+        """Writes the statistics to path, as JSON if it ends in .json and as
+            CSV otherwise.
+
+        Parameters:
+            path: The file to write.
+        """
+        stats = self.get_stats()
+        with open(path, "w", newline="") as file:
+            if path.endswith(".json"):
+                json.dump(stats, file, indent=2)
+                return
+            writer = csv.writer(file)
+            writer.writerow(_FIELDS)
+            for name, values in sorted(stats.items()):
+                writer.writerow([name] + [values[field] for field in _FIELDS[1:]])
@@ -0,0 +1,82 @@
+"""Coalescing of redraw requests into at most one redraw per frame."""
+import time
+from collections.abc import Callable, Iterable
+from typing import Optional
+
+
+class RedrawScheduler:
+    """Collects redraw requests and flushes them as a single redraw, at most
+    once per frame, using the Tk event loop.
+
+    Each request may name the farm cells that changed. Requests made before
+    the next flush are merged, so a burst of key repeats or button presses
+    costs one redraw rather than one per event.
+    """
+
+    def __init__(
+        self,
+        widget,
+        redraw: Callable[[Optional[set[tuple[int, int]]]], None],
+        max_fps: float = 60,
+    ) -> None:
+        """Constructor for a scheduler.
+
+        Parameters:
+            widget: Any Tk widget, used to schedule callbacks with after and
+                after_idle.
+            redraw: Called with the merged set of dirty cells, or None if the
+                whole view should be compared, when a frame is flushed.
+            max_fps: The maximum number of redraws per second.
+        """
+        self._widget = widget
+        self._redraw = redraw
+        self._frame_interval = 1 / max_fps
+        self._pending = None
+        self._dirty = None
+        self._last_flush = float("-inf")
+        self._requests = 0
+        self._flushes = 0
+
+    def request(self, dirty: Optional[Iterable[tuple[int, int]]] = None) -> None:
+        """Marks the view dirty and schedules a flush if one is not already
+            pending. The flush runs when the event loop is idle, but no sooner
+            than one frame after the previous flush.
+
+        Parameters:
+            dirty: The farm cells that changed, or None if any may have.
+        """
+        self._requests += 1
+        if self._pending is None:
+            self._dirty = None if dirty is None else set(dirty)
+            wait = self._last_flush + self._frame_interval - time.perf_counter()
+            if wait <= 0:
+                self._pending = self._widget.after_idle(self.flush)
+            else:
+                self._pending = self._widget.after(int(wait * 1000) + 1, self.flush)
+        elif self._dirty is not None:
+            if dirty is None:
+                self._dirty = None
+            else:
+                self._dirty.update(dirty)
+
+    def flush(self) -> None:
+        """Performs the pending redraw now, if there is one."""
+        if self._pending is None:
+            return
+        self._widget.after_cancel(self._pending)
+        self._pending = None
+        dirty, self._dirty = self._dirty, None
+        self._last_flush = time.perf_counter()
+        self._flushes += 1
+        self._redraw(dirty)
+
+    def get_stats(self) -> dict[str, int]:
+        """Returns counts of redraws requested, redraws performed, and
+        requests which were coalesced into another redraw.
+        """
+        pending = 0 if self._pending is None else 1
+        return {
+            "requested": self._requests,
+            "drawn": self._flushes,
+            "coalesced": self._requests - self._flushes - pending,
+        }
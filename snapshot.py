@@ -0,0 +1,186 @@
+"""Headless rendering of farms to images, without tkinter.
+
+FarmRenderer draws a FarmModel from the same sprites as FarmView: ground
+tiles from IMAGES, plant stages from get_plant_image_name, and the player
+facing its direction. Images are composed with NumPy: the ground is built by
+indexing a stack of tile sprites with the whole tile grid at once, and plants
+are alpha-blended in one vectorized operation per sprite.
+
+Usage:
+    python snapshot.py map_file output.png [cell_size] [days]
+
+With days, writes an animated PNG timelapse of that many days instead of a
+single frame.
+"""
+import os
+import sys
+from collections.abc import Iterator
+
+import numpy as np
+from PIL import Image
+
+from a3_support import get_plant_image_name
+from constants import *
+from model import FarmModel
+
+IMAGE_DIR = "images"
+_GROUND_TILES = (GRASS, SOIL, UNTILLED)
+
+
+def _blend(dst: np.ndarray, src: np.ndarray) -> np.ndarray:
+    """Returns src alpha-composited over dst. Both are uint8 RGBA arrays
+    whose trailing dimensions match.
+    """
+    alpha = src[..., 3:4].astype(np.uint16)
+    out = (src.astype(np.uint16) * alpha
+           + dst.astype(np.uint16) * (255 - alpha) + 127) // 255
+    out[..., 3] = np.maximum(src[..., 3], dst[..., 3])
+    return out.astype(np.uint8)
+
+
+class FarmRenderer:
+    """Renders farms to RGBA arrays at a fixed cell size."""
+
+    def __init__(self, cell_size: tuple[int, int] = (16, 16),
+                 image_dir: str = IMAGE_DIR) -> None:
+        """Constructor for a renderer.
+
+        Parameters:
+            cell_size: The size of one farm cell in pixels, as
+                (width, height).
+            image_dir: The directory containing the game's sprites.
+        """
+        self._cell_size = cell_size
+        self._image_dir = image_dir
+        self._sprites = {}
+
+        # Stack of ground tile sprites, with a transparent tile last for any
+        # unknown tile character
+        width, height = cell_size
+        tiles = [self.get_sprite(IMAGES[tile]) for tile in _GROUND_TILES]
+        tiles.append(np.zeros((height, width, 4), dtype=np.uint8))
+        self._tiles = np.stack(tiles)
+        self._tile_lookup = np.full(256, len(_GROUND_TILES), dtype=np.uint8)
+        for index, tile in enumerate(_GROUND_TILES):
+            self._tile_lookup[ord(tile)] = index
+
+    def get_sprite(self, sprite: str) -> np.ndarray:
+        """Returns the sprite, resized to one cell, as an RGBA array.
+
+        Parameters:
+            sprite: The path of the sprite relative to the image directory.
+        """
+        array = self._sprites.get(sprite)
+        if array is None:
+            with Image.open(os.path.join(self._image_dir, sprite)) as image:
+                resized = image.convert("RGBA").resize(self._cell_size)
+            array = self._sprites[sprite] = np.asarray(resized)
+        return array
+
+    def render(self, model: FarmModel) -> np.ndarray:
+        """Returns an image of the farm as a (height, width, 4) uint8 RGBA
+            array.
+
+        Parameters:
+            model: The farm to render.
+        """
+        rows, columns = model.get_dimensions()
+        width, height = self._cell_size
+
+        # Ground: look up every tile's sprite at once, then interleave the
+        # cell and pixel axes into one image
+        codes = np.frombuffer(model.get_map().to_bytes(), dtype=np.uint8)
+        tiles = self._tiles[self._tile_lookup[codes].reshape(rows, columns)]
+        image = np.ascontiguousarray(tiles.transpose(0, 2, 1, 3, 4))
+        cells = image.reshape(rows, height, columns, width, 4)
+
+        # Plants: group positions by sprite, then blend each group at once
+        groups = {}
+        for position, plant in model.get_plants().items():
+            groups.setdefault(get_plant_image_name(plant), []).append(position)
+        for sprite, positions in groups.items():
+            self._draw_cells(cells, sprite, positions)
+
+        self._draw_cells(cells, IMAGES[model.get_player_direction()],
+                         [model.get_player_position()])
+        return image.reshape(rows * height, columns * width, 4)
+
+    def _draw_cells(self, cells: np.ndarray, sprite: str,
+                    positions: list[tuple[int, int]]) -> None:
+        """Blends the sprite over the given cells.
+
+        Parameters:
+            cells: The image viewed as (rows, height, columns, width, 4).
+            sprite: The path of the sprite relative to the image directory.
+            positions: The (row, col) positions of the cells to draw in.
+        """
+        row_indices, column_indices = np.array(positions).T
+        cells[row_indices, :, column_indices] = _blend(
+            cells[row_indices, :, column_indices], self.get_sprite(sprite))
+
+    def render_image(self, model: FarmModel) -> Image.Image:
+        """Returns an image of the farm as a PIL image."""
+        return Image.fromarray(self.render(model), "RGBA")
+
+    def save(self, model: FarmModel, path: str) -> None:
+        """Writes an image of the farm to path (e.g. a PNG file)."""
+        self.render_image(model).save(path)
+
+    def iter_days(self, model: FarmModel, days: int) -> Iterator[Image.Image]:
+        """Yields an image of the farm, then advances the model by a day,
+            repeated for the given number of days.
+
+        Parameters:
+            model: The farm to render. It is advanced by days days.
+            days: The number of frames to render.
+        """
+        for _ in range(days):
+            yield self.render_image(model)
+            model.new_day()
+
+    def save_frames(self, model: FarmModel, days: int, directory: str) -> None:
+        """Writes one PNG per day, named day_0001.png and so on, advancing the
+            model by the given number of days.
+
+        Parameters:
+            model: The farm to render.
+            days: The number of days to render.
+            directory: The directory to write the frames to.
+        """
+        os.makedirs(directory, exist_ok=True)
+        first_day = model.get_days_elapsed()
+        for offset, frame in enumerate(self.iter_days(model, days)):
+            frame.save(os.path.join(directory, f"day_{first_day + offset:04d}.png"))
+
+    def save_timelapse(self, model: FarmModel, days: int, path: str,
+                       frame_duration: int = 250) -> None:
+        """Writes an animated PNG with one frame per day, advancing the model
+            by the given number of days.
+
+        Parameters:
+            model: The farm to render.
+            days: The number of days to render.
+            path: The file to write.
+            frame_duration: How long each frame is shown, in milliseconds.
+        """
+        first, *rest = self.iter_days(model, days)
+        first.save(path, format="PNG", save_all=True, append_images=rest,
+                   duration=frame_duration, loop=0)
+
+
+def main() -> None:
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(1)
+    map_file, output = sys.argv[1], sys.argv[2]
+    cell = int(sys.argv[3]) if len(sys.argv) > 3 else 16
+    renderer = FarmRenderer((cell, cell))
+    model = FarmModel(map_file)
+    if len(sys.argv) > 4:
+        renderer.save_timelapse(model, int(sys.argv[4]), output)
+    else:
+        renderer.save(model, output)
+
+
+if __name__ == "__main__":
+    main()
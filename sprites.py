@@ -0,0 +1,166 @@
+"""Sprite atlas shared by the farm game's views.
+
+The atlas decodes and resizes the game's images (tiles, plant stages, player
+directions) in a background thread at startup, so no image is loaded from
+disk the first time it is shown. Sprites are looked up by their path relative
+to the images directory (e.g. "grass.png" or "plants/berry/stage_6.png", as
+returned by get_plant_image_name) together with a size.
+
+Usage:
+    python sprites.py [width] [height]
+
+preloads every sprite at the given size and reports how long it took.
+"""
+import os
+import sys
+import threading
+import time
+from collections.abc import Iterable
+from typing import Optional
+
+from PIL import Image, ImageTk
+
+from a3_support import ImageCache
+
+IMAGE_DIR = "images"
+
+
+class SpriteAtlas:
+    """Shared lookup of resized sprites keyed by (sprite, size), filled
+    eagerly by a background preloading thread.
+
+    PIL images may be decoded on any thread, but Tk images must be created on
+    the thread running the Tk main loop, so get_photo converts preloaded PIL
+    images to Tk images lazily. Both are held in bounded LRU ImageCaches, so
+    views must keep a reference to any Tk image they are displaying.
+    """
+
+    def __init__(self, image_dir: str = IMAGE_DIR,
+                 max_bytes: int = 64 * 1024 * 1024) -> None:
+        """Constructor for an empty atlas.
+
+        Parameters:
+            image_dir: The directory containing the sprites.
+            max_bytes: The budget for each of the PIL and Tk image caches.
+        """
+        self._image_dir = image_dir
+        self._images = ImageCache(max_bytes)
+        self._photos = ImageCache(max_bytes)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._preload_time = None
+
+    def list_sprites(self) -> list[str]:
+        """Returns the path, relative to the image directory, of every PNG
+        sprite in the image directory and its subdirectories.
+        """
+        sprites = []
+        for directory, _, files in os.walk(self._image_dir):
+            for file in sorted(files):
+                if file.lower().endswith(".png"):
+                    path = os.path.join(directory, file)
+                    relative = os.path.relpath(path, self._image_dir)
+                    sprites.append(relative.replace(os.sep, "/"))
+        return sorted(sprites)
+
+    def preload(self, sprites: Iterable[tuple[str, tuple[int, int]]]) -> None:
+        """Starts decoding and resizing the given sprites in a background
+            thread. Returns immediately; use wait() to block until done.
+
+        Parameters:
+            sprites: The (sprite, size) pairs to load.
+        """
+        sprites = list(sprites)
+        self._preload_time = None
+        self._thread = threading.Thread(
+            target=self._preload, args=(sprites,), daemon=True
+        )
+        self._thread.start()
+
+    def _preload(self, sprites: list[tuple[str, tuple[int, int]]]) -> None:
+        """Loads every (sprite, size) pair and records the time taken."""
+        start = time.perf_counter()
+        for sprite, size in sprites:
+            self.get_image(sprite, size)
+        self._preload_time = time.perf_counter() - start
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """Blocks until background preloading has finished.
+
+        Parameters:
+            timeout: The maximum number of seconds to wait, or None to wait
+                indefinitely.
+        """
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def get_preload_time(self) -> Optional[float]:
+        """Returns how long the last preload took in seconds, or None if it
+        has not finished.
+        """
+        return self._preload_time
+
+    def _load(self, sprite: str, size: tuple[int, int]) -> Image.Image:
+        """Decodes the sprite from disk and resizes it."""
+        path = os.path.join(self._image_dir, sprite)
+        with Image.open(path) as image:
+            return image.convert("RGBA").resize(size)
+
+    def get_image(self, sprite: str, size: tuple[int, int]) -> Image.Image:
+        """Returns the sprite resized to size as a PIL image, loading it now
+            if it has not been preloaded.
+
+        Parameters:
+            sprite: The path of the sprite relative to the image directory.
+            size: The size as (width, height).
+        """
+        key = (sprite, size)
+        with self._lock:
+            image = self._images.get(key)
+        if image is None:
+            image = self._load(sprite, size)
+            with self._lock:
+                self._images[key] = image
+        return image
+
+    def get_photo(self, sprite: str, size: tuple[int, int]) -> ImageTk.PhotoImage:
+        """Returns the sprite resized to size as a Tk image. Must be called
+            from the Tk thread.
+
+        Parameters:
+            sprite: The path of the sprite relative to the image directory.
+            size: The size as (width, height).
+        """
+        key = (sprite, size)
+        photo = self._photos.get(key)
+        if photo is None:
+            photo = ImageTk.PhotoImage(self.get_image(sprite, size))
+            self._photos[key] = photo
+        return photo
+
+    def get_stats(self) -> dict[str, dict[str, int]]:
+        """Returns the statistics of the PIL ("images") and Tk ("photos")
+        image caches.
+        """
+        with self._lock:
+            return {
+                "images": self._images.get_stats(),
+                "photos": self._photos.get_stats(),
+            }
+
+    def __len__(self) -> int:
+        return len(self._images)
+
+
+def main() -> None:
+    width = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    height = int(sys.argv[2]) if len(sys.argv) > 2 else width
+    atlas = SpriteAtlas()
+    atlas.preload((sprite, (width, height)) for sprite in atlas.list_sprites())
+    atlas.wait()
+    print(f"Preloaded {len(atlas)} sprites at {width}x{height} "
+          f"in {atlas.get_preload_time() * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
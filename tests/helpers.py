@@ -0,0 +1,85 @@
+"""Shared helpers for the tests: random play and comparison of farm states."""
+import os
+import random
+
+from constants import *
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAP_FILE = os.path.join(ROOT, "maps", "map2.txt")
+
+# Enough energy that random play never runs out
+UNLIMITED_ENERGY = 10 ** 9
+
+_WEIGHTED_ACTIONS = (
+    ["move"] * 8 + ["till"] * 3 + ["plant"] * 3 + ["harvest"] * 3
+    + ["remove", "untill", "buy", "buy", "sell", "new_day", "new_day", "advance"]
+)
+
+
+def random_actions(rng: random.Random, count: int) -> list[tuple]:
+    """Returns count random actions in the format accepted by
+    batch.apply_action.
+    """
+    actions = []
+    for _ in range(count):
+        name = rng.choice(_WEIGHTED_ACTIONS)
+        if name == "move":
+            actions.append((name, rng.choice((UP, DOWN, LEFT, RIGHT))))
+        elif name == "plant":
+            actions.append((name, rng.choice(SEEDS)))
+        elif name in ("buy", "sell"):
+            actions.append((name, rng.choice(ITEMS)))
+        elif name == "advance":
+            actions.append((name, rng.randrange(1, 8)))
+        else:
+            actions.append((name,))
+    return actions
+
+
+def farm_state(model) -> dict:
+    """Returns everything about a farm that the game can observe, in a form
+    which compares equal between models in the same state.
+    """
+    player = model.get_player()
+    return {
+        "tiles": model.get_map().to_bytes(),
+        "plants": {position: (plant.get_name(), plant.get_state())
+                   for position, plant in model.get_plants().items()},
+        "day": model.get_days_elapsed(),
+        "energy": player.get_energy(),
+        "money": player.get_money(),
+        "position": player.get_position(),
+        "direction": player.get_direction(),
+        "inventory": {item: amount for item, amount
+                      in player.get_inventory().items() if amount},
+    }
+
+
+def index_state(index) -> dict:
+    """Returns the contents of a harvest index as plain values."""
+    names = ("potato", "kale", "berry")
+    return {
+        "ready": {name: sorted(index.get_ready(name)) for name in names},
+        "counts": {name: index.get_stage_counts(name) for name in names},
+        "total": len(index),
+    }
+
+
+def scanned_index_state(plants) -> dict:
+    """Returns what index_state should give for the given plants, found by
+    scanning every plant.
+    """
+    names = ("potato", "kale", "berry")
+    state = {"ready": {name: [] for name in names},
+             "counts": {name: {} for name in names},
+             "total": 0}
+    for position, plant in plants.items():
+        name = plant.get_name()
+        counts = state["counts"][name]
+        counts[plant.get_stage()] = counts.get(plant.get_stage(), 0) + 1
+        if plant.can_harvest():
+            state["ready"][name].append(position)
+        state["total"] += 1
+    for name in names:
+        state["ready"][name].sort()
+    return state
@@ -0,0 +1,133 @@
+import random
+
+import pytest
+
+from action_log import ActionLog, ActionReplay, decode_state, encode_state
+from batch import apply_action
+from constants import *
+from model import FarmModel, PotatoPlant
+
+from helpers import (MAP_FILE, UNLIMITED_ENERGY, farm_state, index_state,
+                     random_actions, scanned_index_state)
+
+
+def logged_model(tmp_path, plants=(), vectorized=False):
+    model = FarmModel(MAP_FILE, vectorized)
+    player = model.get_player()
+    player.reduce_energy(-UNLIMITED_ENERGY)
+    player.set_money(10 ** 6)
+    for seed in SEEDS:
+        player.add_item((seed, 100))
+    for position in plants:
+        model.get_plants()[position] = PotatoPlant()
+    model.rebuild_harvest_index()
+    path = tmp_path / "game.log"
+    return model, path, ActionLog(str(path), model, buffer_size=64)
+
+
+def open_replay(path, **kwargs) -> ActionReplay:
+    with open(path, "rb") as file:
+        return ActionReplay(file, **kwargs)
+
+
+@pytest.mark.parametrize("vectorized", [False, True])
+def test_state_round_trip(vectorized):
+    model = FarmModel(MAP_FILE)
+    model.get_player().reduce_energy(-UNLIMITED_ENERGY)
+    for action in random_actions(random.Random(1), 2000):
+        apply_action(model, action)
+    decoded = decode_state(encode_state(model), vectorized)
+    assert farm_state(decoded) == farm_state(model)
+    assert encode_state(decoded) == encode_state(model)
+
+
+@pytest.mark.parametrize("vectorized", [False, True])
+def test_replay_and_seek(tmp_path, vectorized):
+    model, path, log = logged_model(tmp_path)
+    states = [farm_state(model)]
+    counts = [0]
+    for action in random_actions(random.Random(2), 1500):
+        apply_action(model, action)
+        log.flush()
+        states.append(farm_state(model))
+        counts.append(log.get_record_count())
+    log.close()
+
+    replay = open_replay(path, snapshot_interval=100, vectorized=vectorized)
+    assert replay.get_record_count() == counts[-1]
+    final = replay.seek()
+    assert farm_state(final) == states[-1]
+    assert (index_state(final.get_harvest_index())
+            == scanned_index_state(final.get_plants()))
+    # Seeking backwards starts from the snapshots taken on the way
+    rng = random.Random(3)
+    for step in rng.sample(range(len(counts)), 30):
+        assert farm_state(replay.seek(counts[step])) == states[step]
+
+
+@pytest.mark.parametrize("played_vectorized", [False, True])
+@pytest.mark.parametrize("vectorized", [False, True])
+def test_sliced_days_replay_as_played(tmp_path, played_vectorized, vectorized):
+    model, path, log = logged_model(tmp_path, vectorized=played_vectorized)
+    rng = random.Random(4)
+    for action in random_actions(rng, 1500):
+        apply_action(model, action)
+    for _ in range(15):
+        # Plants added part way through a day are not aged until the next,
+        # and berries harvested part way through may already have aged
+        days = rng.choice((1, 1, 2, 7))
+        for _ in model.iter_advance_days(days, batch_size=4):
+            for action in random_actions(rng, 4):
+                if action[0] not in ("new_day", "advance"):
+                    apply_action(model, action)
+        for action in random_actions(rng, 20):
+            apply_action(model, action)
+    log.close()
+
+    replay = open_replay(path, snapshot_interval=50, vectorized=vectorized)
+    assert farm_state(replay.seek()) == farm_state(model)
+    # Snapshots are never taken part way through a sliced day
+    assert farm_state(replay.seek()) == farm_state(model)
+
+
+def test_plant_added_part_way_through_a_day(tmp_path):
+    model, path, log = logged_model(tmp_path, [(0, 0)])
+    day = model.iter_new_day(batch_size=1)
+    next(day)
+    model.add_plant((5, 5), PotatoPlant())
+    for _ in day:
+        pass
+    log.close()
+
+    replayed = open_replay(path).seek()
+    assert replayed.get_plants()[(5, 5)].get_stage() == 1
+    assert farm_state(replayed) == farm_state(model)
+
+
+def test_large_amounts(tmp_path):
+    model, path, log = logged_model(tmp_path)
+    player = model.get_player()
+    player.reduce_energy(-10 ** 12)
+    player.set_money(10 ** 15)
+    player.add_item(("Potato", 2 ** 40))
+    log.close()
+
+    replayed = open_replay(path).seek()
+    assert farm_state(replayed) == farm_state(model)
+    assert farm_state(decode_state(encode_state(model))) == farm_state(model)
+
+
+def test_unknown_items_raise_value_error(tmp_path):
+    model, path, log = logged_model(tmp_path)
+    with pytest.raises(ValueError, match="unknown item"):
+        model.get_player().add_item(("Turnip", 1))
+    log.close()
+    with pytest.raises(ValueError, match="unknown item"):
+        encode_state(model)
+
+
+def test_not_a_log(tmp_path):
+    path = tmp_path / "other.log"
+    path.write_bytes(b"FARMLOG1" + bytes(16))
+    with pytest.raises(ValueError):
+        open_replay(path)
@@ -0,0 +1,71 @@
+import random
+
+import pytest
+
+from batch import apply_action
+from model import FarmModel, PotatoPlant, KalePlant, BerryPlant
+
+from helpers import MAP_FILE, UNLIMITED_ENERGY, farm_state, random_actions
+
+
+@pytest.mark.parametrize("plant_class", [PotatoPlant, KalePlant, BerryPlant])
+def test_age_days_matches_age(plant_class):
+    rng = random.Random(0)
+    for _ in range(500):
+        aged = plant_class()
+        stepped = plant_class()
+        for _ in range(4):
+            days = rng.randrange(0, 20)
+            aged.age_days(days)
+            for _ in range(days):
+                stepped.age()
+            assert aged.get_state() == stepped.get_state()
+            if rng.random() < 0.5:
+                assert aged.harvest() == stepped.harvest()
+
+
+@pytest.mark.parametrize("vectorized", [False, True])
+def test_advance_days_matches_new_day(vectorized):
+    rng = random.Random(2)
+    advanced = FarmModel(MAP_FILE, vectorized)
+    stepped = FarmModel(MAP_FILE, vectorized)
+    for model in (advanced, stepped):
+        model.get_player().reduce_energy(-UNLIMITED_ENERGY)
+        model.get_player().add_item(("Berry Seed", 50))
+
+    for action in random_actions(rng, 2000):
+        apply_action(advanced, action)
+        if action[0] == "advance":
+            for _ in range(action[1]):
+                stepped.new_day()
+        else:
+            apply_action(stepped, action)
+        assert farm_state(advanced) == farm_state(stepped)
+
+
+def test_advance_no_days():
+    model = FarmModel(MAP_FILE)
+    model.advance_days(0)
+    model.advance_days(-3)
+    assert model.get_days_elapsed() == 1
+
+
+@pytest.mark.parametrize("vectorized", [False, True])
+def test_iter_advance_days_matches_advance_days(vectorized):
+    rng = random.Random(3)
+    iterated = FarmModel(MAP_FILE, vectorized)
+    advanced = FarmModel(MAP_FILE, vectorized)
+    for model in (iterated, advanced):
+        model.get_player().reduce_energy(-UNLIMITED_ENERGY)
+        model.get_player().add_item(("Berry Seed", 50))
+
+    for action in random_actions(rng, 2000):
+        if action[0] == "advance":
+            steps = list(iterated.iter_advance_days(action[1], batch_size=2))
+            # One yield per batch of plants, never the whole farm at once
+            assert len(steps) == (len(iterated.get_plants()) + 1) // 2
+            advanced.advance_days(action[1])
+        else:
+            apply_action(iterated, action)
+            apply_action(advanced, action)
+        assert farm_state(iterated) == farm_state(advanced)
@@ -0,0 +1,99 @@
+import gc
+import os
+import random
+
+import pytest
+
+from batch import apply_action
+from chunked_world import ChunkedFarmModel
+from constants import *
+from model import FarmModel, BerryPlant
+
+from helpers import (MAP_FILE, UNLIMITED_ENERGY, farm_state, index_state,
+                     random_actions)
+
+
+@pytest.fixture
+def models():
+    plain = FarmModel(MAP_FILE)
+    # A budget of a few small chunks, so chunks are evicted all the time
+    chunked = ChunkedFarmModel(plain.get_dimensions(), plain.get_map(),
+                               chunk_size=4, memory_budget=1000)
+    for model in (plain, chunked):
+        player = model.get_player()
+        player.reduce_energy(-UNLIMITED_ENERGY)
+        player.set_money(10 ** 6)
+    yield plain, chunked
+    chunked.close()
+
+
+def index_queries(index) -> dict:
+    state = index_state(index)
+    state["count_ready"] = index.count_ready()
+    state["count_ready_berry"] = index.count_ready("berry")
+    state["count_stage_5"] = index.count(stage=5)
+    state["count_kale"] = index.count("kale")
+    return state
+
+
+def test_plays_like_a_plain_farm(models):
+    plain, chunked = models
+    for step, action in enumerate(random_actions(random.Random(1), 3000)):
+        apply_action(plain, action)
+        apply_action(chunked, action)
+        if step % 100 == 0:
+            # Queried before anything loads every chunk
+            assert (index_queries(chunked.get_harvest_index())
+                    == index_queries(plain.get_harvest_index()))
+    assert chunked.get_chunks().get_stats()["evictions"] > 0
+    assert (index_queries(chunked.get_harvest_index())
+            == index_queries(plain.get_harvest_index()))
+    assert farm_state(chunked) == farm_state(plain)
+
+
+def test_index_covers_evicted_chunks(models):
+    plain, chunked = models
+    for model in (plain, chunked):
+        for col in range(1, 8):
+            model.get_map().set_tile((1, col), SOIL)
+            model.add_plant((1, col), BerryPlant())
+    # Using chunks elsewhere evicts the chunks with the berries
+    chunks = chunked.get_chunks()
+    rows, columns = chunked.get_dimensions()
+    for row in range(4, rows, 4):
+        for col in range(0, columns, 4):
+            chunked.get_map().get_tile((row, col))
+    assert not any(chunk.plants for chunk in chunks.get_resident())
+
+    for days in (5, 8, 1, 3, 1):
+        plain.advance_days(days)
+        chunked.advance_days(days)
+        loads = chunks.get_stats()["loads"]
+        index = chunked.get_harvest_index()
+        assert index.count_ready() == plain.get_harvest_index().count_ready()
+        assert len(index) == 7
+        # Counting reads nothing from disk, and listing loads no chunks
+        assert (index_queries(index)
+                == index_queries(plain.get_harvest_index()))
+        assert chunks.get_stats()["loads"] == loads
+
+
+def test_spill_directory_is_removed(tmp_path):
+    def spill_dirs():
+        return os.listdir(tmp_path)
+
+    with ChunkedFarmModel((40, 40), chunk_size=4, memory_budget=100,
+                          spill_dir=str(tmp_path)) as model:
+        # Changed chunks are written to the spill directory when evicted
+        for row in range(40):
+            model.get_map().set_tile((row, row), SOIL)
+        assert model.get_chunks().get_stats()["evictions"] > 0
+        assert os.listdir(os.path.join(tmp_path, spill_dirs()[0]))
+    assert spill_dirs() == []
+
+    # A farm which is never closed cleans up once it is garbage collected
+    model = ChunkedFarmModel((40, 40), spill_dir=str(tmp_path))
+    assert len(spill_dirs()) == 1
+    del model
+    gc.collect()
+    assert spill_dirs() == []
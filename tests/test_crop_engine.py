@@ -0,0 +1,88 @@
+import random
+
+import pytest
+
+from batch import apply_action
+from crop_engine import CropArrays
+from model import FarmModel, PotatoPlant, KalePlant, BerryPlant
+
+from helpers import MAP_FILE, UNLIMITED_ENERGY, farm_state, random_actions
+
+CROPS = (PotatoPlant, KalePlant, BerryPlant)
+
+
+def test_mapping_behaviour():
+    crops = CropArrays(capacity=2)
+    for i in range(5):
+        crops[(0, i)] = CROPS[i % 3]()
+    assert len(crops) == 5
+    assert (0, 3) in crops and (1, 0) not in crops
+    assert crops.get((1, 0)) is None
+    assert [crops[(0, i)].get_name() for i in range(3)] == ["potato", "kale", "berry"]
+
+    del crops[(0, 1)]
+    assert (0, 1) not in crops
+    crops[(2, 2)] = KalePlant()
+    assert len(crops) == 5
+    assert crops.pop((2, 2)).get_name() == "kale"
+    with pytest.raises(KeyError):
+        crops[(2, 2)]
+
+
+def test_views_write_to_the_arrays():
+    crops = CropArrays()
+    crops[(0, 0)] = BerryPlant()
+    crops[(0, 0)].age_days(13)
+    assert crops[(0, 0)].get_state() == (6, 13, 0)
+    assert crops[(0, 0)].harvest() == ("Berry", 3)
+    assert crops[(0, 0)].get_state() == (5, 13, 0)
+
+
+def test_rejects_other_plants():
+    with pytest.raises(TypeError):
+        CropArrays()[(0, 0)] = object()
+
+
+@pytest.mark.parametrize("days", [1, 3, 20])
+def test_age_matches_plant_objects(days):
+    rng = random.Random(days)
+    plants = {}
+    crops = CropArrays()
+    for i in range(3000):
+        plant = rng.choice(CROPS)()
+        plant.age_days(rng.randrange(25))
+        if rng.random() < 0.3 and plant.can_harvest():
+            plant.harvest()
+        plants[(i, 0)] = plant
+        crops[(i, 0)] = plant
+    # Leave some free slots behind
+    for i in range(0, 3000, 7):
+        del plants[(i, 0)]
+        del crops[(i, 0)]
+
+    for _ in range(3):
+        expected_changes = []
+        for position, plant in plants.items():
+            stage = plant.get_stage()
+            plant.age_days(days)
+            if plant.get_stage() != stage:
+                expected_changes.append((position, plant.get_stage()))
+        assert sorted(crops.age_changed(days)) == sorted(expected_changes)
+        assert {position: plant.get_state() for position, plant in crops.items()} \
+            == {position: plant.get_state() for position, plant in plants.items()}
+
+
+def test_vectorized_model_matches_object_model():
+    rng = random.Random(1)
+    models = [FarmModel(MAP_FILE), FarmModel(MAP_FILE, vectorized=True)]
+    events = [[], []]
+    for model, received in zip(models, events):
+        model.get_player().reduce_energy(-UNLIMITED_ENERGY)
+        model.get_player().add_item(("Berry Seed", 50))
+        model.get_events().subscribe(received.extend)
+
+    for action in random_actions(rng, 3000):
+        for model in models:
+            apply_action(model, action)
+        assert farm_state(models[0]) == farm_state(models[1])
+    assert sorted(map(repr, events[0])) == sorted(map(repr, events[1]))
@@ -0,0 +1,124 @@
+from constants import *
+from events import (
+    DayAdvanced,
+    EnergyChanged,
+    EventBus,
+    InventoryChanged,
+    MoneyChanged,
+    PlantAdded,
+    PlantAged,
+    PlantHarvested,
+    PlantRemoved,
+    PlayerMoved,
+    TileChanged,
+)
+from model import FarmModel, PotatoPlant, BerryPlant
+
+from helpers import MAP_FILE, UNLIMITED_ENERGY
+
+
+def subscribed_model():
+    model = FarmModel(MAP_FILE)
+    model.get_player().reduce_energy(-UNLIMITED_ENERGY)
+    batches = []
+    model.get_events().subscribe(batches.append)
+    return model, batches
+
+
+def test_nothing_is_delivered_without_subscribers():
+    bus = EventBus()
+    bus.emit(DayAdvanced, 2)
+    received = []
+    bus.subscribe(received.append)
+    bus.flush()
+    assert received == []
+
+
+def test_batches():
+    bus = EventBus()
+    received = []
+    bus.subscribe(received.append)
+    bus.emit(DayAdvanced, 2)
+    with bus:
+        bus.emit(EnergyChanged, 5)
+        with bus:
+            bus.emit(MoneyChanged, 3)
+        assert len(received) == 1
+    assert received == [[DayAdvanced(2)], [EnergyChanged(5), MoneyChanged(3)]]
+
+
+def test_filtered_subscribers_and_unsubscribe():
+    bus = EventBus()
+    days = []
+    everything = []
+    bus.subscribe(days.append, [DayAdvanced])
+    bus.subscribe(everything.append)
+    bus.emit(EnergyChanged, 1)
+    bus.emit(DayAdvanced, 2)
+    assert days == [[DayAdvanced(2)]]
+    assert len(everything) == 2
+
+    bus.unsubscribe(everything.append)
+    bus.emit(DayAdvanced, 3)
+    assert len(everything) == 2 and len(days) == 2
+
+
+def test_one_batch_per_action():
+    model, batches = subscribed_model()
+    model.move_player(DOWN)
+    model.till_soil((2, 2))
+    model.add_plant((2, 2), PotatoPlant())
+    assert [type(event) for event in batches[0]] == [EnergyChanged, PlayerMoved]
+    assert batches[1][-1] == TileChanged((2, 2), SOIL)
+    assert batches[2][-1] == PlantAdded((2, 2), "potato")
+    batches.clear()
+
+    model.advance_days(5)
+    assert len(batches) == 1
+    assert PlantAged((2, 2), 5) in batches[0]
+    assert batches[0][-1] == DayAdvanced(6)
+    batches.clear()
+
+    # Harvesting a potato also removes it, all in one batch
+    model.harvest_plant((2, 2))
+    assert len(batches) == 1
+    assert PlantHarvested((2, 2), "Potato", 1) in batches[0]
+    assert PlantRemoved((2, 2)) in batches[0]
+
+
+def test_player_events():
+    model, batches = subscribed_model()
+    player = model.get_player()
+    player.add_item(("Potato", 2))
+    player.sell("Potato", 10)
+    assert batches[0] == [InventoryChanged("Potato", 2, 2)]
+    assert MoneyChanged(player.get_money()) in batches[1]
+    assert InventoryChanged("Potato", -1, 1) in batches[1]
+
+
+def test_harvesting_a_berry_keeps_the_plant():
+    model, batches = subscribed_model()
+    model.get_plants()[(2, 2)] = BerryPlant()
+    model.rebuild_harvest_index()
+    model.advance_days(13)
+    batches.clear()
+    model.harvest_plant((2, 2))
+    assert not any(isinstance(event, PlantRemoved) for event in batches[0])
+
+
+def test_batched_methods_accept_keyword_arguments():
+    model, batches = subscribed_model()
+    model.till_soil(position=(1, 1))
+    assert model.get_map().get_tile((1, 1)) == SOIL
+    player = model.get_player()
+    player.set_money(100)
+    seeds = player.get_inventory().get("Potato Seed", 0)
+    player.buy(item_name="Potato Seed", price=BUY_PRICES["Potato Seed"])
+    assert player.get_inventory()["Potato Seed"] == seeds + 1
+    assert model.add_plant(position=(1, 1), plant=PotatoPlant())
+    assert len(batches) == 4
+
+
+def test_batched_methods_keep_their_metadata():
+    assert FarmModel.till_soil.__name__ == "till_soil"
+    assert "Tills the soil" in FarmModel.till_soil.__doc__
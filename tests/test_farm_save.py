@@ -0,0 +1,101 @@
+import random
+
+import pytest
+
+import farm_save
+from batch import apply_action
+from model import FarmModel
+
+from helpers import (MAP_FILE, UNLIMITED_ENERGY, farm_state, index_state,
+                     random_actions, scanned_index_state)
+
+
+def played_model(vectorized: bool) -> FarmModel:
+    model = FarmModel(MAP_FILE, vectorized)
+    model.get_player().reduce_energy(-UNLIMITED_ENERGY)
+    for action in random_actions(random.Random(1), 2000):
+        apply_action(model, action)
+    return model
+
+
+@pytest.fixture
+def save_file(tmp_path):
+    path = str(tmp_path / "farm.save")
+    farm_save.save(played_model(False), path)
+    return path
+
+
+@pytest.mark.parametrize("saved_vectorized", [False, True])
+@pytest.mark.parametrize("loaded_vectorized", [False, True])
+def test_round_trip(tmp_path, saved_vectorized, loaded_vectorized):
+    model = played_model(saved_vectorized)
+    path = str(tmp_path / "farm.save")
+    farm_save.save(model, path)
+    loaded = farm_save.load(path, loaded_vectorized)
+    assert farm_state(loaded) == farm_state(model)
+    assert (index_state(loaded.get_harvest_index())
+            == scanned_index_state(loaded.get_plants()))
+
+    # Saving the loaded game again gives an identical file
+    again = str(tmp_path / "again.save")
+    farm_save.save(loaded, again)
+    with open(path, "rb") as first, open(again, "rb") as second:
+        assert first.read() == second.read()
+
+
+def test_loaded_game_plays_like_the_saved_one(save_file):
+    model = farm_save.load(save_file, vectorized=False)
+    loaded = farm_save.load(save_file)
+    for action in random_actions(random.Random(2), 1000):
+        apply_action(model, action)
+        apply_action(loaded, action)
+    assert farm_state(loaded) == farm_state(model)
+
+
+def test_changes_never_reach_the_file(save_file):
+    with open(save_file, "rb") as file:
+        before = file.read()
+    model = farm_save.load(save_file)
+    model.advance_days(10)
+    model.get_map().set_tile((1, 1), "S")
+    with open(save_file, "rb") as file:
+        assert file.read() == before
+
+
+@pytest.mark.parametrize("length", [0, 7, 40, 100, -30, -1])
+def test_truncated_files_are_rejected(save_file, length):
+    with open(save_file, "rb") as file:
+        data = file.read()
+    with open(save_file, "wb") as file:
+        file.write(data[:length])
+    with pytest.raises(ValueError):
+        farm_save.load(save_file)
+
+
+def test_corrupt_headers_are_rejected(save_file):
+    with open(save_file, "rb") as file:
+        data = bytearray(file.read())
+    header = list(farm_save._HEADER.unpack_from(data))
+
+    for field, value in ((0, b"NOTASAVE"), (1, farm_save.VERSION + 1),
+                         (3, 10 ** 6), (12, 10 ** 8), (11, 1000)):
+        corrupt = header.copy()
+        corrupt[field] = value
+        with open(save_file, "wb") as file:
+            file.write(farm_save._HEADER.pack(*corrupt)
+                       + data[farm_save._HEADER.size :])
+        with pytest.raises(ValueError):
+            farm_save.load(save_file)
+
+
+def test_unknown_plant_kinds_are_rejected(save_file):
+    with open(save_file, "rb") as file:
+        data = bytearray(file.read())
+    header = farm_save._HEADER.unpack_from(data)
+    rows, columns, plant_count = header[3], header[4], header[12]
+    kinds = farm_save._align(farm_save._HEADER.size + rows * columns)
+    data[kinds + 24 * plant_count] = 99
+    with open(save_file, "wb") as file:
+        file.write(data)
+    with pytest.raises(ValueError, match="unknown kind"):
+        farm_save.load(save_file)
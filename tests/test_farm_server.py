@@ -0,0 +1,168 @@
+import asyncio
+import gc
+import json
+import shutil
+import weakref
+
+from farm_server import FarmServer, Session
+from model import FarmModel
+
+from helpers import MAP_FILE
+
+
+async def request(reader, writer, **fields) -> dict:
+    writer.write(json.dumps(fields).encode() + b"\n")
+    await writer.drain()
+    return json.loads(await reader.readline())
+
+
+def run_with_server(tmp_path, client):
+    shutil.copy(MAP_FILE, tmp_path / "farm.txt")
+    (tmp_path / "ragged.txt").write_text("GGG\nG\n")
+    farm_server = FarmServer(str(tmp_path))
+
+    async def main():
+        server = await farm_server.start()
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            await client(farm_server, port)
+
+    asyncio.run(main())
+
+
+def test_actions_and_state(tmp_path):
+    async def client(farm_server, port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        opened = await request(reader, writer, op="open", session="a",
+                               map="farm.txt", id=1)
+        assert opened["ok"] and opened["id"] == 1
+        moved = await request(reader, writer, session="a", action=["move", "s"])
+        assert moved["ok"]
+        assert any(event["type"] == "PlayerMoved" for event in moved["events"])
+        state = await request(reader, writer, op="state", session="a")
+        assert state["state"]["day"] == 1
+        closed = await request(reader, writer, op="close", session="a")
+        assert closed["ok"] and farm_server.get_sessions() == {}
+        writer.close()
+
+    run_with_server(tmp_path, client)
+
+
+def test_bad_maps_are_reported(tmp_path):
+    async def client(farm_server, port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        for map_name in ("ragged.txt", "missing.txt", "../farm.txt"):
+            response = await request(reader, writer, op="open", session="a",
+                                     map=map_name)
+            assert not response["ok"] and response["error"]
+        # The connection is still usable
+        response = await request(reader, writer, op="open", session="a",
+                                 map="farm.txt")
+        assert response["ok"]
+        writer.close()
+
+    run_with_server(tmp_path, client)
+
+
+def test_disconnecting_closes_owned_sessions(tmp_path):
+    async def client(farm_server, port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        other_reader, other_writer = await asyncio.open_connection("127.0.0.1",
+                                                                   port)
+        await request(reader, writer, op="open", session="a", map="farm.txt")
+        await request(reader, writer, op="open", session="b", map="farm.txt")
+        await request(other_reader, other_writer, op="open", session="c",
+                      map="farm.txt")
+        sessions = dict(farm_server.get_sessions())
+
+        writer.close()
+        await writer.wait_closed()
+        for name in ("a", "b"):
+            await asyncio.wait_for(sessions[name].wait_closed(), 5)
+        assert list(farm_server.get_sessions()) == ["c"]
+
+        # Other connections may still use the sessions they opened
+        response = await request(other_reader, other_writer, op="state",
+                                 session="c")
+        assert response["ok"]
+        other_writer.close()
+
+    run_with_server(tmp_path, client)
+
+
+def test_closed_sessions_are_released(tmp_path):
+    async def client(farm_server, port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        await request(reader, writer, op="open", session="a", map="farm.txt")
+        session = weakref.ref(farm_server.get_sessions()["a"])
+        await request(reader, writer, op="close", session="a")
+        # The connection no longer keeps the farm alive once the session
+        # has finished
+        for _ in range(100):
+            gc.collect()
+            if session() is None:
+                break
+            await asyncio.sleep(0.01)
+        assert session() is None
+        writer.close()
+
+    run_with_server(tmp_path, client)
+
+
+def test_long_lines_close_the_connection(tmp_path):
+    async def client(farm_server, port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        await request(reader, writer, op="open", session="a", map="farm.txt")
+        writer.write(b"x" * 100000 + b"\n")
+        response = json.loads(await reader.readline())
+        assert not response["ok"] and "too long" in response["error"]
+        assert await reader.read() == b""
+        assert farm_server.get_sessions() == {}
+        writer.close()
+
+    run_with_server(tmp_path, client)
+
+
+class FakeConnection:
+    """Collects responses. Flushing waits until released."""
+
+    def __init__(self) -> None:
+        self.sessions = []
+        self.responses = []
+        self.released = asyncio.Event()
+
+    def send(self, response: dict) -> None:
+        self.responses.append(response)
+
+    async def flush(self) -> None:
+        await self.released.wait()
+
+
+def test_stopping_answers_pending_requests():
+    async def main():
+        connection = FakeConnection()
+        session = Session("a", FarmModel(MAP_FILE), 1, connection)
+        connection.sessions.append(session)
+
+        # The first request is being answered, the second fills the queue
+        # and the third waits for room
+        await session.submit(connection, {"id": 1, "op": "state"})
+        await asyncio.sleep(0)
+        await session.submit(connection, {"id": 2, "op": "state"})
+        waiting = asyncio.create_task(
+            session.submit(connection, {"id": 3, "op": "state"}))
+        await asyncio.sleep(0)
+        assert not waiting.done()
+
+        connection.released.set()
+        await session.stop()
+        await asyncio.wait_for(waiting, 5)
+        await session.submit(connection, {"id": 4, "op": "state"})
+        assert connection.sessions == []
+        assert [response["id"] for response in connection.responses] == [1, 2, 3, 4]
+        assert connection.responses[0]["ok"]
+        for response in connection.responses[1:]:
+            assert response == {"id": response["id"], "session": "a",
+                                "ok": False, "error": "session closed"}
+
+    asyncio.run(main())
@@ -0,0 +1,76 @@
+import random
+
+import pytest
+
+from batch import apply_action
+from farm_store import FarmRecorder, FarmStore
+from model import FarmModel
+
+from helpers import (MAP_FILE, UNLIMITED_ENERGY, farm_state, index_state,
+                     random_actions, scanned_index_state)
+
+
+def played_model(seed: int, vectorized: bool = False) -> FarmModel:
+    model = FarmModel(MAP_FILE, vectorized)
+    model.get_player().reduce_energy(-UNLIMITED_ENERGY)
+    for action in random_actions(random.Random(seed), 2000):
+        apply_action(model, action)
+    return model
+
+
+@pytest.mark.parametrize("saved_vectorized", [False, True])
+@pytest.mark.parametrize("loaded_vectorized", [False, True])
+def test_round_trip(saved_vectorized, loaded_vectorized):
+    model = played_model(1, saved_vectorized)
+    with FarmStore(":memory:") as store:
+        store.save("farm", model)
+        loaded = store.load("farm", loaded_vectorized)
+    assert farm_state(loaded) == farm_state(model)
+    assert (index_state(loaded.get_harvest_index())
+            == scanned_index_state(loaded.get_plants()))
+
+
+def test_saving_again_replaces_the_farm():
+    with FarmStore(":memory:") as store:
+        store.save("farm", played_model(1))
+        model = played_model(2)
+        store.save("farm", model)
+        assert store.list_farms() == ["farm"]
+        assert farm_state(store.load("farm")) == farm_state(model)
+
+
+@pytest.mark.parametrize("vectorized", [False, True])
+def test_recorder_keeps_the_store_up_to_date(vectorized):
+    model = played_model(3)
+    rng = random.Random(4)
+    with FarmStore(":memory:") as store:
+        recorder = FarmRecorder(store, "farm", model)
+        for action in random_actions(rng, 2000):
+            apply_action(model, action)
+        recorder.close()
+        # Plants which only grew since they were written are aged on loading
+        assert farm_state(store.load("farm", vectorized)) == farm_state(model)
+        ledger = store.get_ledger("farm")
+        assert [entry.day for entry in ledger] == sorted(
+            {entry.day for entry in ledger})
+
+
+def test_queries_and_delete():
+    model = played_model(5)
+    with FarmStore(":memory:") as store:
+        store.save("farm", model)
+        counts = {}
+        for plant in model.get_plants().values():
+            counts[plant.get_name()] = counts.get(plant.get_name(), 0) + 1
+        assert store.count_plants("farm") == counts
+        kale = dict(store.iter_plants("farm", "kale"))
+        assert all(plant.get_name() == "kale" for plant in kale.values())
+        assert len(kale) == counts.get("kale", 0)
+        assert isinstance(store.get_farm_id("farm"), int)
+
+        store.delete("farm")
+        assert store.list_farms() == []
+        with pytest.raises(KeyError):
+            store.load("farm")
+        with pytest.raises(KeyError):
+            store.get_farm_id("farm")
@@ -0,0 +1,123 @@
+import game_loop
+from game_loop import RealTimeLoop
+from model import FarmModel, PotatoPlant
+
+from helpers import MAP_FILE
+
+
+class FakeClock:
+    """A perf_counter replacement which only moves when told to, or by step
+    on every call.
+    """
+
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.step = 0.0
+
+    def __call__(self) -> float:
+        now = self.now
+        self.now += self.step
+        return now
+
+
+class FakeWidget:
+    """Records callbacks scheduled with after, to be run by the test."""
+
+    def __init__(self) -> None:
+        self.callbacks = {}
+        self._next_id = 0
+
+    def after(self, delay, callback):
+        self._next_id += 1
+        self.callbacks[self._next_id] = callback
+        return self._next_id
+
+    def after_cancel(self, callback_id):
+        self.callbacks.pop(callback_id, None)
+
+    def run(self) -> None:
+        callbacks, self.callbacks = self.callbacks, {}
+        for callback in callbacks.values():
+            callback()
+
+
+def make_loop(monkeypatch, **kwargs):
+    clock = FakeClock()
+    monkeypatch.setattr(game_loop.time, "perf_counter", clock)
+    model = FarmModel(MAP_FILE)
+    widget = FakeWidget()
+    days = []
+    loop = RealTimeLoop(widget, model, 60, on_day=lambda: days.append(1),
+                        **kwargs)
+    return clock, model, widget, loop, days
+
+
+def test_days_pass_at_the_simulation_rate(monkeypatch):
+    clock, model, widget, loop, _ = make_loop(monkeypatch)
+    loop.start()
+    widget.run()
+    assert model.get_days_elapsed() == 1
+    for _ in range(5):
+        clock.now += 1
+        widget.run()
+    assert model.get_days_elapsed() == 6
+    assert loop.get_stats() == {"simulated": 5, "advanced": 0, "queued": 0}
+
+
+def test_falling_behind_never_loses_days(monkeypatch):
+    clock, model, widget, loop, days = make_loop(monkeypatch, max_catch_up=3)
+    plants = model.get_plants()
+    plants[(1, 1)] = PotatoPlant()
+    model.rebuild_harvest_index()
+    loop.start()
+    widget.run()
+
+    # One very slow frame owes ten days
+    clock.now += 10
+    widget.run()
+    while loop.get_stats()["queued"]:
+        widget.run()
+    assert model.get_days_elapsed() == 11
+    assert plants[(1, 1)].get_stage() == 5
+    assert loop.get_stats() == {"simulated": 10, "advanced": 7, "queued": 0}
+    # One callback for the days applied at once, then one per sliced day
+    assert len(days) == 4
+
+
+def test_stop_and_start(monkeypatch):
+    clock, model, widget, loop, _ = make_loop(monkeypatch)
+    loop.start()
+    assert loop.is_running()
+    loop.stop()
+    assert not loop.is_running()
+    clock.now += 5
+    widget.run()
+    assert model.get_days_elapsed() == 1
+
+
+
+def test_catch_up_is_sliced_across_ticks(monkeypatch):
+    clock, model, widget, loop, days = make_loop(
+        monkeypatch, max_catch_up=1, slice_ms=1, plants_per_slice=2)
+    plants = model.get_plants()
+    for col in range(1, 9):
+        plants[(1, col)] = PotatoPlant()
+    model.rebuild_harvest_index()
+    loop.start()
+    widget.run()
+
+    # Ten days are owed, and each tick only has time for one slice of plants
+    clock.now += 10
+    clock.step = 0.0006
+    ticks = 0
+    while not loop.get_stats()["advanced"]:
+        widget.run()
+        ticks += 1
+    # The nine days beyond max_catch_up took four slices of two plants
+    assert ticks > 4
+    while loop.get_stats()["queued"]:
+        widget.run()
+    assert model.get_days_elapsed() == 11
+    assert loop.get_stats() == {"simulated": 10, "advanced": 9, "queued": 0}
+    assert len(days) == 2
+    assert all(plant.get_stage() == 5 for plant in plants.values())
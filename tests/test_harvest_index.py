@@ -0,0 +1,104 @@
+import random
+
+import pytest
+
+from batch import apply_action
+from events import PlantAged
+from model import FarmModel, HarvestIndex, PotatoPlant, KalePlant, BerryPlant
+
+from helpers import (MAP_FILE, UNLIMITED_ENERGY, index_state, random_actions,
+                     scanned_index_state)
+
+
+def new_model(vectorized: bool = False) -> FarmModel:
+    model = FarmModel(MAP_FILE, vectorized)
+    model.get_player().reduce_energy(-UNLIMITED_ENERGY)
+    model.get_player().add_item(("Berry Seed", 50))
+    return model
+
+
+def test_queries():
+    index = HarvestIndex()
+    index.add((0, 0), "potato", 5)
+    index.add((0, 1), "potato", 2)
+    index.add((0, 2), "berry", 6)
+    assert sorted(index.get_ready()) == [(0, 0), (0, 2)]
+    assert index.get_ready("potato") == [(0, 0)]
+    assert index.count_ready() == 2 and index.count_ready("kale") == 0
+    assert index.count("potato") == 2 and index.count(stage=6) == 1
+    assert index.count("potato", 2) == 1 and len(index) == 3
+
+    index.update((0, 2), "berry", 6, 5)
+    index.remove((0, 0), "potato", 5)
+    assert index.get_ready() == []
+    assert index.get_stage_counts("berry") == {5: 1}
+    assert len(index) == 2
+
+
+@pytest.mark.parametrize("vectorized", [False, True])
+def test_index_matches_scan_during_play(vectorized):
+    rng = random.Random(3)
+    model = new_model(vectorized)
+    index = model.get_harvest_index()
+    for action in random_actions(rng, 3000):
+        apply_action(model, action)
+        assert index_state(index) == scanned_index_state(model.get_plants())
+
+
+@pytest.mark.parametrize("vectorized", [False, True])
+def test_rebuild(vectorized):
+    model = new_model(vectorized)
+    plants = model.get_plants()
+    crops = (PotatoPlant, KalePlant, BerryPlant)
+    for i in range(60):
+        plants[(i // 10, i % 10)] = crops[i % 3]()
+    model.rebuild_harvest_index()
+    model.advance_days(12)
+    assert index_state(model.get_harvest_index()) == scanned_index_state(plants)
+
+
+@pytest.mark.parametrize("vectorized", [False, True])
+def test_sliced_day_with_actions_part_way_through(vectorized):
+    rng = random.Random(4)
+    model = new_model(vectorized)
+    for action in random_actions(rng, 1500):
+        apply_action(model, action)
+    index = model.get_harvest_index()
+    events = []
+    model.get_events().subscribe(events.extend)
+
+    for _ in range(20):
+        events.clear()
+        for _ in model.iter_advance_days(rng.randrange(1, 4), batch_size=3):
+            for action in random_actions(rng, 3):
+                if action[0] not in ("new_day", "advance"):
+                    apply_action(model, action)
+            assert index_state(index) == scanned_index_state(model.get_plants())
+        plants = model.get_plants()
+        for event in events:
+            if isinstance(event, PlantAged):
+                assert plants[event.position].get_stage() == event.stage
+
+
+@pytest.mark.parametrize("vectorized", [False, True])
+def test_plant_removed_part_way_through_a_day(vectorized):
+    model = new_model(vectorized)
+    model.get_plants()[(0, 0)] = PotatoPlant()
+    model.get_plants()[(0, 1)] = PotatoPlant()
+    model.rebuild_harvest_index()
+    model.advance_days(3)
+    events = []
+    model.get_events().subscribe(events.extend)
+
+    day = model.iter_new_day(batch_size=1)
+    next(day)
+    model.remove_plant((0, 1))
+    for _ in day:
+        pass
+
+    index = model.get_harvest_index()
+    assert index.get_ready() == [(0, 0)]
+    assert index.get_stage_counts("potato") == {5: 1}
+    assert len(index) == 1
+    assert [event.position for event in events
+            if isinstance(event, PlantAged)] == [(0, 0)]
@@ -0,0 +1,62 @@
+import pytest
+
+from map_io import convert_map, load_tiles, read_map, read_rle_map, write_rle_map
+
+from helpers import MAP_FILE
+
+ROWS = ["GGGGGG", "GUUSSG", "GUUSSG", "GUUSSG", "GGGGGG", "GUUSSG"]
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_round_trip(tmp_path, compress):
+    path = str(tmp_path / "map.rle")
+    # Repeated rows are stored as empty rows
+    write_rle_map(path, ROWS, compress)
+    grid = read_rle_map(path)
+    assert grid.get_dimensions() == (len(ROWS), len(ROWS[0]))
+    assert [grid.row_bytes(row).decode() for row in range(len(ROWS))] == ROWS
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_convert_and_load_by_extension(tmp_path, compress):
+    path = str(tmp_path / "map.rle")
+    convert_map(MAP_FILE, path, compress)
+    assert load_tiles(path).to_bytes() == load_tiles(MAP_FILE).to_bytes()
+    assert load_tiles(MAP_FILE).to_bytes() == "".join(read_map(MAP_FILE)).encode()
+
+
+def test_bytes_rows_and_long_runs(tmp_path):
+    path = str(tmp_path / "map.rle")
+    rows = [b"U" * 100000, b"S" * 50000 + b"G" * 50000, b"S" * 50000 + b"G" * 50000]
+    write_rle_map(path, rows)
+    assert read_rle_map(path).to_bytes() == b"".join(rows)
+
+
+def test_ragged_rows_are_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        write_rle_map(str(tmp_path / "map.rle"), ["GGG", "GG"])
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_truncated_files_are_rejected(tmp_path, compress):
+    path = tmp_path / "map.rle"
+    write_rle_map(str(path), ROWS, compress)
+    data = path.read_bytes()
+    for length in (0, 5, 19, len(data) - 3):
+        path.write_bytes(data[:length])
+        with pytest.raises(ValueError):
+            read_rle_map(str(path))
+
+
+def test_corrupt_files_are_rejected(tmp_path):
+    path = tmp_path / "map.rle"
+    write_rle_map(str(path), ROWS, compress=True)
+    data = bytearray(path.read_bytes())
+    data[25:30] = b"\xff" * 5
+    path.write_bytes(bytes(data))
+    with pytest.raises(ValueError):
+        read_rle_map(str(path))
+
+    path.write_bytes(b"NOTRLE!" + bytes(20))
+    with pytest.raises(ValueError):
+        read_rle_map(str(path))
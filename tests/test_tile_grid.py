@@ -0,0 +1,91 @@
+import pytest
+
+from constants import *
+from map_io import read_map
+from model import FarmModel
+from tile_grid import TileGrid
+
+from helpers import MAP_FILE
+
+ROWS = ["GGGG", "GUSG", "GSSG"]
+
+
+def test_rows_behave_like_strings():
+    grid = TileGrid.from_rows(ROWS)
+    assert len(grid) == len(ROWS)
+    assert grid.get_dimensions() == (3, 4)
+    for row, expected in zip(grid, ROWS):
+        assert row == expected
+        assert str(row) == expected
+        assert len(row) == len(expected)
+        assert list(row) == list(expected)
+        assert row[1:3] == expected[1:3]
+        assert row[::-1] == expected[::-1]
+        assert [row[i] for i in range(-4, 4)] == [expected[i] for i in range(-4, 4)]
+    assert grid[-1] == ROWS[-1]
+    assert grid[0] == grid[0] and grid[0] != grid[1]
+    assert grid[1] != 5
+
+
+def test_out_of_range_indices():
+    grid = TileGrid.from_rows(ROWS)
+    with pytest.raises(IndexError):
+        grid[3]
+    with pytest.raises(IndexError):
+        grid[-4]
+    with pytest.raises(IndexError):
+        grid[0][4]
+
+
+def test_out_of_range_positions():
+    grid = TileGrid.from_rows(ROWS)
+    for position in ((0, 4), (1, 5), (3, 0), (-4, 0), (0, -5), (1, 40)):
+        with pytest.raises(IndexError):
+            grid.get_tile(position)
+        with pytest.raises(IndexError):
+            grid.set_tile(position, SOIL)
+    assert grid.to_rows() == ROWS
+    # Negative indices count from the end, like the rows of read_map
+    assert grid.get_tile((1, -2)) == ROWS[1][-2]
+    assert grid.get_tile((-1, -1)) == ROWS[-1][-1]
+    grid.set_tile((-2, -3), SOIL)
+    assert grid.get_tile((1, 1)) == SOIL
+
+
+def test_tilling_off_the_map_changes_nothing():
+    model = FarmModel(MAP_FILE)
+    rows, columns = model.get_dimensions()
+    tiles = model.get_map().to_bytes()
+    for position in ((0, columns + 1), (rows, 0)):
+        with pytest.raises(IndexError):
+            model.till_soil(position)
+    assert model.get_map().to_bytes() == tiles
+
+
+def test_set_tile():
+    grid = TileGrid.from_rows(ROWS)
+    row = grid[1]
+    grid.set_tile((1, 1), SOIL)
+    assert grid.get_tile((1, 1)) == SOIL
+    # Rows are views, so they see the change
+    assert row == "GSSG"
+    assert grid.to_rows() == ["GGGG", "GSSG", "GSSG"]
+    assert grid.to_bytes() == b"GGGGGSSGGSSG"
+
+
+def test_round_trip_with_read_map():
+    rows = read_map(MAP_FILE)
+    grid = TileGrid.from_rows(rows)
+    assert grid.to_rows() == rows
+    assert [str(row) for row in grid] == rows
+
+
+def test_ragged_rows_are_rejected():
+    with pytest.raises(ValueError):
+        TileGrid.from_rows(["GGG", "GG"])
+
+
+def test_empty_grid():
+    grid = TileGrid.from_rows([])
+    assert grid.get_dimensions() == (0, 0)
+    assert grid.to_rows() == []
@@ -0,0 +1,167 @@
+"""Mutable storage for the tiles of a farm map.
+
+A TileGrid keeps every tile as one byte in a single flat buffer, so reading or
+changing a tile is O(1) and does not allocate. Rows are exposed as TileRow
+views which index, iterate and compare like the strings returned by read_map,
+so code written against a list of strings keeps working.
+"""
+from collections.abc import Iterable, Iterator
+from typing import Union
+
+
+class TileRow:
+    """Read-only view of one row of a TileGrid, which behaves like a string
+    of tile characters.
+    """
+
+    __slots__ = ("_grid", "_row")
+
+    def __init__(self, grid: "TileGrid", row: int) -> None:
+        """Constructor for a view of the given row.
+
+        Parameters:
+            grid: The grid the row belongs to.
+            row: The index of the row.
+        """
+        self._grid = grid
+        self._row = row
+
+    def __getitem__(self, col: Union[int, slice]) -> str:
+        if isinstance(col, slice):
+            return str(self)[col]
+        width = len(self)
+        if col < 0:
+            col += width
+        if not 0 <= col < width:
+            raise IndexError("column index out of range")
+        return self._grid.get_tile((self._row, col))
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(str(self))
+
+    def __len__(self) -> int:
+        return self._grid.get_dimensions()[1]
+
+    def __str__(self) -> str:
+        return self._grid.row_bytes(self._row).decode("ascii")
+
+    def __repr__(self) -> str:
+        return f"TileRow({str(self)!r})"
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, TileRow):
+            return self._grid.row_bytes(self._row) == other._grid.row_bytes(
+                other._row
+            )
+        if isinstance(other, str):
+            return str(self) == other
+        return NotImplemented
+
+    __hash__ = None
+
+
+class TileGrid:
+    """A rectangular grid of tiles stored one byte per tile in a flat,
+    writable buffer.
+    """
+
+    def __init__(
+        self, tiles: Union[bytearray, memoryview], dimensions: tuple[int, int]
+    ) -> None:
+        """Constructor for a grid over the given buffer.
+
+        Parameters:
+            tiles: A writable buffer holding the tiles in row-major order, one
+                ASCII character per tile.
+            dimensions: The dimensions of the grid as (#rows, #columns).
+
+        Pre-condition:
+            len(tiles) == dimensions[0] * dimensions[1]
+        """
+        self._tiles = tiles
+        self._rows, self._cols = dimensions
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[str]) -> "TileGrid":
+        """Builds a grid from rows of tile characters, such as the list
+            returned by read_map.
+
+        Parameters:
+            rows: The rows of the map, top row first.
+
+        Returns:
+            A new grid containing the given tiles.
+        """
+        tiles = bytearray()
+        num_rows = 0
+        num_cols = None
+        for row in rows:
+            if num_cols is None:
+                num_cols = len(row)
+            elif len(row) != num_cols:
+                raise ValueError(
+                    f"Row {num_rows} has {len(row)} tiles, expected {num_cols}"
+                )
+            tiles += row.encode("ascii")
+            num_rows += 1
+        return cls(tiles, (num_rows, num_cols or 0))
+
+    def get_dimensions(self) -> tuple[int, int]:
+        """Returns the dimensions of the grid as (#rows, #columns)."""
+        return (self._rows, self._cols)
+
+    def _offset(self, position: tuple[int, int]) -> int:
+        """Returns the index in the buffer of the tile at a (row, col)
+        position. Negative indices count from the end, as for a list of
+        strings, and anything outside the grid raises IndexError.
+        """
+        row, col = position
+        rows = self._rows
+        cols = self._cols
+        if row < 0:
+            row += rows
+        if col < 0:
+            col += cols
+        if not (0 <= row < rows and 0 <= col < cols):
+            raise IndexError(f"tile position {position} out of range")
+        return row * cols + col
+
+    def get_tile(self, position: tuple[int, int]) -> str:
+        """Returns the tile at the given (row, col) position."""
+        return chr(self._tiles[self._offset(position)])
+
+    def set_tile(self, position: tuple[int, int], tile: str) -> None:
+        """Sets the tile at the given (row, col) position.
+
+        Parameters:
+            position: The position of the tile to change.
+            tile: The new tile, as a single character (e.g. SOIL).
+        """
+        self._tiles[self._offset(position)] = ord(tile)
+
+    def row_bytes(self, row: int) -> bytes:
+        """Returns the tiles in the given row as bytes."""
+        start = row * self._cols
+        return bytes(self._tiles[start : start + self._cols])
+
+    def to_bytes(self) -> bytes:
+        """Returns every tile in row-major order as bytes, one per tile."""
+        return bytes(self._tiles)
+
+    def to_rows(self) -> list[str]:
+        """Returns the grid as a list of strings, in the format of read_map."""
+        return [str(row) for row in self]
+
+    def __getitem__(self, row: int) -> TileRow:
+        if row < 0:
+            row += self._rows
+        if not 0 <= row < self._rows:
+            raise IndexError("row index out of range")
+        return TileRow(self, row)
+
+    def __iter__(self) -> Iterator[TileRow]:
+        for row in range(self._rows):
+            yield TileRow(self, row)
+
+    def __len__(self) -> int:
+        return self._rows